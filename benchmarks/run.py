@@ -0,0 +1,190 @@
+"""Benchmarks for DuckDNSClient / UpdateWorker against local stand-in servers (see standins.py).
+Nothing leaves the machine. Run from the repository root :
+
+    python benchmarks/run.py                       # print the results
+    python benchmarks/run.py --json results.json   # also save them
+    python benchmarks/run.py --baseline results.json --tolerance 0.25   # exit 1 on a regression
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from standins import Profile, StandInServers  # noqa: E402
+
+TOKEN = "bench-token"
+# The scenarios measure the client itself, so the request budgets and the IP cache are off
+BENCH_NETWORK = {"update_rate": "0", "provider_rate": "0", "ip_cache_ttl": "0"}
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+def _write_config(folder, domains, accounts=1, network=None):
+    """Writes a config.ini with `domains` spread over `accounts` tokens (all accepted by the stand-in)."""
+    lines = []
+    for index in range(accounts):
+        section = "DuckDNS" if index == 0 else f"DuckDNS:bench{index}"
+        lines += [f"[{section}]", f"domain = {','.join(domains[index::accounts])}", f"token = {TOKEN if index == 0 else f'{TOKEN}-{index}'}", ""]
+    lines += ["[Settings]", "interval = 5", "notifications = NO", ""]
+    lines += ["[Network]"] + [f"{key} = {value}" for key, value in dict(BENCH_NETWORK, **(network or {})).items()] + [""]
+    path = os.path.join(folder, "config.ini")
+    with open(path, "w", encoding="utf-8") as config_file: config_file.write("\n".join(lines))
+    return path
+
+def _make_worker(standins, folder, domains, accounts=1, network=None):
+    from duckdns.config import ConfigManager
+    from duckdns.worker import UpdateWorker
+    worker = UpdateWorker(ConfigManager(_write_config(folder, domains, accounts, network)))
+    standins.attach(worker.client)
+    return worker
+
+# --- Scenarios ---
+def bench_cycle(standins, folder, iterations):
+    """Latency of a full update cycle for one domain, with and without a DNS update being sent."""
+    worker = _make_worker(standins, folder, ["bench"])
+    unchanged, updated = [], []
+    worker.run_update_cycle()  # warm up the connection pool and the provider scoreboard
+    for _ in range(iterations):
+        started = time.perf_counter(); worker.run_update_cycle(); unchanged.append(time.perf_counter() - started)
+        worker.last_ips.clear()
+        started = time.perf_counter(); worker.run_update_cycle(); updated.append(time.perf_counter() - started)
+    stats = worker.client.connection_stats()
+    worker.client.close()
+    return {"cycle_unchanged_p50_ms": _percentile(unchanged, 0.5) * 1000, "cycle_unchanged_p95_ms": _percentile(unchanged, 0.95) * 1000,
+            "cycle_update_p50_ms": _percentile(updated, 0.5) * 1000, "cycle_update_p95_ms": _percentile(updated, 0.95) * 1000,
+            "connection_reuse_ratio": stats["reused"] / max(stats["requests"], 1)}
+
+def bench_throughput(standins, folder, domain_count, accounts):
+    """One cycle that has to update `domain_count` domains spread over `accounts` tokens."""
+    domains = [f"bench-host-{index:05d}" for index in range(domain_count)]
+    worker = _make_worker(standins, folder, domains, accounts)
+    worker.run_update_cycle(); worker.last_ips.clear()
+    requests_before = standins.update_requests
+    started = time.perf_counter(); worker.run_update_cycle(); elapsed = time.perf_counter() - started
+    worker.client.close()
+    return {"throughput_domains_per_s": domain_count / elapsed, "throughput_cycle_ms": elapsed * 1000,
+            "throughput_update_requests": standins.update_requests - requests_before}
+
+def bench_lookup_degraded(standins, folder, iterations):
+    """Public IP discovery with flaky providers: 20% failures and 10% wrong answers each."""
+    from duckdns.client import DuckDNSClient
+    standins.set_provider_profile(Profile(latency=0.01, jitter=0.02, failure_rate=0.2, wrong_rate=0.1))
+    results = {}
+    try:
+        for mode in DuckDNSClient.LOOKUP_MODES:
+            client = standins.attach(DuckDNSClient(lookup_mode=mode, quorum=2))
+            # A DNS failure is a missing reply, so shorten its timeout to keep the sequential mode measurable
+            client.DNS_TIMEOUT = 0.25
+            timings, correct = [], 0
+            for _ in range(iterations):
+                started = time.perf_counter(); ip = client.get_public_ip(standins.public_ip); timings.append(time.perf_counter() - started)
+                correct += ip == standins.public_ip
+            client.close()
+            results[f"lookup_{mode}_p50_ms"] = _percentile(timings, 0.5) * 1000
+            results[f"lookup_{mode}_p95_ms"] = _percentile(timings, 0.95) * 1000
+            results[f"lookup_{mode}_correct_ratio"] = correct / iterations
+    finally: standins.set_provider_profile(Profile())
+    return results
+
+def bench_memory(standins, folder, instances):
+    """Python heap allocated per UpdateWorker (with its client and connection pool), after one cycle."""
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    workers = []
+    for index in range(instances):
+        instance_folder = os.path.join(folder, f"instance{index}"); os.makedirs(instance_folder, exist_ok=True)
+        worker = _make_worker(standins, instance_folder, [f"mem{index}"])
+        worker.run_update_cycle(); workers.append(worker)
+    allocated = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, "filename"))
+    tracemalloc.stop()
+    for worker in workers: worker.client.close()
+    return {"memory_per_instance_kib": allocated / instances / 1024}
+
+STARTUP_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+from duckdns.config import ConfigManager
+from duckdns.worker import UpdateWorker
+imported = time.perf_counter()
+worker = UpdateWorker(ConfigManager(sys.argv[1]))
+created = time.perf_counter()
+print(json.dumps({"import": imported - started, "create": created - imported}))
+"""
+
+def bench_startup(folder, runs):
+    """Cold import of the update engine and UpdateWorker construction, each in a fresh interpreter."""
+    config = _write_config(folder, ["startup"])
+    environment = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""), LOCALAPPDATA=folder)
+    imports, creates = [], []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET, config], capture_output=True, text=True, env=environment, check=True).stdout
+        timing = json.loads(output.strip().splitlines()[-1])
+        imports.append(timing["import"]); creates.append(timing["create"])
+    return {"startup_import_ms": statistics.median(imports) * 1000, "startup_create_ms": statistics.median(creates) * 1000}
+
+# --- Reporting ---
+# Results where a higher number is better; everything else is a cost
+HIGHER_IS_BETTER = ("throughput_domains_per_s", "connection_reuse_ratio", "_correct_ratio")
+
+def compare(results, baseline, tolerance):
+    """Returns the names of results that got worse than `baseline` by more than `tolerance`."""
+    regressions = []
+    for name, value in results.items():
+        old = baseline.get(name)
+        if not isinstance(old, (int, float)) or not old: continue
+        higher_is_better = any(name.endswith(suffix) for suffix in HIGHER_IS_BETTER)
+        change = (old - value) / old if higher_is_better else (value - old) / old
+        if change > tolerance: regressions.append(f"{name} : {old:.3f} -> {value:.3f} ({change:+.0%})")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks DuckDNS Connector against local stand-in servers.")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for a fast smoke run")
+    parser.add_argument("--domains", type=int, default=1000, help="domains in the throughput scenario (default 1000)")
+    parser.add_argument("--latency", type=float, default=0.005, help="stand-in latency in seconds (default 0.005)")
+    parser.add_argument("--json", metavar="PATH", help="write the results to a JSON file")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a result counts as a regression (default 0.25)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.CRITICAL)
+    iterations = 5 if args.quick else 30
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="duckdns-bench-") as folder, StandInServers(tokens=[TOKEN] + [f"{TOKEN}-{i}" for i in range(1, 5)]) as standins:
+        os.environ["LOCALAPPDATA"] = folder
+        standins.set_provider_profile(Profile(latency=args.latency))
+        standins.update_profile = Profile(latency=args.latency)
+        scenarios = [("cycle", lambda path: bench_cycle(standins, path, iterations)),
+                     ("throughput", lambda path: bench_throughput(standins, path, args.domains, 4)),
+                     ("lookup", lambda path: bench_lookup_degraded(standins, path, iterations)),
+                     ("memory", lambda path: bench_memory(standins, path, 5 if args.quick else 20)),
+                     ("startup", lambda path: bench_startup(path, 3 if args.quick else 7))]
+        for name, scenario in scenarios:
+            path = os.path.join(folder, name); os.makedirs(path)
+            standins.reseed(1)
+            started = time.perf_counter()
+            results.update(scenario(path))
+            print(f"[{name} finished in {time.perf_counter() - started:.1f}s]", file=sys.stderr)
+
+    width = max(len(name) for name in results)
+    for name, value in results.items(): print(f"{name:<{width}}  {value:12.3f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output: json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file: regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions: print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
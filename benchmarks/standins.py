@@ -0,0 +1,175 @@
+"""Local stand-ins for DuckDNS and the public IP providers, for benchmarks and manual testing.
+Each provider path gets its own latency / failure / wrong-answer profile."""
+import random
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class Profile:
+    """How a stand-in endpoint misbehaves. `latency` is in seconds (plus up to `jitter` more),
+    `failure_rate` answers with HTTP 500 / no DNS reply, `wrong_rate` answers with a wrong IP."""
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, wrong_rate=0.0):
+        self.latency, self.jitter = latency, jitter
+        self.failure_rate, self.wrong_rate = failure_rate, wrong_rate
+
+    def delay(self, rng):
+        time.sleep(self.latency + (rng.uniform(0, self.jitter) if self.jitter else 0))
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so that the client's keep-alive pool behaves as it would against the real servers
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without this, Nagle + delayed ACK add ~40ms to keep-alive requests
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args): pass
+
+    def _send(self, status, body):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        standin, url = self.server.standin, urlparse(self.path)
+        if url.path == "/update": return self._send(*standin.handle_update(parse_qs(url.query)))
+        return self._send(*standin.handle_ip(url.path))
+
+class StandInServers:
+    """One HTTP server for the DuckDNS update API and every HTTPS provider, plus one UDP server
+    for the dns:// providers. Use as a context manager, or call start()/stop()."""
+    WRONG_IP = "198.51.100.77"
+
+    def __init__(self, public_ip="203.0.113.10", public_ipv6="2001:db8::10", tokens=("bench-token",), seed=1):
+        self.public_ip, self.public_ipv6 = public_ip, public_ipv6
+        self.tokens = set(tokens)
+        self.invalid_domains = set()  # answered with KO, like a domain that belongs to another account
+        self.records = {}  # domain -> {4: ip, 6: ip} as published by updates, served for <domain>.duckdns.org
+        self.update_profile, self.provider_profiles, self.default_profile = Profile(), {}, Profile()
+        self.update_requests, self.updated_domains, self.ip_requests = 0, 0, 0
+        self._rng, self._lock = random.Random(seed), threading.Lock()
+        self.http, self.dns = None, None
+
+    def reseed(self, seed):
+        """Restarts the random failure/wrong-answer sequence, so every scenario sees the same one."""
+        with self._lock: self._rng = random.Random(seed)
+
+    # --- Lifecycle ---
+    def start(self):
+        self.http = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.http.daemon_threads, self.http.standin = True, self
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+        self.dns = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.dns.bind(("127.0.0.1", 0))
+        threading.Thread(target=self._serve_dns, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.http: self.http.shutdown(); self.http.server_close()
+        if self.dns: self.dns.close()
+
+    def __enter__(self): return self.start()
+    def __exit__(self, *exc): self.stop()
+
+    @property
+    def http_port(self): return self.http.server_port
+
+    @property
+    def dns_port(self): return self.dns.getsockname()[1]
+
+    # --- Wiring a client to the stand-ins ---
+    def providers_for(self, providers):
+        """Maps a DuckDNSClient provider list onto the stand-ins, keeping scheme, name and order."""
+        mapped = []
+        for index, provider in enumerate(providers):
+            spec = urlparse(provider)
+            if spec.scheme == "dns": mapped.append(f"dns://127.0.0.1:{self.dns_port}{spec.path}?{spec.query}")
+            else: mapped.append(f"http://127.0.0.1:{self.http_port}/ip/{index}")
+        return mapped
+
+    def attach(self, client):
+        """Points a DuckDNSClient (or AsyncDuckDNSClient) at the stand-ins instead of the internet."""
+        client.IP_PROVIDERS = self.providers_for(type(client).IP_PROVIDERS)
+        # IPv6 providers get their own paths (and a "v6." name prefix for DNS) so they answer with the IPv6 address
+        client.IPV6_PROVIDERS = [provider.replace("/ip/", "/ip6/").replace(f":{self.dns_port}/", f":{self.dns_port}/v6.")
+                                 for provider in self.providers_for(type(client).IPV6_PROVIDERS)]
+        client.UPDATE_URL = f"http://127.0.0.1:{self.http_port}/update"
+        client.CONNECTIVITY_PROBES = [("127.0.0.1", self.http_port)]
+        return client
+
+    def set_provider_profile(self, profile, providers=None):
+        """Applies `profile` to the given stand-in provider URLs, or to every provider if None."""
+        if providers is None: self.default_profile = profile; self.provider_profiles.clear()
+        else:
+            for provider in providers: self.provider_profiles[self._provider_key(provider)] = profile
+
+    def _provider_key(self, provider):
+        spec = urlparse(provider)
+        return f"dns:{spec.path.lstrip('/')}" if spec.scheme == "dns" else spec.path
+
+    def _answer(self, key, version):
+        """Returns the IP to answer with, a wrong one, or None for a failure."""
+        profile = self.provider_profiles.get(key, self.default_profile)
+        with self._lock:
+            self.ip_requests += 1
+            roll = self._rng.random()
+        profile.delay(self._rng)
+        if roll < profile.failure_rate: return None
+        if roll < profile.failure_rate + profile.wrong_rate: return self.WRONG_IP if version == 4 else "2001:db8::bad"
+        return self.public_ip if version == 4 else self.public_ipv6
+
+    # --- Handlers ---
+    def handle_ip(self, path):
+        answer = self._answer(path, 6 if path.startswith("/ip6/") else 4)
+        return (500, "Internal Server Error") if answer is None else (200, answer + "\n")
+
+    def handle_update(self, query):
+        self.update_profile.delay(self._rng)
+        domains = (query.get("domains") or [""])[0].split(",")
+        with self._lock: self.update_requests += 1
+        if self._rng.random() < self.update_profile.failure_rate: return 500, "Internal Server Error"
+        if (query.get("token") or [""])[0] not in self.tokens or self.invalid_domains.intersection(domains): return 200, "KO"
+        ipv4, ipv6 = (query.get("ip") or [self.public_ip])[0], (query.get("ipv6") or [None])[0]
+        with self._lock:
+            self.updated_domains += len(domains)
+            for domain in domains: self.records[domain] = {4: ipv4, 6: ipv6}
+        return 200, "OK"
+
+    def _serve_dns(self):
+        while True:
+            try: message, address = self.dns.recvfrom(512)
+            except OSError: return
+            threading.Thread(target=self._answer_dns, args=(message, address), daemon=True).start()
+
+    def _answer_dns(self, message, address):
+        # Parses just enough of the query to echo the question back with one A/AAAA/TXT answer
+        end = 12
+        while message[end]: end += 1 + message[end]
+        qname = ".".join(message[position + 1:position + 1 + message[position]].decode("ascii") for position in self._labels(message))
+        qtype = struct.unpack_from("!H", message, end + 1)[0]
+        if qname.endswith(".duckdns.org"): answer = self.records.get(qname[:-len(".duckdns.org")], {}).get(6 if qtype == 28 else 4)
+        else:
+            answer = self._answer(f"dns:{qname}", 6 if qtype == 28 or qname.startswith("v6.") else 4)
+            if answer is None: return
+        if answer is None:  # no such record : an empty answer section
+            header = message[:2] + b"\x81\x80" + struct.pack("!HHHH", 1, 0, 0, 0)
+            try: self.dns.sendto(header + message[12:end + 5], address)
+            except OSError: pass
+            return
+        if qtype == 16: rdata = bytes([len(answer)]) + answer.encode("ascii")
+        elif qtype == 28: rdata = socket.inet_pton(socket.AF_INET6, answer)
+        else: rdata = socket.inet_aton(answer)
+        header = message[:2] + b"\x81\x80" + struct.pack("!HHHH", 1, 1, 0, 0)
+        record = b"\xc0\x0c" + struct.pack("!HHIH", qtype, 1, 60, len(rdata)) + rdata
+        try: self.dns.sendto(header + message[12:end + 5] + record, address)
+        except OSError: pass
+
+    def _labels(self, message):
+        position = 12
+        while message[position]:
+            yield position
+            position += 1 + message[position]
@@ -0,0 +1,6 @@
+"""Importable core of DuckDNS Connector. Nothing in this package imports tkinter, PIL or pystray
+except `duckdns.gui` and `duckdns.windows`, which are only loaded for the desktop (tray) mode."""
+from .constants import APP_NAME, APP_VERSION, APP_DATA_PATH, CONFIG_FILE, LOG_FILE, LOCK_FILE
+from .config import ConfigManager
+from .client import DuckDNSClient
+from .worker import UpdateWorker
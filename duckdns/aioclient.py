@@ -0,0 +1,245 @@
+import asyncio
+import inspect
+import logging
+import random
+import socket
+import struct
+import threading
+import time
+
+from . import resolver
+from .client import DuckDNSClient
+from .constants import APP_NAME, APP_VERSION
+from .protocol import BatchPlan, Votes, address_in_answers, connectivity_probes, dns_provider
+from .transport import TransportError, bound_socket, interface_socket_options
+
+# --- Asyncio DuckDNS Client ---
+class _DnsProtocol(asyncio.DatagramProtocol):
+    def __init__(self, query_id):
+        self.query_id = query_id
+        self.answer = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data, addr):
+        if not self.answer.done() and len(data) >= 2 and struct.unpack_from("!H", data)[0] == self.query_id: self.answer.set_result(data)
+
+    def error_received(self, exc):
+        if not self.answer.done(): self.answer.set_exception(exc)
+
+async def dns_query(server, qname, qtype=resolver.TYPE_A, timeout=2, port=53, recursion=True, source_address=None, interface=None):
+    """Coroutine version of resolver.query(), sharing its wire format code. Raises DnsError on failure."""
+    loop = asyncio.get_running_loop()
+    query_id = random.randrange(0, 0x10000)
+    packet = resolver.build_query(qname, qtype, query_id, recursion)
+    transport = None
+    try:
+        family, _, _, _, address = (await loop.getaddrinfo(server, port, type=socket.SOCK_DGRAM))[0]
+        if source_address or interface:
+            sock = bound_socket(family, socket.SOCK_DGRAM, source_address, interface)
+            try: sock.setblocking(False); sock.connect(address)
+            except OSError: sock.close(); raise
+            transport, protocol = await loop.create_datagram_endpoint(lambda: _DnsProtocol(query_id), sock=sock)
+        else: transport, protocol = await loop.create_datagram_endpoint(lambda: _DnsProtocol(query_id), remote_addr=address, family=family)
+        transport.sendto(packet)
+        message = await asyncio.wait_for(protocol.answer, timeout)
+    except asyncio.TimeoutError as e: raise resolver.DnsError(f"DNS query to {server} timed out") from e
+    except OSError as e: raise resolver.DnsError(f"DNS query to {server} failed : {e}") from e
+    finally:
+        if transport is not None: transport.close()
+    return resolver.parse_response(message, query_id)
+
+class AsyncDuckDNSClient(DuckDNSClient):
+    """DuckDNSClient whose network methods are coroutines, so that one event loop can drive many
+    lookups, updates and port probes without a thread each. Domain batching, validation, provider
+    ranking and the scoreboard are shared with the threaded client.
+    HTTP goes through httpx.AsyncClient when httpx is installed. Otherwise each request runs the
+    pooled requests session in the loop's default executor, which still keeps the caller non-blocking."""
+    def __init__(self, pool_size=4, http2=False, lookup_mode="sequential", quorum=2, scoreboard_file=None, rate_limits=None, ip_cache_ttl=0,
+                 source_address=None, interface=None, proxy=None, connectivity_probes=None, reachability_ttl=60):
+        super().__init__(pool_size, http2, lookup_mode, quorum, scoreboard_file, rate_limits, ip_cache_ttl, source_address, interface, proxy,
+                         connectivity_probes, reachability_ttl)
+        self.backends = {"http": self._lookup_http, "https": self._lookup_http, "dns": self._lookup_dns}
+        self._http = self._create_async_http(pool_size, http2)
+
+    def _create_async_http(self, pool_size, http2):
+        try: import httpx
+        except ImportError: return None
+        if http2:
+            try: import h2  # noqa: F401
+            except ImportError: http2 = False
+        limits = httpx.Limits(max_connections=max(int(pool_size), 1) * self.transport.HOST_POOLS, max_keepalive_connections=max(int(pool_size), 1))
+        transport = httpx.AsyncHTTPTransport(http2=http2, limits=limits, proxy=self.proxy, local_address=self.source_address,
+                                             socket_options=interface_socket_options(self.interface) or None)
+        return httpx.AsyncClient(transport=transport, headers={"User-Agent": f"{APP_NAME}/{APP_VERSION}"})
+
+    async def _trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete": self.transport.stats.connection_opened()
+
+    async def http_get(self, url, params=None, timeout=10):
+        """GETs `url` and returns the body as text. Raises TransportError on failure."""
+        if self._http is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self.transport.get, url, params, timeout)
+        import httpx
+        try:
+            response = await self._http.get(url, params=params, timeout=timeout, extensions={"trace": self._trace})
+            self.transport.stats.request_answered()
+            response.raise_for_status()
+            return response.text
+        except httpx.HTTPError as e: raise TransportError(str(e)) from e
+
+    async def aclose(self):
+        if self._http is not None: await self._http.aclose()
+        self.close()
+
+    async def is_connected(self, host=None, port=53, timeout=3):
+        """See DuckDNSClient.is_connected()."""
+        known, probes = connectivity_probes(self, host, port)
+        if known is not None: return known
+        for probe in probes:
+            try:
+                await asyncio.wait_for(self._connect_async(probe), timeout)
+                return self._probe_done(host, True)
+            except (OSError, asyncio.TimeoutError) as e:
+                logging.warning(f"Internet connection check failed ({probe[0]}) : {e or 'timed out'}")
+        return self._probe_done(host, False)
+
+    async def _connect_async(self, address):
+        if self.source_address or self.interface:
+            with bound_socket(socket.AF_INET6 if ":" in address[0] else socket.AF_INET, socket.SOCK_STREAM, self.source_address, self.interface) as sock:
+                sock.setblocking(False)
+                await asyncio.get_running_loop().sock_connect(sock, address)
+            return
+        _, writer = await asyncio.open_connection(*address)
+        writer.close()
+
+    async def get_public_ip(self, known_ip=None, version=4):
+        """See DuckDNSClient.get_public_ip(). In 'race' and 'quorum' modes the slower lookups are
+        cancelled as soon as the answer is settled."""
+        cached = self.ip_cache.get(version)
+        if cached: return cached
+        # The flight may be led by a threaded client sharing self.flights, hence a concurrent Future
+        future, leader = self.flights.begin(("ip", version))
+        if not leader: return await asyncio.wrap_future(future)
+        try:
+            if self.lookup_mode == "sequential": ip = await self._get_public_ip_sequential(version)
+            else: ip = await self._get_public_ip_concurrent(self.quorum if self.lookup_mode == "quorum" else 1, known_ip, version)
+        except BaseException as e: self.flights.finish(("ip", version), error=e); raise
+        self.ip_cache.put(version, ip)
+        self.flights.finish(("ip", version), ip)
+        return ip
+
+    async def get_public_ips(self, versions=(4,), known_ips=None):
+        """Looks up several address families at once. Returns {version: ip or None}."""
+        known_ips = known_ips or {}
+        found = await asyncio.gather(*(self.get_public_ip(known_ips.get(version), version) for version in versions))
+        return dict(zip(versions, found))
+
+    def register_backend(self, scheme, lookup):
+        """Adds an IP discovery backend. `lookup(provider)` may be a coroutine function or a plain
+        blocking function; plain ones run in the loop's default executor."""
+        self.backends[scheme] = lookup
+
+    async def _lookup_http(self, provider):
+        return await self.http_get(provider, timeout=10)
+
+    async def _lookup_dns(self, provider):
+        server, name, qtype, port = dns_provider(provider)
+        return address_in_answers(await dns_query(server, name, qtype, timeout=self.DNS_TIMEOUT, port=port,
+                                                  source_address=self.source_address, interface=self.interface))
+
+    async def _query_provider(self, provider, version=4):
+        wait = self._reserve("provider", provider, self.PROVIDER_MAX_WAIT)
+        if wait is None: return None
+        if wait: await asyncio.sleep(wait)
+        started = time.monotonic()
+        try:
+            backend = self._backend(provider)
+            if inspect.iscoroutinefunction(backend): answer = await backend(provider)
+            else: answer = await asyncio.get_running_loop().run_in_executor(None, backend, provider)
+            return self._provider_answered(provider, answer, version, started)
+        except TransportError as e: return self._provider_failed(provider, e, started)
+
+    async def _get_public_ip_sequential(self, version=4):
+        for provider in self._ranked_providers(version, include_open=True):
+            ip = await self._query_provider(provider, version)
+            if ip: return ip
+        logging.error(f"All public IPv{version} providers failed.")
+        return None
+
+    async def _get_public_ip_concurrent(self, required, known_ip=None, version=4):
+        tasks = [asyncio.ensure_future(self._query_provider(provider, version)) for provider in self._ranked_providers(version)]
+        votes = Votes(required, known_ip, version)
+        try:
+            for finished in asyncio.as_completed(tasks):
+                ip = votes.add(await finished)
+                if ip: return ip
+        finally:
+            # Unlike worker threads, tasks can be cancelled mid-request, so nothing keeps running
+            for task in tasks: task.cancel()
+        return votes.failed()
+
+    async def check_service_port(self, host, port, timeout=3):
+        """Checks if a TCP port is open on a given host."""
+        from .ports import parse_ports, scan_async
+        try: ports = parse_ports(port)
+        except ValueError: return False, "Error : Invalid port number."
+        _, _, is_open, message = (await scan_async([host], ports[:1], timeout=timeout))[0]
+        return is_open, message
+
+    async def update_duckdns_batch(self, domains, token, ip, ipv6=None, known_good=(), token_accepted=True):
+        """See DuckDNSClient.update_duckdns_batch(). The requests of each round are sent concurrently."""
+        plan = BatchPlan(self.batch_domains(domains, token, ip, ipv6), known_good, token_accepted)
+        while plan.pending: plan.answered(await asyncio.gather(*(self.update_duckdns(",".join(batch), token, ip, ipv6) for batch in plan.next_round())))
+        return plan.results
+
+    async def update_duckdns(self, domain, token, ip, ipv6=None):
+        """Sends one update. `ip` and/or `ipv6` may be given; both records go out in the same request."""
+        params = self._update_params(domain, token, ip, ipv6)
+        wait = self._reserve("update", self.UPDATE_URL, self.UPDATE_MAX_WAIT)
+        if wait is None: return "ERROR"
+        if wait: await asyncio.sleep(wait)
+        try:
+            result = (await self.http_get(self.UPDATE_URL, params=params, timeout=10)).strip()
+            logging.info(f"DuckDNS update response : {result}"); self.reachability.record(True)
+            return result
+        except TransportError as e:
+            logging.error(f"DuckDNS update request failed : {e}"); self.reachability.record(False)
+            return "ERROR"
+
+# --- Event loop thread ---
+class EventLoopThread:
+    """One background thread running an asyncio loop, for callers that are not async themselves
+    (the tray callbacks and tkinter windows). Every coroutine submitted shares the loop."""
+    def __init__(self, name="asyncio"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro, callback=None):
+        """Schedules `coro` on the loop and returns a concurrent.futures.Future. `callback(result)`
+        is called on the loop thread when it finishes; exceptions are logged and give None."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        if callback is not None:
+            def done(finished):
+                if finished.cancelled(): return
+                error = finished.exception()
+                if error is not None: logging.error(f"Background task failed : {error}")
+                callback(None if error is not None else finished.result())
+            future.add_done_callback(done)
+        return future
+
+    def stop(self, timeout=2):
+        """Stops the loop and, once its thread has ended, cancels what is still pending and closes it."""
+        if self.loop.is_closed(): return
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+        if self._thread.is_alive(): logging.warning("Event loop thread did not stop in time, leaving its loop open."); return
+        pending = asyncio.all_tasks(self.loop)
+        for task in pending: task.cancel()
+        if pending: self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        self.loop.close()
@@ -0,0 +1,267 @@
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlencode, urlparse
+
+from . import resolver
+from .protocol import BatchPlan, Votes, address_in_answers, connectivity_probes, dns_provider, is_valid_ip, normalize_ip, rank_providers
+from .providers import ProviderScoreboard
+from .ratelimit import RateLimiter, SingleFlight, TtlCache
+from .reachability import Reachability
+from .transport import HttpTransport, TransportError, bound_socket
+
+# --- DuckDNS Client ---
+class DuckDNSClient:
+    # dns:// providers ask a resolver that answers with the address the query came from. One UDP
+    # datagram each way, far cheaper than a TLS request. Servers are IP literals to avoid a lookup
+    # of the lookup server (resolver1.opendns.com and ns1.google.com).
+    IP_PROVIDERS = ["dns://208.67.222.222/myip.opendns.com?type=A", "dns://216.239.32.10/o-o.myaddr.l.google.com?type=TXT",
+                    "https://api.ipify.org", "https://icanhazip.com", "https://ifconfig.me/ip", "https://api.my-ip.io/ip"]
+    # Same services over IPv6 (resolver1.opendns.com and ns1.google.com, then IPv6-only HTTP hosts)
+    IPV6_PROVIDERS = ["dns://[2620:119:35::35]/myip.opendns.com?type=AAAA", "dns://[2001:4860:4802:32::a]/o-o.myaddr.l.google.com?type=TXT",
+                      "https://api6.ipify.org", "https://ipv6.icanhazip.com", "https://v6.ident.me"]
+    # Tried in order by is_connected() when nothing recent is known; the IPv6 one keeps IPv6-only
+    # hosts from looking offline. Set with [Network] connectivity_probes where 8.8.8.8 is blocked.
+    CONNECTIVITY_PROBES = [("8.8.8.8", 53), ("2001:4860:4860::8888", 53)]
+    DNS_TIMEOUT = 2
+    UPDATE_URL = "https://www.duckdns.org/update"
+    # Conservative limit that every proxy and web server in the path is known to accept.
+    MAX_URL_LENGTH = 2000
+
+    LOOKUP_MODES = ("sequential", "race", "quorum")
+    # Longest waits for the request budget before a provider is skipped / an update is given up
+    PROVIDER_MAX_WAIT = 2
+    UPDATE_MAX_WAIT = 30
+
+    def __init__(self, pool_size=4, http2=False, lookup_mode="sequential", quorum=2, scoreboard_file=None, rate_limits=None, ip_cache_ttl=0,
+                 source_address=None, interface=None, proxy=None, connectivity_probes=None, reachability_ttl=60):
+        # One pooled keep-alive session for all providers and updates, so that short intervals
+        # reuse connections instead of paying a TCP+TLS handshake per request.
+        self.transport = HttpTransport(pool_size=pool_size, http2=http2, source_address=source_address, interface=interface, proxy=proxy)
+        # Outbound binding, so that on a multi-WAN host this client sees (and updates) one uplink's IP
+        self.source_address, self.interface, self.proxy = source_address, interface, proxy
+        self.lookup_mode = lookup_mode if lookup_mode in self.LOOKUP_MODES else "sequential"
+        self.quorum = max(int(quorum), 1)
+        self.scoreboard = ProviderScoreboard(scoreboard_file)
+        # Discovery backends by provider URL scheme, see register_backend()
+        self.backends = {"http": self._lookup_http, "https": self._lookup_http, "dns": self._lookup_dns}
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.metrics = None  # optional metrics.Metrics, fed with per-provider lookup latency and errors
+        # Request budgets per endpoint, the last discovered IPs and in-flight lookups. Clients that
+        # share these objects (the worker and the tray) share one budget and one lookup at a time.
+        self.limiter, self.ip_cache, self.flights = RateLimiter(rate_limits), TtlCache(ip_cache_ttl), SingleFlight()
+        self.reachability = Reachability(reachability_ttl)
+        if connectivity_probes is not None: self.CONNECTIVITY_PROBES = list(connectivity_probes)
+
+    def connection_stats(self):
+        """Returns {"requests", "opened", "reused", "http2"} for this client's connection pool."""
+        return self.transport.connection_stats()
+
+    def close(self):
+        self.scoreboard.save()
+        if self._executor is not None: self._executor.shutdown(wait=False)
+        self.transport.close()
+
+    def is_connected(self, host=None, port=53, timeout=3):
+        """True if the internet looks reachable. Without `host`, the outcome of recent requests is
+        reused (see Reachability) and the CONNECTIVITY_PROBES are only tried when it is stale.
+        With no probes configured, or through a proxy, the real requests alone decide."""
+        known, probes = connectivity_probes(self, host, port)
+        if known is not None: return known
+        for probe in probes:
+            try:
+                with self._connect(probe, timeout): pass
+                return self._probe_done(host, True)
+            except OSError as e:
+                logging.warning(f"Internet connection check failed ({probe[0]}) : {e}")
+        return self._probe_done(host, False)
+
+    def _probe_done(self, host, reachable):
+        if reachable: logging.info("Internet connection check successful.")
+        if host is None: self.reachability.probed(reachable)
+        return reachable
+
+    def _connect(self, address, timeout):
+        """Opens a TCP connection to `address` through the client's source address or interface."""
+        if not (self.source_address or self.interface): return socket.create_connection(address, timeout=timeout)
+        sock = bound_socket(socket.AF_INET6 if ":" in address[0] else socket.AF_INET, socket.SOCK_STREAM, self.source_address, self.interface)
+        try: sock.settimeout(timeout); sock.connect(address)
+        except OSError: sock.close(); raise
+        return sock
+
+    def _ranked_providers(self, version, include_open=False):
+        return rank_providers(self.scoreboard, self.IPV6_PROVIDERS if version == 6 else self.IP_PROVIDERS, self.proxy, include_open)
+
+    def get_public_ip(self, known_ip=None, version=4):
+        """Returns the public IPv4 (or IPv6 with version=6), or None if no provider gave a valid answer.
+        'sequential' tries the providers in order. 'race' queries them all at once and takes the first
+        valid answer. 'quorum' also queries them at once, but only accepts an IP other than `known_ip`
+        after `quorum` providers agree on it.
+        An IP found less than ip_cache.ttl seconds ago is returned as is, and concurrent callers share one lookup."""
+        cached = self.ip_cache.get(version)
+        if cached: return cached
+        return self.flights.do(("ip", version), lambda: self._lookup_public_ip(known_ip, version))
+
+    def _lookup_public_ip(self, known_ip, version):
+        if self.lookup_mode == "sequential": ip = self._get_public_ip_sequential(version)
+        else: ip = self._get_public_ip_concurrent(self.quorum if self.lookup_mode == "quorum" else 1, known_ip, version)
+        self.ip_cache.put(version, ip)
+        return ip
+
+    def get_public_ips(self, versions=(4,), known_ips=None):
+        """Looks up several address families at once. Returns {version: ip or None}."""
+        known_ips = known_ips or {}
+        if len(versions) == 1: return {versions[0]: self.get_public_ip(known_ips.get(versions[0]), versions[0])}
+        # The first family runs on this thread, the others on the lookup pool
+        others = {version: self._get_executor().submit(self.get_public_ip, known_ips.get(version), version) for version in versions[1:]}
+        results = {versions[0]: self.get_public_ip(known_ips.get(versions[0]), versions[0])}
+        for version, future in others.items(): results[version] = future.result()
+        return results
+
+    def register_backend(self, scheme, lookup):
+        """Adds an IP discovery backend. `lookup(provider)` gets the provider URL and returns the IP
+        as text, raising TransportError on failure. Providers with that scheme then join the chain."""
+        self.backends[scheme] = lookup
+
+    def _lookup_http(self, provider):
+        return self.transport.get(provider, timeout=10)
+
+    def _lookup_dns(self, provider):
+        server, name, qtype, port = dns_provider(provider)
+        return address_in_answers(resolver.query(server, name, qtype, timeout=self.DNS_TIMEOUT, port=port,
+                                                 source_address=self.source_address, interface=self.interface))
+
+    def _reserve(self, kind, endpoint, max_wait):
+        """Takes one request from the budget of `endpoint`. Returns the seconds to wait before sending
+        it, or None if the request should be skipped."""
+        wait = self.limiter.reserve(kind, endpoint, max_wait)
+        if wait is None: logging.warning(f"Request budget for {endpoint} used up, skipping the request.")
+        if wait != 0 and self.metrics: self.metrics.rate_limited.inc(kind=kind, outcome="skipped" if wait is None else "delayed")
+        return wait
+
+    def _query_provider(self, provider, version=4):
+        wait = self._reserve("provider", provider, self.PROVIDER_MAX_WAIT)
+        if wait is None: return None
+        if wait: time.sleep(wait)
+        started = time.monotonic()
+        try: return self._provider_answered(provider, self._backend(provider)(provider), version, started)
+        except TransportError as e: return self._provider_failed(provider, e, started)
+
+    def _backend(self, provider):
+        backend = self.backends.get(urlparse(provider).scheme)
+        if backend is None: raise TransportError(f"No discovery backend for {provider}")
+        return backend
+
+    def _provider_answered(self, provider, answer, version, started):
+        """Records a provider's answer. Returns the IP, or None if it is not an IP address of `version`."""
+        ip = answer.strip()
+        if not is_valid_ip(ip, version):
+            logging.warning(f"Invalid IP format received from {provider} : {ip}")
+            self._provider_scored(provider, started, False); return None
+        self.reachability.record(True); self._provider_scored(provider, started, True)
+        logging.info(f"Successfully retrieved public IP {ip} from {provider}")
+        # e.g. "2001:DB8:0:0::10" : the same address must not look like a change, or split a quorum
+        return normalize_ip(ip)
+
+    def _provider_failed(self, provider, error, started):
+        logging.warning(f"Failed to get IP from {provider} : {error}"); self.reachability.record(False)
+        self._provider_scored(provider, started, False)
+
+    def _provider_scored(self, provider, started, ok):
+        latency = time.monotonic() - started
+        if ok: self.scoreboard.record_success(provider, latency)
+        else: self.scoreboard.record_failure(provider, latency)
+        if self.metrics: self.metrics.observe_lookup(provider, latency, ok)
+
+    def _get_public_ip_sequential(self, version=4):
+        # Providers with an open circuit are still tried, but only after every healthy one failed.
+        for provider in self._ranked_providers(version, include_open=True):
+            ip = self._query_provider(provider, version)
+            if ip: return ip
+        logging.error(f"All public IPv{version} providers failed.")
+        return None
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                # Room for every provider of both families plus the per-family lookup tasks themselves
+                workers = len(self.IP_PROVIDERS) + len(self.IPV6_PROVIDERS) + 2
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ip-lookup")
+            return self._executor
+
+    def _get_public_ip_concurrent(self, required, known_ip=None, version=4):
+        executor = self._get_executor()
+        futures = [executor.submit(self._query_provider, provider, version) for provider in self._ranked_providers(version)]
+        votes = Votes(required, known_ip, version)
+        try:
+            for future in as_completed(futures):
+                ip = votes.add(future.result())
+                if ip: return ip
+        finally:
+            # Lookups that have not started are dropped. Requests already in flight cannot be aborted
+            # mid-read, so they finish in the background within their timeout and are ignored.
+            for future in futures: future.cancel()
+        return votes.failed()
+
+    def check_service_port(self, host, port, timeout=3):
+        """Checks if a TCP port is open on a given host."""
+        try:
+            port = int(port)
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.settimeout(timeout)
+                s.connect((host, port))
+            logging.info(f"Port check successful for {host}:{port}.")
+            return True, f"Success : Port {port} is open on {host}."
+        except TimeoutError:
+            logging.warning(f"Port check timed out for {host}:{port}.")
+            return False, f"Failed : Port {port} is closed (Connection timed out)."
+        except (socket.gaierror, TypeError):
+            logging.warning(f"Hostname could not be resolved : {host}.")
+            return False, f"Error : Hostname '{host}' could not be resolved."
+        except ValueError:
+            return False, "Error : Invalid port number."
+        except Exception as e:
+            logging.error(f"Error checking port {host}:{port} : {e}")
+            return False, f"Failed : Port {port} is closed (Connection refused)."
+
+    def _update_params(self, domains, token, ip, ipv6=None):
+        params = {"domains": domains, "token": token}
+        if ip: params["ip"] = ip
+        if ipv6: params["ipv6"] = ipv6
+        return params
+
+    def batch_domains(self, domains, token, ip, ipv6=None):
+        """Groups domains into as few comma-separated lists as fit within MAX_URL_LENGTH."""
+        batches, current = [], []
+        for domain in domains:
+            candidate = current + [domain]
+            url = f"{self.UPDATE_URL}?{urlencode(self._update_params(','.join(candidate), token, ip, ipv6))}"
+            if current and len(url) > self.MAX_URL_LENGTH:
+                batches.append(current); current = [domain]
+            else: current = candidate
+        if current: batches.append(current)
+        return batches
+
+    def update_duckdns_batch(self, domains, token, ip, ipv6=None, known_good=(), token_accepted=True):
+        """Updates many domains of one token with as few requests as possible. Returns {domain: result}.
+        A rejected batch is split to find the rejected domains, see BatchPlan for how."""
+        plan = BatchPlan(self.batch_domains(domains, token, ip, ipv6), known_good, token_accepted)
+        while plan.pending: plan.answered([self.update_duckdns(",".join(batch), token, ip, ipv6) for batch in plan.next_round()])
+        return plan.results
+
+    def update_duckdns(self, domain, token, ip, ipv6=None):
+        """Sends one update. `ip` and/or `ipv6` may be given; both records go out in the same request."""
+        params = self._update_params(domain, token, ip, ipv6)
+        wait = self._reserve("update", self.UPDATE_URL, self.UPDATE_MAX_WAIT)
+        if wait is None: return "ERROR"
+        if wait: time.sleep(wait)
+        try:
+            result = self.transport.get(self.UPDATE_URL, params=params, timeout=10).strip()
+            logging.info(f"DuckDNS update response : {result}"); self.reachability.record(True)
+            return result
+        except TransportError as e:
+            logging.error(f"DuckDNS update request failed : {e}"); self.reachability.record(False)
+            return "ERROR"
@@ -0,0 +1,250 @@
+import configparser
+import io
+import logging
+import os
+import re
+import threading
+from collections import namedtuple
+
+from .constants import CONFIG_FILE
+from .fswatch import DirectoryWatcher
+from .storage import atomic_write_text
+from .verify import parse_servers
+
+def parse_domains(value):
+    """Splits a comma/space separated domain list, dropping any '.duckdns.org' suffix."""
+    domains = []
+    for domain in re.split(r"[,\s]+", value or ""):
+        domain = domain.strip().lower()
+        if domain.endswith(".duckdns.org"): domain = domain[:-len(".duckdns.org")]
+        if domain and domain not in domains: domains.append(domain)
+    return domains
+
+# Shortest interval accepted, to stay polite to DuckDNS and the IP providers
+MIN_INTERVAL = 10
+
+def parse_interval(value, default=300):
+    """Converts an interval setting to seconds. A bare number means minutes (the Settings window
+    stores 5, 10, ...); a suffix allows sub-minute intervals: '30s', '2m', '1h'. A value that can't
+    be read, zero included, falls back to `default`; shorter ones than MIN_INTERVAL are raised to it."""
+    match = re.match(r"^\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*$", str(value or "").lower())
+    seconds = float(match.group(1)) * {"s": 1, "m": 60, "h": 3600, "": 60}[match.group(2)] if match else 0
+    # Zero is a typo or a blanked field, not a request to poll as fast as allowed
+    if seconds <= 0: logging.warning(f"Invalid interval '{value}', using {default:g}s."); return default
+    if seconds < MIN_INTERVAL: logging.warning(f"Interval '{value}' is shorter than the minimum, using {MIN_INTERVAL}s."); return MIN_INTERVAL
+    return seconds
+
+# Everything UpdateWorker reads per cycle, parsed and validated once per change of the file.
+# Replaced as a whole (never modified), so a reader always sees one consistent version.
+Settings = namedtuple("Settings", "accounts schedule client ip_versions change_detection verify notifications")
+
+# --- ConfigManager ---
+class ConfigManager:
+    # Use the globally defined CONFIG_FILE path
+    def __init__(self, filename=CONFIG_FILE):
+        self.filename = filename
+        self.config = configparser.ConfigParser()
+        self.settings, self._stamp = None, None
+        self._lock = threading.RLock()
+        self.load()
+
+    def _file_stamp(self):
+        try: stat = os.stat(self.filename)
+        except OSError: return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        """(Re)reads the config file and swaps in a new settings snapshot. Returns False if the file
+        could not be parsed, in which case the settings already loaded stay in effect."""
+        with self._lock:
+            stamp, parser = self._file_stamp(), configparser.ConfigParser()
+            try:
+                parser.read(self.filename, encoding='utf-8')
+            except Exception as e:
+                logging.error(f"Error reading config file : {e}")
+                if self.settings is not None: self._stamp = stamp; return False
+                parser = configparser.ConfigParser()
+            if "DuckDNS" not in parser: parser["DuckDNS"] = {"domain": "", "token": ""}
+            if "Settings" not in parser: parser["Settings"] = {"interval": "5", "notifications": "YES"}
+            self.config, self._stamp = parser, stamp
+            self.settings = self.snapshot()
+        logging.info("Configuration loaded.")
+        return True
+
+    def reload_if_changed(self):
+        """Reloads the file if its modification time or size changed. Returns True if new settings were loaded."""
+        if self._file_stamp() == self._stamp: return False
+        return self.load()
+
+    def snapshot(self):
+        """Builds a Settings snapshot from the parsed file."""
+        with self._lock:
+            return Settings(accounts=self.get_accounts(), schedule=self.get_schedule_options(), client=self.get_client_options(),
+                            ip_versions=self.get_ip_versions(), change_detection=self.get_change_detection_options(),
+                            verify=self.get_verify_options(),
+                            notifications=self.get("Settings", "notifications", "YES").upper() == "YES")
+
+    def save(self):
+        """Writes the config through a temp file and a rename, so a crash never leaves it half-written."""
+        with self._lock:
+            try:
+                buffer = io.StringIO(); self.config.write(buffer)
+                atomic_write_text(self.filename, buffer.getvalue())
+                self._stamp, self.settings = self._file_stamp(), self.snapshot()
+                logging.info("Configuration saved.")
+            except Exception as e: logging.error(f"Error saving config file : {e}")
+
+    def get(self, section, option, fallback=None):
+        return self.config.get(section, option, fallback=fallback)
+
+    def get_accounts(self):
+        """Returns every configured DuckDNS account as {"name", "token", "domains"}.
+        [DuckDNS] is the main account; extra tokens go in sections named [DuckDNS:<label>].
+        The domain option of each section may hold a comma-separated list of subdomains."""
+        accounts, seen = [], set()
+        for section in self.config.sections():
+            if section != "DuckDNS" and not section.startswith("DuckDNS:"): continue
+            token = self.config.get(section, "token", fallback="").strip()
+            domains = []
+            for domain in parse_domains(self.config.get(section, "domain", fallback="")):
+                if domain in seen: logging.warning(f"Domain {domain} is listed more than once, ignoring duplicate in [{section}]."); continue
+                seen.add(domain); domains.append(domain)
+            if token and domains: accounts.append({"name": section, "token": token, "domains": domains})
+        return accounts
+
+    def get_client_options(self):
+        """DuckDNSClient options (connection pool, IP lookup mode, request budgets) from the optional [Network] section.
+        Budgets are in requests per minute; a rate of 0 removes the limit."""
+        try: pool_size = max(int(self.get("Network", "pool_size", "4")), 1)
+        except ValueError: pool_size = 4
+        try: quorum = max(int(self.get("Network", "quorum", "2")), 1)
+        except ValueError: quorum = 2
+        rate_limits = {}
+        for kind, rate, burst in (("update", "30", "10"), ("provider", "6", "3")):
+            try: rate_limits[kind] = (float(self.get("Network", f"{kind}_rate", rate)) / 60, max(int(self.get("Network", f"{kind}_burst", burst)), 1))
+            except ValueError: rate_limits[kind] = (float(rate) / 60, int(burst))
+        try: ip_cache_ttl = max(float(self.get("Network", "ip_cache_ttl", "30")), 0)
+        except ValueError: ip_cache_ttl = 30
+        try: reachability_ttl = max(float(self.get("Network", "reachability_ttl", "60")), 0)
+        except ValueError: reachability_ttl = 60
+        probes = self.get("Network", "connectivity_probes", "").strip()
+        # Unset keeps the built-in probes; "none" never probes and relies on the real requests
+        probes = None if not probes else () if probes.lower() == "none" else tuple(parse_servers(probes))
+        return {"pool_size": pool_size, "http2": self.get("Network", "http2", "NO").upper() == "YES",
+                "rate_limits": rate_limits, "ip_cache_ttl": ip_cache_ttl,
+                # Outbound binding for multi-WAN hosts; an empty option means the default route
+                "source_address": self.get("Network", "source_address", "").strip() or None,
+                "interface": self.get("Network", "interface", "").strip() or None, "proxy": self.get("Network", "proxy", "").strip() or None,
+                "connectivity_probes": probes, "reachability_ttl": reachability_ttl,
+                "lookup_mode": self.get("Network", "ip_lookup", "sequential").strip().lower(), "quorum": quorum,
+                # Kept next to config.ini so that the learned provider ranking survives restarts
+                "scoreboard_file": os.path.join(os.path.dirname(os.path.abspath(self.filename)), "providers.json")}
+
+    def get_state_file(self):
+        """Where UpdateWorker keeps the last confirmed IPs: <config name>.state.json next to the config,
+        so that instances with different configs in one folder don't overwrite each other's state."""
+        return f"{os.path.splitext(os.path.abspath(self.filename))[0]}.state.json"
+
+    def get_journal_file(self):
+        """Where UpdateWorker queues updates DuckDNS has not confirmed yet, next to the state file."""
+        return f"{os.path.splitext(os.path.abspath(self.filename))[0]}.journal.json"
+
+    def get_history_file(self):
+        """Where UpdateWorker records the IP change history, next to the state file, or None when
+        [History] enabled = NO."""
+        if self.get("History", "enabled", "YES").upper() != "YES": return None
+        return f"{os.path.splitext(os.path.abspath(self.filename))[0]}.history.db"
+
+    def get_control_file(self):
+        """Where a running instance publishes its control API port and token, next to the state file."""
+        return f"{os.path.splitext(os.path.abspath(self.filename))[0]}.control.json"
+
+    def get_control_options(self):
+        """Control API settings from the optional [Control] section, or None when enabled = NO."""
+        if self.get("Control", "enabled", "YES").upper() != "YES": return None
+        try: port = int(self.get("Control", "port", "0"))
+        except ValueError: port = 0
+        return {"control_file": self.get_control_file(), "port": port if 0 <= port < 65536 else 0}
+
+    def get_ip_versions(self):
+        """Address families to keep updated, from [Network] ip_version = 4 (default), 6 or both."""
+        value = self.get("Network", "ip_version", "4").strip().lower()
+        return {"6": (6,), "both": (4, 6)}.get(value, (4,))
+
+    def get_change_detection_options(self):
+        """ChangeDetector options from [Network], or None when change_detection is off (the default)."""
+        if self.get("Network", "change_detection", "NO").upper() != "YES": return None
+        try: max_staleness = max(float(self.get("Network", "max_staleness", "30")), 1) * 60
+        except ValueError: max_staleness = 1800
+        return {"max_staleness": max_staleness, "gateway": self.get("Network", "gateway", "").strip() or None,
+                "natpmp": self.get("Network", "natpmp", "YES").upper() == "YES",
+                # Local signals are read on the uplink the lookups are bound to
+                "source_address": self.get("Network", "source_address", "").strip() or None,
+                "interface": self.get("Network", "interface", "").strip() or None, "proxy": self.get("Network", "proxy", "").strip() or None}
+
+    def get_metrics_options(self):
+        """Address and port of the Prometheus endpoint from the optional [Metrics] section, or None
+        when no port is set (the default)."""
+        try: port = int(self.get("Metrics", "port", "0"))
+        except ValueError: logging.error("Invalid [Metrics] port, metrics endpoint disabled."); return None
+        if not 0 < port < 65536: return None
+        return {"address": self.get("Metrics", "address", "127.0.0.1").strip() or "127.0.0.1", "port": port}
+
+    def get_logging_options(self):
+        """setup_logging() options from the optional [Logging] section."""
+        try: max_bytes = max(float(self.get("Logging", "max_size", "5")), 0.1) * 1024 * 1024
+        except ValueError: max_bytes = 5 * 1024 * 1024
+        try: backups = max(int(self.get("Logging", "backups", "5")), 0)
+        except ValueError: backups = 5
+        try: sample_every = max(int(self.get("Logging", "sample_unchanged", "10")), 1)
+        except ValueError: sample_every = 10
+        return {"level": self.get("Logging", "level", "INFO").strip(), "format": self.get("Logging", "format", "text").strip().lower(),
+                "rotate": self.get("Logging", "rotate", "size").strip().lower(), "max_bytes": int(max_bytes), "backups": backups,
+                "compress": self.get("Logging", "compress", "YES").upper() == "YES", "sample_every": sample_every}
+
+    def get_verify_options(self):
+        """DNS record verification from [Network], or None when verify_dns is off (the default).
+        dns_resolver is "authoritative" (DuckDNS's own nameservers), "system" or a list of resolvers.
+        Domains believed up to date are checked for drift every drift_interval minutes."""
+        if self.get("Network", "verify_dns", "NO").upper() != "YES": return None
+        try: drift_interval = max(float(self.get("Network", "drift_interval", "15")), 0) * 60
+        except ValueError: drift_interval = 900
+        return {"resolver": self.get("Network", "dns_resolver", "authoritative").strip() or "authoritative", "drift_interval": drift_interval}
+
+    def get_schedule_options(self):
+        """Update interval in seconds and jitter as a fraction, from [Settings]."""
+        try: jitter = float(self.get("Settings", "jitter", "10")) / 100
+        except ValueError: jitter = 0.1
+        return {"interval": parse_interval(self.get("Settings", "interval", "5")), "jitter": jitter}
+
+    def get_all_settings(self):
+        return {"domain": self.get("DuckDNS", "domain", ""),"token": self.get("DuckDNS", "token", ""),
+                "interval": self.get("Settings", "interval", "5"),"notifications": self.get("Settings", "notifications", "YES")}
+
+    def update_settings(self, domain, token, interval, notifications):
+        with self._lock:
+            self.config["DuckDNS"]["domain"] = domain
+            self.config["DuckDNS"]["token"] = token
+            self.config["Settings"]["interval"] = str(interval)
+            self.config["Settings"]["notifications"] = notifications
+            self.save()
+
+# --- Config file watcher ---
+class ConfigWatcher(threading.Thread):
+    """Calls `on_change()` after new settings were loaded from an edited config file. The thread
+    sleeps until the OS reports a change in the config's folder, then compares the file's
+    modification time and size. Without change notifications it checks every `poll_interval` seconds."""
+    def __init__(self, config, on_change, poll_interval=60):
+        super().__init__(name="config-watcher", daemon=True)
+        self.config, self.on_change = config, on_change
+        filename = os.path.abspath(config.filename)
+        self.watcher = DirectoryWatcher(os.path.dirname(filename), lambda name: name == os.path.basename(filename), poll_interval)
+
+    def run(self):
+        while self.watcher.wait():
+            try:
+                if self.config.reload_if_changed(): self.on_change()
+            except Exception as e: logging.error(f"Error reloading config : {e}", exc_info=True)
+
+    def stop(self):
+        self.watcher.close()
@@ -0,0 +1,40 @@
+import os
+import sys
+
+# --- Application Constants ---
+APP_NAME = "DuckDNS Connector"
+APP_VERSION = "1.0.3" # Version updated
+
+# --- Function to get the correct path for AppData ---
+def get_app_data_path():
+    """Gets the path to the application's data folder in AppData\\Local.""" # Escaped backslash to remove SyntaxWarning
+    # On Windows, this is typically C:\Users\<username>\AppData\Local
+    app_data_dir = os.path.join(os.getenv('LOCALAPPDATA', os.path.expanduser("~")), APP_NAME)
+
+    # Create the directory if it doesn't exist
+    os.makedirs(app_data_dir, exist_ok=True)
+    return app_data_dir
+
+# --- Define paths for config, log, and lock files in AppData ---
+APP_DATA_PATH = get_app_data_path()
+CONFIG_FILE = os.path.join(APP_DATA_PATH, "config.ini")
+LOG_FILE = os.path.join(APP_DATA_PATH, "duckdns_connector.log")
+LOCK_FILE = os.path.join(APP_DATA_PATH, "duckdns_connector.lock")
+
+def get_lock_file(config_file):
+    """Single-instance lock for a config. Non-default configs get their own lock next to the file."""
+    if os.path.abspath(config_file) == os.path.abspath(CONFIG_FILE): return LOCK_FILE
+    return f"{config_file}.lock"
+
+# --- Resource Path Function ---
+def resource_path(relative_path):
+    """ Get absolute path to resource, works for dev and for PyInstaller """
+    try:
+        base_path = sys._MEIPASS
+    except AttributeError:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+LOGO_FILE = resource_path("./logo.ico")
+# The tray image pre-rendered from LOGO_FILE, so that startup doesn't decode and resize the .ico
+TRAY_IMAGE_CACHE = os.path.join(APP_DATA_PATH, "tray_icon.png")
@@ -0,0 +1,120 @@
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .storage import read_json, write_json
+
+# --- Local control API ---
+# A running instance listens on 127.0.0.1 and writes its port and a random token to the control
+# file next to its config. The file is created owner-only, so only the same user can send commands.
+COMMANDS = ("update", "status", "reload", "ip")
+
+class ControlError(Exception):
+    """Raised when no running instance answers a control command."""
+
+class _ControlHandler(BaseHTTPRequestHandler):
+    controller = None
+
+    def log_message(self, format, *args):
+        logging.debug(f"Control request : {format % args}")
+
+    def _reply(self, status, data):
+        body = json.dumps(data, indent=1, sort_keys=True).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        # Header values are decoded as latin-1 and compare_digest() refuses non-ASCII text : compare the bytes
+        token = self.headers.get("X-Control-Token", "").encode("latin-1", "replace")
+        if not hmac.compare_digest(token, self.controller.token.encode("ascii")): return self._reply(401, {"error": "Invalid token"})
+        path, _, query = self.path.partition("?")
+        command = path.strip("/")
+        if command not in COMMANDS: return self._reply(404, {"error": f"Unknown command '{command}'"})
+        # Commands that change something must be POSTs, so a web page can't trigger them with an <img> tag
+        if command in ("update", "reload") and self.command != "POST": return self._reply(405, {"error": f"Use POST for '{command}'"})
+        try: self._reply(200, self.controller.run_command(command, refresh="refresh=1" in query))
+        except Exception as e:
+            logging.error(f"Control command '{command}' failed : {e}", exc_info=True)
+            self._reply(500, {"error": str(e)})
+
+    do_GET = do_POST = _handle
+
+class ControlServer:
+    """Serves the control commands for an UpdateWorker: update (force an update now), status,
+    reload (re-read the config file) and ip (last known public IPs; ?refresh=1 looks them up)."""
+    def __init__(self, worker, control_file, port=0):
+        self.worker, self.control_file, self.port = worker, control_file, port
+        self.token = secrets.token_urlsafe(24)
+        self._server = None
+
+    def start(self):
+        handler = type("ControlHandler", (_ControlHandler,), {"controller": self})
+        try: self._server = ThreadingHTTPServer(("127.0.0.1", self.port), handler)
+        except OSError as e: logging.error(f"Could not start the control API on port {self.port} : {e}"); return None
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="control", daemon=True).start()
+        try: write_json(self.control_file, {"port": self._server.server_port, "token": self.token, "pid": os.getpid()})
+        except OSError as e: logging.error(f"Could not write control file {self.control_file} : {e}")
+        logging.info(f"Control API listening on 127.0.0.1:{self._server.server_port}")
+        return self
+
+    def stop(self):
+        if self._server is None: return
+        self._server.shutdown(); self._server.server_close(); self._server = None
+        try: os.remove(self.control_file)
+        except OSError: pass
+
+    def run_command(self, command, refresh=False):
+        worker = self.worker
+        if command == "update":
+            worker.force_update()
+            return {"ok": True}
+        if command == "reload":
+            if not worker.config.load(): return {"ok": False, "error": "The config file could not be parsed, the current settings were kept."}
+            worker.request_reload()
+            worker.force_update()
+            return {"ok": True}
+        if command == "ip":
+            if refresh: return {str(version): ip for version, ip in worker.client.get_public_ips(worker.ip_versions, worker.last_public_ips).items()}
+            return {str(version): ip for version, ip in worker.last_public_ips.items()}
+        return worker.status()
+
+def send_command(control_file, command, refresh=False, timeout=10):
+    """Sends `command` to the instance that owns `control_file` and returns its JSON answer.
+    Raises ControlError if no instance is running or it refused the command."""
+    info = read_json(control_file)
+    if not isinstance(info, dict) or "port" not in info: raise ControlError("No running instance found.")
+    url = f"http://127.0.0.1:{info['port']}/{command}" + ("?refresh=1" if refresh else "")
+    request = urllib.request.Request(url, data=b"" if command in ("update", "reload") else None, headers={"X-Control-Token": info.get("token", "")})
+    # Never through a proxy, whatever the environment says
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+    try:
+        with opener.open(request, timeout=timeout) as response: return json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        try: message = json.loads(e.read().decode("utf-8")).get("error", e.reason)
+        except ValueError: message = e.reason
+        raise ControlError(f"The running instance refused '{command}' : {message}") from e
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        raise ControlError(f"No running instance answered : {e}") from e
+
+def main(command, config_file=None, refresh=False, fleet=None):
+    """Entry point for `--command`. Prints the JSON answer of the instance using the config, or of
+    the fleet running from the `fleet` directory; returns 0 on success."""
+    from .config import ConfigManager
+    from .constants import CONFIG_FILE
+    if fleet:
+        from .fleet import FLEET_CONFIG
+        config_file = os.path.join(fleet, FLEET_CONFIG)
+    config = ConfigManager(os.path.abspath(config_file) if config_file else CONFIG_FILE)
+    try: print(json.dumps(send_command(config.get_control_file(), command, refresh), indent=1, sort_keys=True))
+    except ControlError as e: print(f"Error : {e}"); return 1
+    return 0
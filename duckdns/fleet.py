@@ -0,0 +1,291 @@
+import heapq
+import logging
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from filelock import FileLock, Timeout
+
+from .client import DuckDNSClient
+from .config import ConfigManager
+from .fswatch import DirectoryWatcher
+from .control import ControlServer
+from .constants import APP_NAME, APP_VERSION
+from .history import History
+from .logs import setup_logging
+from .metrics import Metrics, start_metrics_server
+from .verify import RecordVerifier
+from .worker import UpdateWorker, log_status
+
+# --- Fleet mode ---
+# One process for a directory of profiles, one *.ini per site. A profile is an ordinary config
+# (domains, token, interval, [Network] options) and gets an UpdateWorker that is never started as
+# a thread : the fleet scheduler runs its cycles instead. Threads and connection pools are shared,
+# so a fleet of hundreds of profiles costs a handful of threads rather than one per profile.
+# The fleet's own [Logging], [Metrics] and [Control] sections live in .fleet.ini in the directory,
+# which the dot keeps from being taken for a profile.
+FLEET_CONFIG = ".fleet.ini"
+
+class Fleet:
+    """Runs every profile in `directory`. A single scheduler thread keeps the profiles in a heap
+    ordered by due time and hands due cycles to a pool of `workers` threads. Profiles behind the
+    same egress (the same [Network] egress label, binding and lookup options) share one DuckDNSClient,
+    so one IP lookup (and its cache and request budget) serves all of them. Profiles bound to
+    different uplinks get their own clients, and their lookups run side by side in the pool."""
+    RESCAN_INTERVAL = 60.0  # only where the OS can't report changes to the directory
+
+    def __init__(self, directory, workers=8, config=None):
+        self.directory = os.path.abspath(directory)
+        self.workers = max(int(workers), 1)
+        self.config = config or ConfigManager(os.path.join(self.directory, FLEET_CONFIG))
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fleet")
+        # DNS record checks of all profiles share one pool, rather than one per profile
+        self.verify_pool = ThreadPoolExecutor(max_workers=RecordVerifier.WORKERS, thread_name_prefix="verify")
+        self.metrics = Metrics()
+        # One history for the whole fleet, each profile recorded under its name
+        self.history = History(os.path.join(self.directory, "history.db"))
+        self.profiles, self.clients = {}, {}  # path -> UpdateWorker, egress key -> DuckDNSClient
+        self._clients_lock = threading.Lock()  # a client must not be pruned between its creation and its first user
+        self._heap, self._due, self._busy, self._sequence = [], {}, set(), 0
+        self._condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self._scheduler_thread, self.metrics_server, self.control_server = None, None, None
+        self._watcher = DirectoryWatcher(self.directory, lambda name: name.endswith(".ini"), self.RESCAN_INTERVAL)
+
+    # --- Profiles ---
+    def profile_paths(self):
+        try: return sorted(entry.path for entry in os.scandir(self.directory) if entry.name.endswith(".ini") and not entry.name.startswith(".") and entry.is_file())
+        except OSError as e: logging.error(f"Could not read fleet directory {self.directory} : {e}"); return []
+
+    def _client_for(self, config):
+        """The shared client for the profile's egress, created on first use."""
+        options = config.settings.client
+        # Profiles bound to an uplink are an egress of their own even without a label
+        label = (config.get("Network", "egress", "").strip() or options["interface"] or options["source_address"] or options["proxy"] or "default").lower()
+        label = re.sub(r"[^\w.-]+", "_", label)
+        # Enough pooled connections for every pool thread to have one
+        options = dict(options, pool_size=max(options["pool_size"], self.workers),
+                       scoreboard_file=os.path.join(self.directory, f".providers-{label}.json"))
+        key = (label, repr(sorted(options.items())))
+        client = self.clients.get(key)
+        if client is None:
+            client = self.clients[key] = DuckDNSClient(**options)
+            client.metrics = self.metrics
+            client.reachability.listeners.append(lambda: self._replay_pending(client))
+            logging.info(f"New egress '{label}' ({options['lookup_mode']} lookups), {len(self.clients)} in use.")
+        return client
+
+    def _add(self, path):
+        name = os.path.splitext(os.path.basename(path))[0]
+        config = ConfigManager(path)
+        with self._clients_lock:
+            worker = UpdateWorker(config, lambda message, is_error=False: log_status(f"{name} : {message}", is_error), self._client_for(config), self.metrics, self.history,
+                                  self.verify_pool)
+        self.profiles[path] = worker
+        self._schedule(path, 0)
+
+    def _remove(self, path):
+        worker = self.profiles.pop(path)
+        worker.stop_event.set(); worker.state.save(); worker.journal.save(); worker.close()
+        with self._condition: self._due.pop(path, None)
+        logging.info(f"Profile {path} removed.")
+
+    def rescan(self):
+        """Picks up added, deleted and edited profiles. A stat per profile, run when the directory changed."""
+        paths = self.profile_paths()
+        for path in set(self.profiles) - set(paths): self._remove(path)
+        for path in paths:
+            worker = self.profiles.get(path)
+            if worker is None: self._add(path); continue
+            try:
+                if not worker.config.reload_if_changed(): continue
+            except Exception as e: logging.error(f"Error reloading {path} : {e}"); continue
+            # Applied by the profile's next cycle, which may also move it to another egress
+            logging.info(f"{path} changed, new settings will apply to the next cycle.")
+            worker.request_reload(); self.force_update(path)
+        self._prune_clients()
+
+    def reload(self):
+        """Re-reads every profile now rather than when its file changes, for the control API's reload.
+        Returns the names of the profiles whose file could not be parsed; they keep their settings."""
+        failed = []
+        for worker in list(self.profiles.values()):
+            if worker.config.load(): worker.request_reload()
+            else: failed.append(worker.site)
+        self.force_update()
+        return failed
+
+    def _replay_pending(self, client):
+        """Runs the queued updates of the profiles on `client` now that its connection is back."""
+        for path, worker in list(self.profiles.items()):
+            if worker.client is client and len(worker.journal):
+                worker._replay_requested = True
+                self._schedule_now(path)
+
+    def _prune_clients(self):
+        with self._clients_lock:
+            used = {id(worker.client) for worker in list(self.profiles.values())}
+            for key, client in list(self.clients.items()):
+                if id(client) not in used: del self.clients[key]; client.close()
+
+    # --- Scheduling ---
+    def _schedule(self, path, delay):
+        with self._condition:
+            self._sequence += 1
+            # A later entry for the same profile supersedes this one; stale heap entries are skipped when popped
+            self._due[path] = self._sequence
+            heapq.heappush(self._heap, (time.monotonic() + delay, self._sequence, path))
+            self._condition.notify()
+
+    def _schedule_now(self, path):
+        """Runs `path` as soon as possible, unless it is running : then it is rescheduled when it finishes."""
+        # The condition's lock is reentrant, and holding it makes the check and the scheduling one step
+        with self._condition:
+            if path not in self._busy: self._schedule(path, 0)
+
+    def force_update(self, path=None):
+        """Runs the given profile, or every profile, as soon as a pool thread is free. The IP lookups
+        of the egresses involved are redone once, then shared again."""
+        for client in {id(worker.client): worker.client for profile, worker in list(self.profiles.items()) if path in (None, profile)}.values(): client.ip_cache.clear()
+        for profile in [path] if path else list(self.profiles):
+            worker = self.profiles.get(profile)
+            if worker is None: continue
+            worker._forced = True
+            self._schedule_now(profile)
+
+    def _scheduler(self):
+        while not self.stop_event.is_set():
+            with self._condition:
+                if not self._heap: self._condition.wait(); continue
+                due, sequence, path = self._heap[0]
+                if due > time.monotonic(): self._condition.wait(due - time.monotonic()); continue
+                heapq.heappop(self._heap)
+                # Superseded, removed, or still running (it is rescheduled when it finishes)
+                if self._due.get(path) != sequence or path in self._busy: continue
+                worker = self.profiles.get(path)
+                if worker is None: continue
+                self._busy.add(path)
+            self.pool.submit(self._run_cycle, path, worker)
+
+    def _run_cycle(self, path, worker):
+        try:
+            if worker._reload_requested:
+                with self._clients_lock: worker.client = self._client_for(worker.config)
+            delay = worker.run_due()
+        except Exception as e: logging.error(f"Error in profile {path} : {e}", exc_info=True); delay = worker.schedule.RETRY_MIN
+        with self._condition:
+            self._busy.discard(path)
+            if self.profiles.get(path) is worker and not self.stop_event.is_set(): self._schedule(path, 0 if worker._forced or worker._replay_requested else delay)
+
+    # --- Metrics and status ---
+    def is_alive(self):
+        return self._scheduler_thread is not None and self._scheduler_thread.is_alive()
+
+    def _collect_metrics(self, metrics):
+        metrics.worker_up.set(1 if self.is_alive() else 0)
+        workers = list(self.profiles.values())
+        metrics.pending_updates.set(sum(len(worker.journal) for worker in workers))
+        for worker in workers:
+            for domain, entry in worker.state.snapshot().items():
+                if entry.get("time"): metrics.domain_confirmed.set(entry["time"], domain=domain)
+
+    def status(self):
+        """The control API's status : each profile's worker status, under the profile's name."""
+        running = self.is_alive()
+        return {"running": running, "egresses": len(self.clients),
+                "profiles": {worker.site: dict(worker.status(), running=running) for worker in list(self.profiles.values())}}
+
+    # --- Lifecycle ---
+    def run(self):
+        """Runs until stop() is called. The calling thread rescans the directory when it changes."""
+        logging.info(f"Starting {APP_NAME} v{APP_VERSION} (fleet, {self.directory})")
+        self.rescan()
+        logging.info(f"Fleet started with {len(self.profiles)} profile(s) and {len(self.clients)} egress(es).")
+        scheduler = self._scheduler_thread = threading.Thread(target=self._scheduler, name="fleet-scheduler", daemon=True)
+        scheduler.start()
+        metrics_options = self.config.get_metrics_options()
+        if metrics_options:
+            self.metrics.collectors.append(self._collect_metrics)
+            self.metrics_server = start_metrics_server(self.metrics, **metrics_options)
+        control_options = self.config.get_control_options()
+        if control_options: self.control_server = FleetControlServer(self, **control_options).start()
+        while self._watcher.wait() and not self.stop_event.is_set():
+            try: self.rescan()
+            except Exception as e: logging.error(f"Error rescanning {self.directory} : {e}", exc_info=True)
+        if self.control_server: self.control_server.stop()
+        if self.metrics_server: self.metrics_server.shutdown()
+        for worker in self.profiles.values(): worker.stop_event.set()
+        with self._condition: self._condition.notify_all()
+        scheduler.join(timeout=5)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        for worker in self.profiles.values(): worker.state.save(); worker.journal.save(); worker.close()
+        self.verify_pool.shutdown(wait=False, cancel_futures=True)
+        for client in self.clients.values(): client.close()
+        self.history.close()
+        logging.info("Fleet stopped.")
+
+    def stop(self):
+        self.stop_event.set(); self._watcher.close()
+        with self._condition: self._condition.notify_all()
+
+class FleetControlServer(ControlServer):
+    """The control API of a fleet : update and reload act on every profile, status and ip answer
+    for each profile under its name."""
+    def __init__(self, fleet, control_file, port=0):
+        super().__init__(None, control_file, port)
+        self.fleet = fleet
+
+    def run_command(self, command, refresh=False):
+        fleet = self.fleet
+        if command == "update":
+            fleet.force_update()
+            return {"ok": True}
+        if command == "reload":
+            failed = fleet.reload()
+            if failed: return {"ok": False, "error": f"Could not parse {', '.join(sorted(failed))}, their current settings were kept."}
+            return {"ok": True}
+        if command == "ip":
+            answers, lookups = {}, {}
+            for worker in list(fleet.profiles.values()):
+                ips = worker.last_public_ips
+                if refresh:
+                    # Profiles behind one egress have one public IP, so a refresh costs one lookup per egress
+                    key = (id(worker.client), worker.ip_versions)
+                    if key not in lookups: lookups[key] = worker.client.get_public_ips(worker.ip_versions, worker.last_public_ips)
+                    ips = lookups[key]
+                answers[worker.site] = {str(version): ip for version, ip in ips.items()}
+            return answers
+        return fleet.status()
+
+def main(directory, workers=8):
+    """Entry point for `--fleet`. Returns an exit code."""
+    config = ConfigManager(os.path.join(directory, FLEET_CONFIG))
+    setup_logging(log_to_console=True, **config.get_logging_options())
+    if not os.path.isdir(directory): logging.error(f"Fleet directory not found : {directory}"); return 1
+    lock = FileLock(os.path.join(directory, ".fleet.lock"), timeout=1)
+    try: lock.acquire(timeout=0)
+    except Timeout: logging.warning(f"Another fleet is already running from {directory}. Exiting."); return 1
+    fleet = Fleet(directory, workers, config)
+
+    def _request_stop(signum, frame):
+        logging.info(f"Received signal {signum}, shutting down."); fleet.stop()
+
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+    if hasattr(signal, "SIGHUP"): signal.signal(signal.SIGHUP, lambda signum, frame: fleet.force_update())
+    try:
+        fleet.run()
+        return 0
+    except Exception as e:
+        logging.critical(f"An unexpected error occurred : {e}", exc_info=True)
+        return 1
+    finally:
+        try: lock.release()
+        except Exception: pass
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1] if len(sys.argv) > 1 else "."))
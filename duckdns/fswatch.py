@@ -0,0 +1,112 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+
+# --- Directory change notifications ---
+# Watching a file by stat()ing it every few seconds wakes every instance on the host all the time,
+# even when nothing changes. The OS can instead wake the watching thread only when a file changes.
+IN_ATTRIB, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x4, 0x8, 0x40, 0x80, 0x100, 0x200
+IN_IGNORED = 0x8000
+_EVENT = struct.Struct("iIII")
+
+class DirectoryWatcher:
+    """Waits for changes to the files of `directory`. Uses inotify on Linux and change notifications
+    on Windows, where the waiting thread sleeps until something changes. Elsewhere, or if they are
+    not available, it polls every `poll_interval` seconds.
+    `match(name)` picks the files that count. Windows doesn't report names, so there any change in
+    the directory wakes the waiter; callers stat their files anyway to tell what changed."""
+    def __init__(self, directory, match=None, poll_interval=60):
+        self.directory, self.match, self.poll_interval = directory, match or (lambda name: True), poll_interval
+        self._closed, self._lock = threading.Event(), threading.Lock()  # the lock keeps close() off handles being released
+        self._inotify, self._wake, self._handles = None, None, None
+        try:
+            if sys.platform.startswith("linux"): self._start_inotify()
+            elif sys.platform == "win32": self._start_windows()
+        except (OSError, AttributeError) as e:
+            logging.warning(f"No change notifications for {directory} ({e}), checking it every {poll_interval:g}s instead.")
+            self._release()
+
+    @property
+    def notifies(self):
+        return self._inotify is not None or self._handles is not None
+
+    def wait(self):
+        """Blocks until a matching file may have changed. Returns False once close() was called."""
+        if self._inotify is not None: return self._wait_inotify()
+        if self._handles is not None: return self._wait_windows()
+        return not self._closed.wait(self.poll_interval)
+
+    def close(self):
+        """Wakes up wait() for good. The notification handles are released by the waiting thread."""
+        with self._lock:
+            self._closed.set()
+            if self._wake is not None: os.write(self._wake[1], b"\0")
+            if self._handles is not None: ctypes.windll.kernel32.SetEvent(ctypes.c_void_p(self._handles[1]))
+
+    # --- inotify ---
+    def _start_inotify(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0: raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self._inotify = fd
+        mask = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if self._libc.inotify_add_watch(fd, os.fsencode(self.directory), mask) < 0: raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self._wake = os.pipe()
+
+    def _wait_inotify(self):
+        while not self._closed.is_set():
+            ready, _, _ = select.select([self._inotify, self._wake[0]], [], [])
+            if self._closed.is_set() or self._inotify not in ready: break
+            matched, data = False, b""
+            try:
+                while True: data += os.read(self._inotify, 4096)
+            except BlockingIOError: pass
+            offset = 0
+            while offset + _EVENT.size <= len(data):
+                _, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0").decode("utf-8", "replace")
+                offset += _EVENT.size + length
+                if mask & IN_IGNORED:
+                    # The directory itself is gone or was replaced : keep going by polling
+                    logging.warning(f"{self.directory} is no longer watched, checking it every {self.poll_interval:g}s instead.")
+                    self._release(); return True
+                matched = matched or self.match(name)
+            if matched: return True
+        self._release()
+        return False
+
+    # --- Windows ---
+    def _start_windows(self):
+        kernel32 = ctypes.windll.kernel32
+        kernel32.FindFirstChangeNotificationW.restype = kernel32.CreateEventW.restype = ctypes.c_void_p
+        # FILE_NOTIFY_CHANGE_FILE_NAME | FILE_NOTIFY_CHANGE_SIZE | FILE_NOTIFY_CHANGE_LAST_WRITE
+        change = kernel32.FindFirstChangeNotificationW(ctypes.c_wchar_p(self.directory), False, 0x1 | 0x8 | 0x10)
+        if change in (None, ctypes.c_void_p(-1).value): raise ctypes.WinError()
+        stop = kernel32.CreateEventW(None, True, False, None)
+        if not stop: kernel32.FindCloseChangeNotification(ctypes.c_void_p(change)); raise ctypes.WinError()
+        self._handles = (ctypes.c_void_p * 2)(change, stop)
+
+    def _wait_windows(self):
+        kernel32 = ctypes.windll.kernel32
+        result = kernel32.WaitForMultipleObjects(2, self._handles, False, 0xFFFFFFFF)  # INFINITE
+        if result == 0 and not self._closed.is_set():
+            kernel32.FindNextChangeNotification(ctypes.c_void_p(self._handles[0]))
+            return True
+        self._release()
+        return False
+
+    def _release(self):
+        with self._lock:
+            if self._inotify is not None: os.close(self._inotify); self._inotify = None
+            if self._wake is not None:
+                for fd in self._wake: os.close(fd)
+                self._wake = None
+            if self._handles is not None:
+                kernel32 = ctypes.windll.kernel32
+                kernel32.FindCloseChangeNotification(ctypes.c_void_p(self._handles[0])); kernel32.CloseHandle(ctypes.c_void_p(self._handles[1]))
+                self._handles = None
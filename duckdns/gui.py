@@ -0,0 +1,254 @@
+import tkinter as tk
+from tkinter import messagebox
+import time
+from pystray import MenuItem as item, Icon, Menu
+import os
+import sys
+import logging
+from filelock import FileLock, Timeout
+
+from .constants import APP_NAME, APP_VERSION, CONFIG_FILE, LOGO_FILE, TRAY_IMAGE_CACHE, get_lock_file
+from .logs import setup_logging
+from .metrics import serve_metrics
+from .config import ConfigManager, parse_domains
+from .control import ControlServer
+from .worker import UpdateWorker
+
+# Tray icon size; larger source images are scaled down once and cached in TRAY_IMAGE_CACHE
+TRAY_IMAGE_SIZE = 256
+
+def load_tray_image():
+    """Returns the tray image, from the pre-rendered PNG when it is newer than LOGO_FILE.
+    Otherwise decodes and resizes the .ico once and refreshes the cache."""
+    from PIL import Image  # pystray loads PIL anyway; only Image.open and the resize are saved here
+    try:
+        if os.path.getmtime(TRAY_IMAGE_CACHE) >= os.path.getmtime(LOGO_FILE):
+            image = Image.open(TRAY_IMAGE_CACHE); image.load(); return image
+    except OSError: pass
+    image = Image.open(LOGO_FILE)
+    if image.size[0] > TRAY_IMAGE_SIZE or image.size[1] > TRAY_IMAGE_SIZE:
+        image = image.resize((TRAY_IMAGE_SIZE, TRAY_IMAGE_SIZE), Image.Resampling.LANCZOS)
+    try: image.save(TRAY_IMAGE_CACHE, "PNG")
+    except OSError as e: logging.warning(f"Could not cache the tray image : {e}")
+    return image
+
+# --- Main Application Controller ---
+class DuckDNSSentryApp:
+    def __init__(self, config_file=CONFIG_FILE):
+        self.root = tk.Tk(); self.root.withdraw()
+        self.image_for_tray, self.icon = None, None
+        self.settings_window = None
+        self.port_checker_window = None
+        self.help_window = None
+        self.config = ConfigManager(config_file)
+        self.worker = UpdateWorker(self.config, self.update_status)
+        self.metrics_server, self.control_server = None, None
+        # Created on first use, see _windows() and _runner()
+        self._windows_module, self._event_loop, self.async_client = None, None, None
+        self._is_exiting = False
+
+    def _setup_icons(self):
+        if not os.path.exists(LOGO_FILE): self._show_fatal_error(f"Icon file not found :\n{LOGO_FILE}"); return False
+        try: self.image_for_tray = load_tray_image(); return True
+        except Exception as e: self._show_fatal_error(f"Failed to load icon file.\nError : {e}"); return False
+
+    def _apply_root_icon(self, windows):
+        try:
+            if self.root.winfo_exists() and os.path.exists(LOGO_FILE): self.root.iconbitmap(LOGO_FILE); windows.set_window_icon_win32(self.root)
+        except Exception as e: logging.warning(f"Could not set icon for root window : {e}")
+
+    def _windows(self):
+        """Imports the window classes and builds the ttk styles the first time a window opens."""
+        if self._windows_module is None:
+            from . import windows
+            windows.setup_styles(self.root)
+            self._apply_root_icon(windows)
+            self._windows_module = windows
+        return self._windows_module
+
+    def _runner(self):
+        """The event loop thread and asyncio client for tray actions, started on first use."""
+        if self._event_loop is None:
+            from .aioclient import AsyncDuckDNSClient, EventLoopThread
+            options = self.config.get_client_options(); options["scoreboard_file"] = None
+            self.async_client = AsyncDuckDNSClient(**options)
+            # Share the worker's provider scores so both clients rank providers the same way and only one saves them
+            self.async_client.scoreboard, self.async_client.metrics = self.worker.client.scoreboard, self.worker.metrics
+            # ... and its request budget and lookups, so "Show My Public IP" joins a lookup in flight or reuses its answer
+            client = self.worker.client
+            self.async_client.limiter, self.async_client.ip_cache, self.async_client.flights = client.limiter, client.ip_cache, client.flights
+            self.async_client.reachability = client.reachability
+            self._event_loop = EventLoopThread("gui-asyncio")
+        return self._event_loop
+
+    def run(self, measure_startup=None):
+        """Shows the tray icon and runs the Tk main loop. With `measure_startup` (a time.perf_counter()
+        value from process start) the time to tray is reported and the app exits right away."""
+        logging.info(f"Starting {APP_NAME} v{APP_VERSION}")
+        if not self._setup_icons(): sys.exit(1)
+        
+        menu = (item('Settings', self.open_settings, default=True), 
+                item('Force Update', self.worker.force_update),
+                item('Show My Public IP', self.show_ip),
+                Menu.SEPARATOR,
+                item('Check Service Port', self.open_port_checker),
+                item('Help : Firewall & Port Forwarding', self.open_help),
+                Menu.SEPARATOR,
+                item(f'About {APP_NAME}', self.show_about),
+                item('Exit', self.exit_app))
+                
+        self.icon = Icon(APP_NAME, self.image_for_tray, f"{APP_NAME} - Starting...", menu)
+        self.worker.start()
+        metrics_options = self.config.get_metrics_options()
+        if metrics_options: self.metrics_server = serve_metrics(self.worker, **metrics_options)
+        control_options = self.config.get_control_options()
+        if control_options: self.control_server = ControlServer(self.worker, **control_options).start()
+        try:
+            self.icon.run_detached()
+            if measure_startup is not None: self.root.after(0, self._report_startup, measure_startup)
+            self.root.mainloop()
+        except Exception as e: logging.critical(f"Error in main loop : {e}", exc_info=True)
+        finally: self._cleanup()
+
+    def _report_startup(self, started):
+        elapsed = (time.perf_counter() - started) * 1000
+        loaded = ", ".join(name for name in ("requests", "duckdns.windows", "PIL.IcoImagePlugin") if name in sys.modules) or "none"
+        logging.info(f"Time to tray : {elapsed:.0f} ms (deferred modules already loaded : {loaded})")
+        print(f"Time to tray : {elapsed:.0f} ms (deferred modules already loaded : {loaded})", flush=True)
+        self.exit_app()
+
+    def _cleanup(self):
+        if self._is_exiting: return
+        self._is_exiting = True; logging.info("Cleaning up resources...")
+        try:
+            self.worker.stop(); self.icon.stop()
+            self._stop_event_loop()
+            if self.metrics_server: self.metrics_server.shutdown()
+            if self.control_server: self.control_server.stop()
+        except Exception as e: logging.error(f"Error during cleanup : {e}")
+
+    def _stop_event_loop(self):
+        """Closes the asyncio client's connections on its own loop, then stops and closes the loop."""
+        if self._event_loop is None: return
+        try: self._event_loop.submit(self.async_client.aclose()).result(timeout=2)
+        except Exception as e: logging.warning(f"Could not close the asyncio client : {e}")
+        self._event_loop.stop()
+
+    def _show_fatal_error(self, message):
+        logging.critical(message); temp_root = tk.Tk(); temp_root.withdraw()
+        messagebox.showerror("Fatal Error", message); temp_root.destroy()
+
+    def update_status(self, message, is_error=False):
+        if not self._is_exiting: self.root.after(0, self._update_status_threadsafe, message, is_error)
+
+    def _update_status_threadsafe(self, message, is_error):
+        if not self.icon or self._is_exiting: return
+        try:
+            self.icon.title = f"{APP_NAME}\n[{time.strftime('%H:%M:%S')}] {message}"
+            has_notify = hasattr(self.icon, 'HAS_NOTIFICATION') and self.icon.HAS_NOTIFICATION
+            if self.config.settings.notifications and has_notify:
+                self.icon.notify(message, f"{APP_NAME} Error" if is_error else f"{APP_NAME}")
+        except Exception as e: logging.error(f"Error updating status : {e}")
+
+    def show_modern_dialog(self, title, message, msg_type="info"):
+        if not self._is_exiting: self._windows().ModernMessageBox(self.root, title, message, msg_type)
+
+    def save_new_settings(self, settings):
+        self.config.update_settings(**settings)
+        self.worker.request_reload()
+        self.show_modern_dialog("Settings Saved", "Your settings have been saved successfully!", "success")
+        self.worker.force_update()
+
+    def open_settings(self, icon=None, item=None):
+        if self._is_exiting: return
+        if self.settings_window and self.settings_window.winfo_exists(): return self.settings_window.lift()
+        self.settings_window = self._windows().ModernSettingsWindow(self.root, self.config.get_all_settings(), self.save_new_settings)
+        self.settings_window.protocol("WM_DELETE_WINDOW", self._on_settings_close)
+        
+    def open_port_checker(self, icon=None, item=None):
+        if self._is_exiting: return
+        if self.port_checker_window and self.port_checker_window.winfo_exists(): return self.port_checker_window.lift()
+        current_domain = next(iter(parse_domains(self.config.get("DuckDNS", "domain", ""))), "")
+        self.port_checker_window = self._windows().PortCheckerWindow(self.root, current_domain, self._runner())
+        self.port_checker_window.protocol("WM_DELETE_WINDOW", self._on_port_checker_close)
+
+    def open_help(self, icon=None, item=None):
+        if self._is_exiting: return
+        if self.help_window and self.help_window.winfo_exists(): return self.help_window.lift()
+        self.help_window = self._windows().HelpWindow(self.root)
+        self.help_window.protocol("WM_DELETE_WINDOW", self._on_help_close)
+
+    def _on_settings_close(self):
+        # This handler is now mostly a fallback; the window's own protocol handler
+        # in ModernSettingsWindow calls the cleanup method.
+        if self.settings_window:
+            if self.settings_window.winfo_exists():
+                 # Directly call the window's cleanup method to ensure unbinding happens
+                self.settings_window._close_and_cleanup()
+            self.settings_window = None
+    
+    # --- BUG Added proper close handlers for new windows ---
+    def _on_port_checker_close(self):
+        if self.port_checker_window: self.port_checker_window._stop_event.set(); self.port_checker_window.destroy(); self.port_checker_window = None
+        
+    def _on_help_close(self):
+        if self.help_window: self.help_window.destroy(); self.help_window = None
+
+    def show_ip(self, icon, item):
+        # Runs on the shared event loop so the tray callback returns at once
+        runner = self._runner()
+        runner.submit(self.async_client.get_public_ips(self.worker.ip_versions), self._show_ip_result)
+
+    def _show_ip_result(self, found):
+        ip = "\n".join(ip for ip in (found or {}).values() if ip) or "Not available"
+        if not self._is_exiting: self.root.after(0, self.show_modern_dialog, "Your Public IP", f"Your current public IP address is :\n\n{ip}", "info")
+
+    def show_about(self, icon, item):
+        about_text = f"{APP_NAME} v{APP_VERSION}\n\nA DuckDNS IP updater with a simple interface.\n\nDeveloped by thirawat27"
+        self.root.after(0, self.show_modern_dialog, f"About {APP_NAME}", about_text, "info")
+
+    def exit_app(self, icon=None, item=None):
+        if self._is_exiting: return
+        logging.info("Exit command received from tray."); self.root.after(0, self._safe_exit)
+
+    def _safe_exit(self):
+        if self._is_exiting: return
+        self._is_exiting = True; logging.info("Executing safe exit on main thread.")
+        try:
+            if self.settings_window and self.settings_window.winfo_exists(): self.settings_window.destroy()
+            if self.port_checker_window and self.port_checker_window.winfo_exists(): self.port_checker_window.destroy()
+            if self.help_window and self.help_window.winfo_exists(): self.help_window.destroy()
+            self.worker.stop(); self.icon.stop()
+            self._stop_event_loop()
+            if self.metrics_server: self.metrics_server.shutdown()
+            if self.control_server: self.control_server.stop()
+            if self.root.winfo_exists(): self.root.destroy()
+        except Exception as e: logging.error(f"Error during safe exit : {e}"); sys.exit(1)
+
+# --- Program Entry Point ---
+def show_warning_message(title, message):
+    temp_root = tk.Tk(); temp_root.withdraw(); messagebox.showwarning(title, message); temp_root.destroy()
+
+def main(config_file=None, measure_startup=None):
+    """Entry point for the tray application. Returns an exit code. See DuckDNSSentryApp.run() for `measure_startup`."""
+    config_file = os.path.abspath(config_file) if config_file else CONFIG_FILE
+    # Use the globally defined LOCK_FILE path
+    lock = FileLock(get_lock_file(config_file), timeout=1)
+
+    try:
+        lock.acquire(timeout=0)
+        setup_logging(**ConfigManager(config_file).get_logging_options())
+        app = DuckDNSSentryApp(config_file)
+        app.run(measure_startup)
+        return 0
+    except Timeout:
+        logging.warning("Application is already running. Exiting.")
+        show_warning_message("Already Running", f"{APP_NAME} is already running.\nCheck the system tray.")
+        return 1
+    except Exception as e:
+        logging.critical(f"An unexpected error occurred : {e}", exc_info=True)
+        show_warning_message("Application Error", f"An unexpected error occurred. Please check the log file for details.\n\nError : {e}")
+        return 1
+    finally:
+        try: lock.release()
+        except: pass
@@ -0,0 +1,63 @@
+import logging
+import os
+import signal
+import sys
+
+from filelock import FileLock, Timeout
+
+from .config import ConfigManager
+from .control import ControlServer
+from .constants import APP_NAME, APP_VERSION, CONFIG_FILE, get_lock_file
+from .logs import setup_logging
+from .metrics import serve_metrics
+from .worker import UpdateWorker
+
+# --- Headless (no GUI) runner ---
+def run_headless(config_file=CONFIG_FILE):
+    """Runs the update loop in the foreground until SIGINT/SIGTERM. Returns an exit code."""
+    logging.info(f"Starting {APP_NAME} v{APP_VERSION} (headless)")
+    config = ConfigManager(config_file)
+    worker = UpdateWorker(config)
+    metrics_options = config.get_metrics_options()
+    metrics_server = serve_metrics(worker, **metrics_options) if metrics_options else None
+    control_options = config.get_control_options()
+    control_server = ControlServer(worker, **control_options).start() if control_options else None
+
+    def _request_stop(signum, frame):
+        logging.info(f"Received signal {signum}, shutting down.")
+        worker.stop_event.set(); worker.force_update_event.set()
+
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+    # SIGHUP is the conventional "poke" signal for daemons, e.g. from DHCP or VPN hooks.
+    if hasattr(signal, "SIGHUP"): signal.signal(signal.SIGHUP, lambda signum, frame: worker.force_update())
+
+    worker.start()
+    # On POSIX a signal interrupts join() right away. Windows only runs the handler between bytecodes.
+    while worker.is_alive(): worker.join(timeout=None if os.name == "posix" else 1)
+    if metrics_server: metrics_server.shutdown()
+    if control_server: control_server.stop()
+    logging.info("Headless runner stopped.")
+    return 0
+
+def main(config_file=None):
+    """Entry point for `--headless`. Returns an exit code."""
+    config_file = os.path.abspath(config_file) if config_file else CONFIG_FILE
+    setup_logging(log_to_console=True, **ConfigManager(config_file).get_logging_options())
+    lock = FileLock(get_lock_file(config_file), timeout=1)
+    try:
+        lock.acquire(timeout=0)
+    except Timeout:
+        logging.warning(f"Another instance is already using {config_file}. Exiting. Use --command update|status|reload|ip to control it.")
+        return 1
+    try:
+        return run_headless(config_file)
+    except Exception as e:
+        logging.critical(f"An unexpected error occurred : {e}", exc_info=True)
+        return 1
+    finally:
+        try: lock.release()
+        except Exception: pass
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+# --- IP change history ---
+# Kept in SQLite (in the standard library) with the names and addresses stored once in lookup
+# tables, so that a row is a handful of integers. Public IP lookups are stored as periods : an
+# unchanged lookup only moves the last_seen time of the current period, so a site that checks every
+# 30 seconds for years still adds a row only when its IP changes. Update outcomes get a row per
+# domain and attempt; "unchanged" cycles add nothing. The time-to-update of a change is worked out
+# when it is recorded, and the indexes cover the queries, so reports don't grow slower with age.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sites (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS addresses (id INTEGER PRIMARY KEY, address TEXT NOT NULL UNIQUE);
+-- site, ip, ipv6 and confirmed (time) : the last IPs DuckDNS confirmed for the domain, then running
+-- totals of its updates, so that a report over everything recorded doesn't read the updates table
+CREATE TABLE IF NOT EXISTS domains (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, created INTEGER NOT NULL,
+                                    site INTEGER, ip INTEGER, ipv6 INTEGER, confirmed INTEGER,
+                                    updated INTEGER NOT NULL DEFAULT 0, rejected INTEGER NOT NULL DEFAULT 0, errors INTEGER NOT NULL DEFAULT 0,
+                                    drift INTEGER NOT NULL DEFAULT 0, changes INTEGER NOT NULL DEFAULT 0, lag_total INTEGER NOT NULL DEFAULT 0, lag_max INTEGER);
+CREATE TABLE IF NOT EXISTS periods (id INTEGER PRIMARY KEY, site INTEGER NOT NULL, ip INTEGER, ipv6 INTEGER,
+                                    first_seen INTEGER NOT NULL, last_seen INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS periods_site ON periods (site, first_seen);
+-- lag : milliseconds from the lookup that found the new IPs to DuckDNS confirming them, for changes only
+CREATE TABLE IF NOT EXISTS updates (time INTEGER NOT NULL, domain INTEGER NOT NULL, site INTEGER NOT NULL,
+                                    outcome INTEGER NOT NULL, ip INTEGER, ipv6 INTEGER, lag INTEGER);
+CREATE INDEX IF NOT EXISTS updates_domain ON updates (domain, time, outcome, lag);
+CREATE INDEX IF NOT EXISTS updates_time ON updates (time, domain, outcome, lag);
+PRAGMA user_version = 1;
+"""
+
+# updated : DuckDNS answered OK, rejected : KO, error : no answer or an unknown one,
+# published : DNS already held the IPs so nothing was sent, drift : DNS was found holding other IPs
+OUTCOMES = {"updated": 1, "rejected": 2, "error": 3, "published": 4, "drift": 5}
+OUTCOME_NAMES = {code: name for name, code in OUTCOMES.items()}
+
+def parse_age(value):
+    """Converts '90d', '12h', '2w', '30m' or a bare number of days to seconds. None if invalid."""
+    match = re.match(r"^\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*$", str(value or "").lower())
+    if not match: return None
+    return float(match.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, "": 86400}[match.group(2)]
+
+def _ms(when):
+    return int((time.time() if when is None else when) * 1000)
+
+class History:
+    """Timeline of public IP changes and update outcomes, per site (a config or fleet profile) and
+    per domain. Writes never raise : a history that can't be written is logged and the updates go on.
+    One History can be shared by several workers; `filename=None` records nothing."""
+    def __init__(self, filename=None, read_only=False):
+        self.filename, self._db = filename, None
+        self._lock = threading.Lock()
+        self._ids = {}  # (table, name) -> id, names and addresses never change id
+        self._current = {}  # site id -> (period id, ip id, ipv6 id, first_seen) of the latest period
+        if not filename: return
+        try:
+            if read_only: self._db = sqlite3.connect(f"file:{filename}?mode=ro", uri=True, check_same_thread=False)
+            else:
+                self._db = sqlite3.connect(filename, check_same_thread=False)
+                # WAL lets the --history report read while the app writes; NORMAL is still crash-safe with WAL
+                self._db.execute("PRAGMA journal_mode = WAL"); self._db.execute("PRAGMA synchronous = NORMAL")
+                self._db.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            logging.error(f"Could not open history {filename} : {e}")
+            if self._db is not None: self._db.close()
+            self._db = None
+            if read_only: raise
+
+    def close(self):
+        with self._lock:
+            if self._db is not None: self._db.close(); self._db = None
+
+    # --- Recording ---
+    def _id(self, table, name, when=None):
+        """Id of `name` in sites, addresses or domains, added on first use. None stays None."""
+        if name is None: return None
+        key = (table, name)
+        if key not in self._ids:
+            column = "address" if table == "addresses" else "name"
+            row = self._db.execute(f"SELECT id FROM {table} WHERE {column} = ?", (name,)).fetchone()
+            if row is None:
+                if table == "domains": cursor = self._db.execute("INSERT INTO domains (name, created) VALUES (?, ?)", (name, _ms(when)))
+                else: cursor = self._db.execute(f"INSERT INTO {table} ({column}) VALUES (?)", (name,))
+                row = (cursor.lastrowid,)
+            self._ids[key] = row[0]
+        return self._ids[key]
+
+    def _current_period(self, site_id):
+        if site_id not in self._current:
+            self._current[site_id] = self._db.execute("SELECT id, ip, ipv6, first_seen FROM periods WHERE site = ? ORDER BY first_seen DESC LIMIT 1", (site_id,)).fetchone()
+        return self._current[site_id]
+
+    def discovered(self, site, ip, ipv6, when=None):
+        """Records a public IP lookup of `site`. Returns True if it found other IPs than the last one."""
+        if self._db is None: return False
+        now = _ms(when)
+        try:
+            with self._lock, self._db:
+                site_id, ip_id, ipv6_id = self._id("sites", site), self._id("addresses", ip), self._id("addresses", ipv6)
+                current = self._current_period(site_id)
+                if current and current[1:3] == (ip_id, ipv6_id):
+                    self._db.execute("UPDATE periods SET last_seen = ? WHERE id = ?", (now, current[0])); return False
+                cursor = self._db.execute("INSERT INTO periods (site, ip, ipv6, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)", (site_id, ip_id, ipv6_id, now, now))
+                self._current[site_id] = (cursor.lastrowid, ip_id, ipv6_id, now)
+                return current is not None
+        except sqlite3.Error as e:
+            self._forget(); logging.warning(f"Could not record IP lookup in history : {e}"); return False
+
+    def recorded(self, site, outcomes, ip, ipv6, changed=(), when=None):
+        """Records {domain: outcome} (see OUTCOMES) for an update of `site` to ip/ipv6. For the domains in
+        `changed` (whose confirmed IPs were different before), a confirmation also records how long it
+        took since a lookup of `site` first found ip/ipv6."""
+        if self._db is None or not outcomes: return
+        now = _ms(when)
+        try:
+            with self._lock, self._db:
+                site_id, ip_id, ipv6_id = self._id("sites", site), self._id("addresses", ip), self._id("addresses", ipv6)
+                found = self._found_since(site_id, ip_id, ipv6_id) if changed else None
+                rows = []
+                for domain, outcome in outcomes.items():
+                    code = OUTCOMES[outcome]
+                    lag = max(now - found, 0) if code in (1, 4) and domain in changed and found is not None else None
+                    rows.append({"time": now, "domain": self._id("domains", domain, when), "site": site_id, "outcome": code, "ip": ip_id, "ipv6": ipv6_id, "lag": lag})
+                self._db.executemany("INSERT INTO updates (time, domain, site, outcome, ip, ipv6, lag) VALUES (:time, :domain, :site, :outcome, :ip, :ipv6, :lag)", rows)
+                # A confirmation (updated or published) also moves the domain's confirmed IPs
+                self._db.executemany("""UPDATE domains SET updated = updated + (:outcome = 1), rejected = rejected + (:outcome = 2), errors = errors + (:outcome = 3),
+                                        drift = drift + (:outcome = 5), changes = changes + (:lag IS NOT NULL), lag_total = lag_total + IFNULL(:lag, 0),
+                                        lag_max = IIF(:lag IS NULL, lag_max, MAX(IFNULL(lag_max, :lag), :lag)), site = IIF(:outcome IN (1, 4), :site, site), ip = IIF(:outcome IN (1, 4), :ip, ip),
+                                        ipv6 = IIF(:outcome IN (1, 4), :ipv6, ipv6), confirmed = IIF(:outcome IN (1, 4), :time, confirmed) WHERE id = :domain""", rows)
+        except sqlite3.Error as e:
+            self._forget(); logging.warning(f"Could not record update outcomes in history : {e}")
+
+    def _forget(self):
+        # Ids handed out in a rolled back transaction no longer exist
+        with self._lock: self._ids.clear(); self._current.clear()
+
+    def _found_since(self, site_id, ip_id, ipv6_id):
+        """When a lookup of the site first found these IPs (the latest such period), or None."""
+        current = self._current_period(site_id)
+        if current and current[1:3] == (ip_id, ipv6_id): return current[3]
+        # Queued updates replayed after the IP changed again : an older period
+        row = self._db.execute("SELECT first_seen FROM periods WHERE site = ? AND ip IS ? AND ipv6 IS ? ORDER BY first_seen DESC LIMIT 1", (site_id, ip_id, ipv6_id)).fetchone()
+        return row[0] if row else None
+
+    # --- Queries ---
+    def _query(self, sql, parameters=()):
+        if self._db is None: return []
+        with self._lock: return self._db.execute(sql, parameters).fetchall()
+
+    def changes(self, domain=None, site=None, since=None, until=None, limit=None):
+        """The IP changes of `domain` as confirmed by DuckDNS, each with the seconds it took, or the
+        IP periods that lookups of `site` (or of every site) found. Oldest first; with `limit`, the newest ones."""
+        start, end = _ms(since) if since else 0, _ms(until)
+        order = f"DESC LIMIT {int(limit)}" if limit else "ASC"
+        if domain is not None:
+            rows = self._query(f"""SELECT u.time, s.name, a.address, b.address, u.outcome, u.lag FROM updates u JOIN domains d ON d.id = u.domain
+                                   JOIN sites s ON s.id = u.site LEFT JOIN addresses a ON a.id = u.ip LEFT JOIN addresses b ON b.id = u.ipv6
+                                   WHERE d.name = ? AND u.time >= ? AND u.time < ? AND u.lag IS NOT NULL ORDER BY u.time {order}""", (domain, start, end))
+            changes = [{"time": t / 1000, "site": s, "ip": ip, "ipv6": ipv6, "outcome": OUTCOME_NAMES[o], "time_to_update": lag / 1000} for t, s, ip, ipv6, o, lag in rows]
+        else:
+            rows = self._query(f"""SELECT p.first_seen, p.last_seen, s.name, a.address, b.address FROM periods p JOIN sites s ON s.id = p.site
+                                   LEFT JOIN addresses a ON a.id = p.ip LEFT JOIN addresses b ON b.id = p.ipv6
+                                   WHERE (? IS NULL OR s.name = ?) AND p.last_seen >= ? AND p.first_seen < ? ORDER BY p.first_seen {order}""", (site, site, start, end))
+            changes = [{"time": first / 1000, "last_seen": last / 1000, "site": s, "ip": ip, "ipv6": ipv6} for first, last, s, ip, ipv6 in rows]
+        return changes[::-1] if limit else changes
+
+    def stats(self, domains=None, since=None, until=None):
+        """Per site : how many times its IP changed. Per domain : update outcomes, changes confirmed, mean
+        and longest time-to-update, seconds spent stale (from the lookup that found new IPs to DuckDNS
+        confirming them) and uptime, the share of the time its record was not known to be stale.
+        Covers [since, until), or everything recorded; `domains` limits it to some domains."""
+        now, start, end = _ms(None), _ms(since) if since else 0, _ms(until)
+        sites = {name: {"changes": changes, "ip": ip, "ipv6": ipv6, "since": first / 1000} for name, changes, ip, ipv6, first in self._query(
+            # The first period of a site is where its history starts, not a change
+            """SELECT s.name, (SELECT COUNT(*) FROM periods WHERE site = s.id AND first_seen >= ? AND first_seen < ?
+                                                           AND first_seen > (SELECT MIN(first_seen) FROM periods WHERE site = s.id)),
+                      a.address, b.address, p.first_seen FROM sites s JOIN periods p ON p.id = (SELECT id FROM periods WHERE site = s.id ORDER BY first_seen DESC LIMIT 1)
+                      LEFT JOIN addresses a ON a.id = p.ip LEFT JOIN addresses b ON b.id = p.ipv6""", (start, end))}
+        names = f"d.name IN ({', '.join('?' * len(domains))})" if domains else "1"
+        # Stale since the first IP change after the last confirmation, if the site's IPs are not the confirmed ones
+        known = {row[0]: row[1:] for row in self._query(
+            f"""SELECT d.name, d.created, d.confirmed, CASE WHEN p.first_seen > d.confirmed AND (p.ip IS NOT d.ip OR p.ipv6 IS NOT d.ipv6)
+                       THEN (SELECT MIN(first_seen) FROM periods WHERE site = d.site AND first_seen > d.confirmed) END,
+                       d.updated, d.rejected, d.errors, d.drift, d.changes, d.lag_total * 1.0 / NULLIF(d.changes, 0), d.lag_max, d.lag_total
+                FROM domains d LEFT JOIN periods p ON p.id = (SELECT id FROM periods WHERE site = d.site ORDER BY first_seen DESC LIMIT 1) WHERE {names}""", tuple(domains or ()))}
+        if since or until:
+            # A change confirmed after `until` still counts the part of its stale time that falls before it
+            totals = {row[0]: row[1:] for row in self._query(
+                f"""SELECT d.name, SUM(u.time < ? AND u.outcome = 1), SUM(u.time < ? AND u.outcome = 2), SUM(u.time < ? AND u.outcome = 3),
+                           SUM(u.time < ? AND u.outcome = 5), COUNT(CASE WHEN u.time < ? THEN u.lag END), AVG(CASE WHEN u.time < ? THEN u.lag END),
+                           MAX(CASE WHEN u.time < ? THEN u.lag END), SUM(CASE WHEN u.time - u.lag < ? THEN MIN(u.time, ?) - MAX(u.time - u.lag, ?) END)
+                    FROM updates u JOIN domains d ON d.id = u.domain WHERE u.time >= ? AND {names} GROUP BY u.domain""", (end,) * 9 + (start, start) + tuple(domains or ()))}
+        report = {}
+        for name, (created, confirmed, stale_since, *everything) in known.items():
+            updated, rejected, errors, drift, changes, mean, longest, stale = totals.get(name) or (0, 0, 0, 0, 0, None, None, None) if since or until else everything
+            stale = stale or 0
+            # Stale right now : the site's IPs changed and DuckDNS hasn't confirmed the new ones yet
+            if stale_since is not None and end >= now - 1000: stale += max(min(end, now) - max(stale_since, start), 0)
+            window = min(end, now) - max(start, created)
+            report[name] = {"updated": updated or 0, "rejected": rejected or 0, "errors": errors or 0, "drift": drift or 0, "changes": changes,
+                            "mean_time_to_update": mean / 1000 if mean is not None else None, "max_time_to_update": longest / 1000 if longest is not None else None,
+                            "stale_seconds": stale / 1000, "stale_since": stale_since / 1000 if stale_since is not None else None,
+                            "last_confirmed": confirmed / 1000 if confirmed else None, "uptime": max(1 - stale / window, 0) if window > 0 else None}
+        return {"sites": sites, "domains": report}
+
+def main(report, config_file=None, fleet=None, domains=None, since=None, limit=None):
+    """Entry point for `--history`. Prints a JSON report read from the history of the config or the
+    fleet directory, while the app keeps running; returns 0 on success."""
+    import json
+    import os
+    from .config import ConfigManager, parse_domains
+    from .constants import CONFIG_FILE
+    filename = os.path.join(fleet, "history.db") if fleet else ConfigManager(os.path.abspath(config_file) if config_file else CONFIG_FILE).get_history_file()
+    if not filename or not os.path.exists(filename): print(f"Error : No history found{f' at {filename}' if filename else ', it is disabled in the config'}."); return 1
+    age = parse_age(since) if since else None
+    if since and age is None: print(f"Error : Invalid --since '{since}', use e.g. 7d, 12h or 2w."); return 1
+    try: history = History(filename, read_only=True)
+    except sqlite3.Error as e: print(f"Error : Could not read {filename} : {e}"); return 1
+    domains, since = parse_domains(domains), time.time() - age if age else None
+    try:
+        if report == "stats": result = history.stats(domains, since)
+        elif domains: result = {domain: history.changes(domain, since=since, limit=limit) for domain in domains}
+        else: result = history.changes(since=since, limit=limit)
+    except sqlite3.Error as e: print(f"Error : Could not read {filename} : {e}"); return 1
+    finally: history.close()
+    print(json.dumps(result, indent=1, sort_keys=True))
+    return 0
@@ -0,0 +1,84 @@
+import logging
+import random
+import threading
+import time
+
+from .storage import read_json, write_json
+
+# --- Pending update journal ---
+class UpdateJournal:
+    """Updates that DuckDNS has not confirmed yet, one entry per domain, saved to a small JSON file
+    so that they survive a restart. Queueing a domain again replaces its entry, so only the newest
+    IP is ever sent. A failed entry is retried after RETRY_MIN seconds, doubling with every further
+    failure up to RETRY_MAX, spread by +/- JITTER so that many domains don't retry in lockstep."""
+    RETRY_MIN = 15
+    RETRY_MAX = 600
+    JITTER = 0.2
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        if filename: self.load()
+
+    def load(self):
+        data = read_json(self.filename, default={})
+        entries = data.get("pending") if isinstance(data, dict) else None
+        if isinstance(entries, dict):
+            with self._lock: self._entries = {domain: entry for domain, entry in entries.items() if isinstance(entry, dict) and entry.get("account")}
+            if self._entries: logging.info(f"{len(self._entries)} queued update(s) found : {', '.join(self._entries)}.")
+
+    def __len__(self):
+        with self._lock: return len(self._entries)
+
+    def add(self, domains, account, ip, ipv6):
+        """Queues `domains` (of the account named `account`) for ip/ipv6, due now. An entry for the
+        same IPs keeps its retry count; one for other IPs is replaced."""
+        with self._lock:
+            for domain in domains:
+                entry = self._entries.get(domain)
+                if entry and (entry["account"], entry["ip"], entry["ipv6"]) == (account, ip, ipv6): continue
+                self._entries[domain] = {"account": account, "ip": ip, "ipv6": ipv6, "queued": time.time(), "attempts": 0, "next_try": 0}
+                self._dirty = True
+
+    def failed(self, domain):
+        """Schedules the next attempt for `domain` with exponential backoff."""
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry is None: return
+            entry["attempts"] += 1
+            delay = min(self.RETRY_MIN * 2 ** (entry["attempts"] - 1), self.RETRY_MAX)
+            entry["next_try"] = time.time() + delay * random.uniform(1 - self.JITTER, 1 + self.JITTER)
+            self._dirty = True
+
+    def done(self, domain, ip=None, ipv6=None):
+        """Drops the entry of `domain`. With ip/ipv6 given, only if it is still for those IPs."""
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry is None or (ip or ipv6) and (entry["ip"], entry["ipv6"]) != (ip, ipv6): return
+            del self._entries[domain]
+            self._dirty = True
+
+    def retain(self, domains):
+        """Drops every entry whose domain is not in `domains`."""
+        with self._lock:
+            for domain in [domain for domain in self._entries if domain not in domains]: del self._entries[domain]; self._dirty = True
+
+    def pending(self, due_by=None):
+        """Returns {domain: entry} of the entries due by `due_by` (a Unix time), or all of them."""
+        with self._lock: return {domain: dict(entry) for domain, entry in self._entries.items() if due_by is None or entry["next_try"] <= due_by}
+
+    def next_due(self):
+        """Unix time of the earliest attempt due, or None if nothing is queued."""
+        with self._lock: return min((entry["next_try"] for entry in self._entries.values()), default=None)
+
+    def save(self):
+        """Writes the journal atomically if anything changed since the last save."""
+        if not self.filename: return
+        with self._lock:
+            if not self._dirty: return
+            data = {"pending": {domain: dict(entry) for domain, entry in self._entries.items()}}
+            self._dirty = False
+        try: write_json(self.filename, data)
+        except OSError as e: logging.warning(f"Could not save update journal : {e}")
@@ -0,0 +1,97 @@
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+
+from .constants import LOG_FILE
+
+# --- Formatters and filters ---
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+    def format(self, record):
+        entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+                 "level": record.levelname, "thread": record.threadName, "message": record.getMessage()}
+        if record.exc_info: entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class SamplingFilter(logging.Filter):
+    """Lets through only the first and then every `every`-th of the routine messages that every
+    quiet cycle repeats, noting how many were dropped. Everything else passes untouched.
+    Repeats are counted per exact message, so a routine message that names a new IP (or provider)
+    is always logged the first time."""
+    ROUTINE = ("IP unchanged", "has not changed", "Internet connection check successful",
+               "Successfully retrieved public IP", "Local network unchanged")
+
+    def __init__(self, every=10):
+        super().__init__()
+        self.every = max(int(every), 1)
+        self._lock = threading.Lock()
+        self._seen = {}
+
+    def filter(self, record):
+        if self.every == 1 or record.levelno > logging.INFO: return True
+        message = record.getMessage()
+        if not any(pattern in message for pattern in self.ROUTINE): return True
+        with self._lock:
+            # Only IPs and providers vary, but a long run could still see many of them
+            if message not in self._seen and len(self._seen) >= 256: self._seen.clear()
+            count = self._seen.get(message, 0)
+            self._seen[message] = count + 1
+        if count % self.every: return False
+        if count: record.msg, record.args = f"{message} ({self.every - 1} similar messages skipped)", None
+        return True
+
+# --- Rotation ---
+def _gzip_rotator(source, destination):
+    with open(source, "rb") as log_file, gzip.open(destination, "wb") as archive: shutil.copyfileobj(log_file, archive)
+    os.remove(source)
+
+def _file_handler(filename, rotate, max_bytes, backups, compress):
+    if rotate == "daily": handler = logging.handlers.TimedRotatingFileHandler(filename, when="midnight", backupCount=backups, encoding="utf-8")
+    elif rotate == "size": handler = logging.handlers.RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+    else: return logging.FileHandler(filename, encoding="utf-8")
+    if compress: handler.namer, handler.rotator = (lambda name: f"{name}.gz"), _gzip_rotator
+    return handler
+
+# --- Setup Logging ---
+_listener = None
+
+def setup_logging(log_to_console=False, level="INFO", format="text", rotate="size", max_bytes=5 * 1024 * 1024, backups=5, compress=True, sample_every=10):
+    """Sets up the file logger, optionally mirrored to stderr for headless runs.
+    Records go through a queue and are written by a background thread, so a slow disk never
+    holds up the update worker. The file rotates by size (or daily) and old files are gzipped."""
+    global _listener
+    shutdown_logging()
+    formatter = JsonFormatter() if format == "json" else logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    level = getattr(logging, str(level).upper(), None)
+    if not isinstance(level, int): level = logging.INFO
+    handlers = [_file_handler(LOG_FILE, rotate, max_bytes, backups, compress)]
+    if log_to_console: handlers.append(logging.StreamHandler(sys.stderr))
+    for handler in handlers: handler.setFormatter(formatter); handler.setLevel(level)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_every))
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    root_logger.handlers.clear()
+    root_logger.addHandler(queue_handler)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging():
+    """Writes out everything still queued and closes the log file."""
+    global _listener
+    if _listener is None: return
+    _listener.stop()
+    for handler in _listener.handlers: handler.close()
+    _listener = None
+
+atexit.register(shutdown_logging)
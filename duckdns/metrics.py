@@ -0,0 +1,150 @@
+import logging
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .protocol import answer_kind
+
+# --- Prometheus metrics (text exposition format, no client library needed) ---
+CYCLE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LOOKUP_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value == float("inf"): return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.label_names = name, help_text, tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def header(self, kind):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {kind}"]
+
+class CounterMetric(_Metric):
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock: self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock: values = sorted(self._values.items())
+        return self.header("counter") + [f"{self.name}{_labels(self.label_names, key)} {_number(value)}" for key, value in values]
+
+class GaugeMetric(_Metric):
+    def set(self, value, **labels):
+        with self._lock: self._values[self._key(labels)] = value
+
+    def render(self):
+        with self._lock: values = sorted(self._values.items())
+        return self.header("gauge") + [f"{self.name}{_labels(self.label_names, key)} {_number(value)}" for key, value in values]
+
+class HistogramMetric(_Metric):
+    def __init__(self, name, help_text, labels=(), buckets=CYCLE_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound: counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self):
+        with self._lock: values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = self.header("histogram")
+        for key, (counts, total) in values:
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, [('le', _number(bound))])} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {counts[-1]}")
+        return lines
+
+class Metrics:
+    """Counters, gauges and histograms filled in by UpdateWorker and DuckDNSClient.
+    `collectors` are called on every scrape to refresh gauges that are read rather than pushed."""
+    def __init__(self):
+        self.cycle_duration = HistogramMetric("duckdns_cycle_duration_seconds", "Duration of update cycles.", ["outcome"], CYCLE_BUCKETS)
+        self.lookup_duration = HistogramMetric("duckdns_ip_lookup_duration_seconds", "Latency of public IP lookups per provider.", ["provider", "outcome"], LOOKUP_BUCKETS)
+        self.lookup_errors = CounterMetric("duckdns_ip_lookup_errors_total", "Failed public IP lookups per provider.", ["provider"])
+        self.updates = CounterMetric("duckdns_updates_total", "DuckDNS update results per domain.", ["domain", "result"])
+        self.ip_changes = CounterMetric("duckdns_ip_changes_total", "Public IP changes seen.", ["version"])
+        self.rate_limited = CounterMetric("duckdns_rate_limited_total", "Requests delayed or skipped by the request budget.", ["kind", "outcome"])
+        self.record_drift = CounterMetric("duckdns_record_drift_total", "Records found in DNS with an IP other than the one last confirmed.", ["domain"])
+        self.last_success = GaugeMetric("duckdns_last_success_timestamp_seconds", "Unix time of the last successful update cycle.")
+        self.last_cycle = GaugeMetric("duckdns_last_cycle_timestamp_seconds", "Unix time the worker last finished a cycle.")
+        self.domain_confirmed = GaugeMetric("duckdns_domain_last_confirmed_timestamp_seconds", "Unix time DuckDNS last confirmed the record of a domain.", ["domain"])
+        self.pending_updates = GaugeMetric("duckdns_pending_updates", "Updates queued until DuckDNS confirms them.")
+        self.worker_up = GaugeMetric("duckdns_worker_up", "1 while the update worker thread is alive.")
+        self.collectors = []
+
+    def observe_lookup(self, provider, latency, ok):
+        self.lookup_duration.observe(latency, provider=provider, outcome="ok" if ok else "error")
+        if not ok: self.lookup_errors.inc(provider=provider)
+
+    def observe_update(self, domain, result):
+        self.updates.inc(domain=domain, result=answer_kind(result))
+
+    def render(self):
+        for collect in self.collectors:
+            try: collect(self)
+            except Exception as e: logging.warning(f"Metrics collector failed : {e}")
+        lines = []
+        for metric in (self.cycle_duration, self.lookup_duration, self.lookup_errors, self.updates, self.ip_changes, self.rate_limited, self.record_drift,
+                       self.last_success, self.last_cycle, self.domain_confirmed, self.pending_updates, self.worker_up):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+def collect_worker(worker):
+    """Collector that reads liveness and per-domain confirmation times from an UpdateWorker."""
+    def collect(metrics):
+        metrics.worker_up.set(1 if worker.is_alive() else 0)
+        metrics.pending_updates.set(len(worker.journal))
+        for domain, entry in worker.state.snapshot().items():
+            if entry.get("time"): metrics.domain_confirmed.set(entry["time"], domain=domain)
+    return collect
+
+# --- HTTP endpoint ---
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics": self.send_error(404); return
+        body = self.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"Metrics request from {self.client_address[0]} : {format % args}")
+
+def serve_metrics(worker, address="127.0.0.1", port=9477):
+    """Starts the /metrics endpoint for `worker` on a daemon thread. Returns the server (call
+    shutdown() to stop it), or None if the port could not be bound."""
+    worker.metrics.collectors.append(collect_worker(worker))
+    return start_metrics_server(worker.metrics, address, port)
+
+def start_metrics_server(metrics, address="127.0.0.1", port=9477):
+    """Serves `metrics` at /metrics, whoever fills them in. Returns the server, or None if the port could not be bound."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"metrics": metrics})
+    server_class = type("MetricsServer", (ThreadingHTTPServer,), {"address_family": socket.AF_INET6 if ":" in address else socket.AF_INET})
+    try: server = server_class((address, port), handler)
+    except OSError as e: logging.error(f"Could not start metrics endpoint on {address}:{port} : {e}"); return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logging.info(f"Metrics available at http://{address}:{server.server_port}/metrics")
+    return server
@@ -0,0 +1,96 @@
+import logging
+import socket
+import struct
+import sys
+import time
+
+from .transport import bound_socket
+
+# --- Local network change detection ---
+def default_route_source(family=socket.AF_INET, target="8.8.8.8", interface=None):
+    """Returns the local address the OS would use to reach `target` (through `interface` if given),
+    or None without a route. Connecting a UDP socket only selects a route; no packet is sent."""
+    try:
+        with bound_socket(family, socket.SOCK_DGRAM, interface=interface) as sock:
+            sock.connect((target, 53))
+            return sock.getsockname()[0]
+    except OSError:
+        return None
+
+def default_gateway(interface=None):
+    """Returns the IPv4 default gateway (of `interface` if given) on Linux, from /proc/net/route, None elsewhere."""
+    if not sys.platform.startswith("linux"): return None
+    try:
+        with open("/proc/net/route", "r", encoding="ascii") as routes:
+            next(routes, None)
+            for line in routes:
+                fields = line.split()
+                # Destination 00000000 with the RTF_GATEWAY flag (0x2) is the default route
+                if len(fields) > 3 and fields[1] == "00000000" and int(fields[3], 16) & 0x2 and interface in (None, fields[0]):
+                    return socket.inet_ntoa(struct.pack("<L", int(fields[2], 16)))
+    except (OSError, ValueError):
+        pass
+    return None
+
+def natpmp_external_address(gateway, port=5351, timeout=0.25, source_address=None, interface=None):
+    """Asks a NAT-PMP (RFC 6886) gateway for its external IPv4 address. Returns None on no answer."""
+    try:
+        with bound_socket(socket.AF_INET, socket.SOCK_DGRAM, source_address, interface) as sock:
+            sock.settimeout(timeout)
+            sock.connect((gateway, port))
+            sock.send(b"\x00\x00")  # version 0, opcode 0: external address request
+            response = sock.recv(16)
+    except OSError:
+        return None
+    if len(response) < 12: return None
+    version, opcode, result = struct.unpack_from("!BBH", response)
+    if version != 0 or opcode != 128 or result != 0: return None
+    return socket.inet_ntoa(response[8:12])
+
+class ChangeDetector:
+    """Decides whether a remote public IP lookup is needed, using signals that never leave the LAN:
+    the default-route source address and, when a gateway is known, the router's NAT-PMP external
+    address. A lookup is due when any signal changed or `max_staleness` seconds have passed.
+    With lookups bound to a `source_address` or `interface`, the signals are taken from that uplink
+    instead of the default route. A bound source address says nothing about the uplink, so only the
+    NAT-PMP address is watched then, and only with a `gateway` set (or the interface's own default
+    gateway). Behind a `proxy` no local signal shows the address seen outside; every cycle looks up."""
+    def __init__(self, max_staleness=1800, gateway=None, natpmp=True, natpmp_port=5351, ipv6=False, source_address=None, interface=None, proxy=None):
+        self.max_staleness = max_staleness
+        self.ipv6 = ipv6
+        self.gateway = gateway
+        self.natpmp = natpmp
+        self.natpmp_port = natpmp_port
+        self.source_address, self.interface, self.proxy = source_address, interface, proxy
+        self._last_fingerprint = None
+        self._last_lookup = 0.0
+
+    def fingerprint(self):
+        if self.proxy: return {}
+        signals = {}
+        if not self.source_address:
+            signals["route_v4"] = default_route_source(socket.AF_INET, interface=self.interface)
+            # IPv6 hosts usually have a global address on the interface itself, so the route source is the public IP
+            if self.ipv6: signals["route_v6"] = default_route_source(socket.AF_INET6, "2001:4860:4860::8888", self.interface)
+        # The default route's gateway is another uplink's router when the lookups leave from a source address
+        gateway = self.gateway or (default_gateway(self.interface) if not self.source_address else None)
+        if gateway:
+            signals["gateway"] = gateway
+            if self.natpmp: signals["natpmp"] = natpmp_external_address(gateway, self.natpmp_port, source_address=self.source_address, interface=self.interface)
+        return signals
+
+    def lookup_needed(self):
+        """Returns (needed, fingerprint). Pass the fingerprint to lookup_done() after a successful lookup."""
+        fingerprint = self.fingerprint()
+        # A configured gateway never changes by itself : it only tells which router to ask
+        signals = [value for name, value in fingerprint.items() if name != "gateway" or not self.gateway]
+        if not any(signals): return True, fingerprint  # no local signal at all, can't tell
+        if self._last_fingerprint is None: return True, fingerprint
+        if time.monotonic() - self._last_lookup >= self.max_staleness: return True, fingerprint
+        if fingerprint != self._last_fingerprint:
+            logging.info(f"Local network changed ({self._last_fingerprint} -> {fingerprint}), looking up public IP.")
+            return True, fingerprint
+        return False, fingerprint
+
+    def lookup_done(self, fingerprint):
+        self._last_fingerprint, self._last_lookup = fingerprint, time.monotonic()
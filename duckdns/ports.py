@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import socket
+
+# --- Bulk TCP port checker ---
+MAX_PORTS = 4096  # per scan, to keep a typo like 1-65535 from turning into a port sweep
+
+def parse_ports(value):
+    """Parses "80,443,25565,8000-8100" into a sorted list of unique ports. Raises ValueError."""
+    ports = set()
+    for part in str(value).replace(" ", "").split(","):
+        if not part: continue
+        low, dash, high = part.partition("-")
+        if not low.isdigit() or (dash and not high.isdigit()): raise ValueError(f"Invalid port or range : '{part}'")
+        low, high = int(low), int(high or low)
+        if not (1 <= low <= high <= 65535): raise ValueError(f"Ports must be between 1 and 65535 : '{part}'")
+        ports.update(range(low, high + 1))
+        if len(ports) > MAX_PORTS: raise ValueError(f"Too many ports, at most {MAX_PORTS} per check.")
+    if not ports: raise ValueError("No port given.")
+    return sorted(ports)
+
+def parse_hosts(value):
+    """Splits a comma/space separated host list, keeping order and dropping duplicates."""
+    hosts = []
+    for host in str(value).replace(",", " ").split():
+        if host not in hosts: hosts.append(host)
+    return hosts
+
+async def _resolve(loop, host):
+    try:
+        infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        return infos[0][4][0]
+    except (socket.gaierror, UnicodeError):
+        return None
+
+async def _probe(host, address, port, timeout, semaphore):
+    async with semaphore:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+            writer.close()
+            try: await writer.wait_closed()
+            except OSError: pass
+            return host, port, True, f"Success : Port {port} is open on {host}."
+        except asyncio.TimeoutError:
+            return host, port, False, f"Failed : Port {port} is closed on {host} (Connection timed out)."
+        except OSError:
+            return host, port, False, f"Failed : Port {port} is closed on {host} (Connection refused)."
+
+async def scan_async(hosts, ports, concurrency=100, timeout=3, on_result=None, stop_event=None):
+    """Probes every host/port pair, at most `concurrency` at a time, each limited to `timeout` seconds.
+    Calls on_result(host, port, is_open, message) as each probe finishes and returns all results."""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max(int(concurrency), 1))
+    addresses = await asyncio.gather(*(_resolve(loop, host) for host in hosts))
+    results, tasks = [], []
+    for host, address in zip(hosts, addresses):
+        if address is None:
+            # One line per host rather than one per port for names that don't resolve
+            result = (host, None, False, f"Error : Hostname '{host}' could not be resolved.")
+            results.append(result)
+            if on_result: on_result(*result)
+            continue
+        tasks.extend(asyncio.ensure_future(_probe(host, address, port, timeout, semaphore)) for port in ports)
+    try:
+        for finished in asyncio.as_completed(tasks):
+            result = await finished
+            results.append(result)
+            if on_result: on_result(*result)
+            if stop_event is not None and stop_event.is_set(): break
+    finally:
+        for task in tasks: task.cancel()
+    open_count = sum(1 for _, _, is_open, _ in results if is_open)
+    logging.info(f"Port check of {len(hosts)} host(s) x {len(ports)} port(s) finished : {open_count} open.")
+    return results
+
+def scan(hosts, ports, concurrency=100, timeout=3, on_result=None, stop_event=None):
+    """Blocking wrapper around scan_async() for threads and the command line."""
+    return asyncio.run(scan_async(hosts, ports, concurrency, timeout, on_result, stop_event))
+
+def main(ports, hosts=None, config_file=None):
+    """Entry point for `--check-ports`. Checks `hosts`, or every configured domain if none are given.
+    Prints one line per probe as it finishes; returns 0 only if every port is open."""
+    try: port_list = parse_ports(ports)
+    except ValueError as e: print(f"Error : {e}"); return 2
+    host_list = parse_hosts(hosts or "")
+    if not host_list:
+        from .config import ConfigManager
+        from .constants import CONFIG_FILE
+        config = ConfigManager(config_file or CONFIG_FILE)
+        host_list = [f"{domain}.duckdns.org" for account in config.get_accounts() for domain in account["domains"]]
+    if not host_list: print("Error : No host given and no domain configured."); return 2
+    results = scan(host_list, port_list, on_result=lambda host, port, is_open, message: print(message, flush=True))
+    return 0 if results and all(is_open for _, _, is_open, _ in results) else 1
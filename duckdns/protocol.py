@@ -0,0 +1,132 @@
+import ipaddress
+import logging
+from collections import Counter
+from urllib.parse import parse_qs, urlparse
+
+from . import resolver
+
+# --- Decisions shared by the threaded and the asyncio client ---
+# What to send next and what an answer means, without any I/O. DuckDNSClient and AsyncDuckDNSClient
+# only differ in how they send requests and wait for answers, so a fix here applies to both.
+def answer_kind(result):
+    """"OK", "KO" or "ERROR" for a DuckDNS answer, or for the client's own "ERROR" when there was none."""
+    return "OK" if "OK" in result else "KO" if "KO" in result else "ERROR"
+
+def is_valid_ip(ip, version=4):
+    """True if `ip` is an IP address of the given version (4, 6, or None for either)."""
+    try: address = ipaddress.ip_address(ip)
+    except ValueError: return False
+    return version is None or address.version == version
+
+def normalize_ip(ip):
+    """The canonical text of an IP address (lowercase, compressed IPv6), so that one address always
+    compares equal to itself. Anything else is returned as is."""
+    try: return ipaddress.ip_address(ip.strip()).compressed if ip else ip
+    except ValueError: return ip
+
+def rank_providers(scoreboard, providers, proxy=None, include_open=False):
+    """The providers to ask, best first (see ProviderScoreboard.rank())."""
+    # DNS queries can't go through an HTTP or SOCKS proxy, so they would report the wrong uplink's address
+    if proxy: providers = [provider for provider in providers if not provider.startswith("dns:")]
+    return scoreboard.rank(providers, include_open=include_open)
+
+def dns_provider(provider):
+    """(server, name, qtype, port) of a dns:// provider URL."""
+    spec = urlparse(provider)
+    qtype = resolver.TYPE_NAMES.get(parse_qs(spec.query).get("type", ["A"])[0].upper(), resolver.TYPE_A)
+    return spec.hostname, spec.path.lstrip("/"), qtype, spec.port or 53
+
+def address_in_answers(answers):
+    """The first IP address in the answers of a dns:// provider. Raises DnsError if there is none."""
+    for _, value in answers:
+        if is_valid_ip(value, version=None): return value
+    raise resolver.DnsError(f"No address in DNS answer : {[value for _, value in answers]}")
+
+def connectivity_probes(client, host=None, port=53):
+    """(known, probes) for is_connected() : `known` is the answer when no probe is needed, else None
+    and the connections to try are `probes`."""
+    if host is not None: return None, [(host, port)]
+    known = client.reachability.cached()
+    if known is not None: return known, []
+    # A direct probe says nothing about a proxy (and direct egress may be blocked) : the proxied requests decide
+    if not client.CONNECTIVITY_PROBES or client.proxy: return True, []
+    return None, client.CONNECTIVITY_PROBES
+
+class Votes:
+    """Counts the answers of providers asked at once. An IP is settled once `required` providers gave
+    it, or at once if it is `known_ip` : an unchanged IP needs no confirmation, quorum only guards
+    against accepting a bogus change."""
+    def __init__(self, required, known_ip=None, version=4):
+        self.required, self.known_ip, self.version = required, known_ip, version
+        self.votes = Counter()
+
+    def add(self, ip):
+        """Counts an answer (None for a failed provider). Returns the settled IP, or None."""
+        if not ip: return None
+        self.votes[ip] += 1
+        return ip if self.votes[ip] >= self.required or ip == self.known_ip else None
+
+    def failed(self):
+        """Logs why no IP was settled. Returns None, the lookup's result."""
+        if self.votes: logging.error(f"No IPv{self.version} reached a quorum of {self.required} providers. Answers : {dict(self.votes)}")
+        else: logging.error(f"All public IPv{self.version} providers failed.")
+
+class BatchPlan:
+    """The requests of an update of many domains with one token, one round at a time.
+    DuckDNS answers a single OK/KO for the whole list, so a KO batch is split in half until the
+    rejected domains are isolated; the other domains still get their own OK.
+    A KO for a bad token looks the same, and splitting would then cost two requests per domain.
+    So until something is accepted, a rejected batch first has one of its `known_good` domains
+    (accepted with this token before) sent alone. Two of them rejected means the token is bad.
+    With `token_accepted` False (DuckDNS never accepted anything with the token), there is nothing
+    to probe with, and the first rejected batch rejects every domain instead of being split.
+    The requests of a round may be sent one after another or all at once :
+        while plan.pending: plan.answered([send(domains) for domains in plan.next_round()])"""
+    def __init__(self, batches, known_good=(), token_accepted=True):
+        self.results = {}
+        # (domains, rest, answer) : `rest` is None for a batch, or the rest of the batch a probe was taken from, rejected with `answer`
+        self.pending = [(list(batch), None, None) for batch in batches]
+        self._round = []
+        self._probes = [domain for batch in batches for domain in batch if domain in known_good]
+        self._rejected_probes, self._token_accepted = 0, token_accepted
+
+    def next_round(self):
+        """The requests to send now, as lists of domains. Their answers go to answered(), in the same order."""
+        self._round, self.pending = self.pending, []
+        return [domains for domains, _, _ in self._round]
+
+    def answered(self, answers):
+        kinds = [answer_kind(answer) for answer in answers]
+        if "OK" in kinds: self._probes, self._token_accepted = [], True  # the token works
+        give_up = None
+        for (domains, rest, rejected), answer, kind in zip(self._round, answers, kinds):
+            if rest is not None:
+                # A known good domain sent alone, out of a rejected batch
+                self.results[domains[0]] = answer
+                if kind == "OK": self._split(rest, rejected)  # so the rest holds an invalid domain
+                elif kind == "KO" and self._rejected_probes >= 1:
+                    logging.error("DuckDNS rejected domains it accepted before on their own : the token is probably invalid.")
+                    give_up = give_up or answer; self.results.update(dict.fromkeys(rest, answer))
+                else:
+                    # The probe may have been the only invalid domain (or got no answer) : the rest has to be tried again
+                    self._rejected_probes += kind == "KO"
+                    if rest: self.pending.append((rest, None, None))
+            elif kind != "KO" or len(domains) == 1: self.results.update(dict.fromkeys(domains, answer))
+            elif not self._token_accepted:
+                if give_up is None: logging.error("DuckDNS rejected the update and never accepted this token : check the token and the domains.")
+                give_up = give_up or answer; self.results.update(dict.fromkeys(domains, answer))
+            else:
+                probe = next((domain for domain in domains if domain in self._probes), None)
+                if probe is None: self._split(domains, answer); continue
+                self._probes.remove(probe)
+                self.pending.append(([probe], [domain for domain in domains if domain != probe], answer))
+        if give_up is not None:
+            # What was not sent yet is given up with the token
+            for domains, rest, _ in self.pending: self.results.update(dict.fromkeys(domains + (rest or []), give_up))
+            self.pending = []
+
+    def _split(self, domains, answer):
+        if len(domains) < 2: self.results.update(dict.fromkeys(domains, answer)); return
+        middle = len(domains) // 2
+        logging.warning(f"DuckDNS rejected a batch of {len(domains)} domains, splitting it to find the invalid ones.")
+        self.pending.extend([(domains[:middle], None, None), (domains[middle:], None, None)])
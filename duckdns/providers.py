@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from .storage import read_json, write_json
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values: return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+# --- Provider health scoreboard ---
+class ProviderScoreboard:
+    """Rolling latency/error statistics per IP provider, used to try the fastest healthy providers
+    first and to skip failing ones for a while (circuit breaker with exponential backoff)."""
+    WINDOW = 50              # outcomes kept per provider
+    FAILURE_THRESHOLD = 3    # consecutive failures that open the circuit
+    BASE_BACKOFF = 60        # seconds a provider is skipped the first time its circuit opens
+    MAX_BACKOFF = 3600
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._providers = {}
+        self._dirty = False
+        if filename: self.load()
+
+    def _entry(self, provider):
+        entry = self._providers.get(provider)
+        if entry is None:
+            entry = {"samples": deque(maxlen=self.WINDOW), "consecutive_failures": 0, "last_failure": None, "open_until": 0.0}
+            self._providers[provider] = entry
+        return entry
+
+    def record_success(self, provider, latency):
+        with self._lock:
+            entry = self._entry(provider)
+            entry["samples"].append((round(latency, 4), True))
+            entry["consecutive_failures"], entry["open_until"] = 0, 0.0
+            self._dirty = True
+
+    def record_failure(self, provider, latency):
+        with self._lock:
+            entry, now = self._entry(provider), time.time()
+            entry["samples"].append((round(latency, 4), False))
+            entry["consecutive_failures"] += 1
+            entry["last_failure"] = now
+            failures_over = entry["consecutive_failures"] - self.FAILURE_THRESHOLD
+            if failures_over >= 0:
+                backoff = min(self.BASE_BACKOFF * (2 ** failures_over), self.MAX_BACKOFF)
+                entry["open_until"] = now + backoff
+                logging.warning(f"Provider {provider} failed {entry['consecutive_failures']} times in a row, skipping it for {backoff}s.")
+            self._dirty = True
+
+    def _score(self, entry):
+        # Expected cost of asking this provider: typical latency, inflated by how often it fails.
+        samples = entry["samples"]
+        if not samples: return 0.0  # untried providers go first so that they get measured
+        latencies = sorted(latency for latency, ok in samples if ok)
+        error_rate = sum(1 for _, ok in samples if not ok) / len(samples)
+        p50 = _percentile(latencies, 0.5)
+        return (p50 if p50 is not None else 10.0) * (1 + 4 * error_rate)
+
+    def rank(self, providers, include_open=False):
+        """Returns `providers` best-first, leaving out those whose circuit is open unless `include_open`
+        is set, in which case they come last as a fallback. If every circuit is open, all providers are
+        returned, soonest-to-reopen first."""
+        with self._lock:
+            now = time.time()
+            entries = {provider: self._entry(provider) for provider in providers}
+            available = [p for p in providers if entries[p]["open_until"] <= now]
+            skipped = sorted((p for p in providers if entries[p]["open_until"] > now), key=lambda p: entries[p]["open_until"])
+            # sorted() is stable, so equally scored providers keep their configured order
+            ranked = sorted(available, key=lambda p: self._score(entries[p]))
+            return ranked + skipped if include_open or not ranked else ranked
+
+    def stats(self):
+        """Returns {provider: {"p50", "p95", "error_rate", "last_failure", "open_until", "samples"}}."""
+        with self._lock:
+            result = {}
+            for provider, entry in self._providers.items():
+                samples = entry["samples"]
+                latencies = sorted(latency for latency, ok in samples if ok)
+                result[provider] = {"p50": _percentile(latencies, 0.5), "p95": _percentile(latencies, 0.95),
+                                    "error_rate": (sum(1 for _, ok in samples if not ok) / len(samples)) if samples else 0.0,
+                                    "last_failure": entry["last_failure"], "open_until": entry["open_until"], "samples": len(samples)}
+            return result
+
+    def load(self):
+        data = read_json(self.filename, default={})
+        if not isinstance(data, dict): return
+        with self._lock:
+            for provider, saved in (data.get("providers") or {}).items():
+                entry = self._entry(provider)
+                entry["samples"].extend((float(latency), bool(ok)) for latency, ok in saved.get("samples", []))
+                entry["consecutive_failures"] = int(saved.get("consecutive_failures", 0))
+                entry["last_failure"] = saved.get("last_failure")
+                entry["open_until"] = float(saved.get("open_until", 0.0))
+
+    def save(self):
+        """Persists the scoreboard if anything changed since the last save."""
+        if not self.filename: return
+        with self._lock:
+            if not self._dirty: return
+            data = {"providers": {provider: {"samples": list(entry["samples"]), "consecutive_failures": entry["consecutive_failures"],
+                                             "last_failure": entry["last_failure"], "open_until": entry["open_until"]}
+                                  for provider, entry in self._providers.items()}}
+            self._dirty = False
+        try: write_json(self.filename, data)
+        except OSError as e: logging.warning(f"Could not save provider scoreboard : {e}")
@@ -0,0 +1,98 @@
+import threading
+import time
+from concurrent.futures import Future
+
+# --- Request budgets ---
+class TokenBucket:
+    """Allows `rate` requests per second on average, in bursts of up to `burst` requests.
+    `clock` returns the time in seconds; tests pass a fake one."""
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate, self.burst, self.clock = float(rate), max(float(burst), 1.0), clock
+        self.tokens, self.updated = self.burst, clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait=None):
+        """Takes a token and returns how many seconds the caller must wait before using it, or None
+        (taking nothing) if that would be longer than `max_wait`. The balance may go negative, so
+        callers that reserve while the bucket is empty are served in order."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if max_wait is not None and wait > max_wait: return None
+            self.tokens -= 1
+            return wait
+
+class RateLimiter:
+    """Token buckets per endpoint. `budgets` maps a kind of request ("update", "provider") to
+    (requests per second, burst); every endpoint of that kind gets its own bucket. Kinds without a
+    budget are not limited. One RateLimiter can be shared by several clients, threaded or async."""
+    def __init__(self, budgets=None):
+        self.budgets, self._buckets = {}, {}
+        self._lock = threading.Lock()
+        self.configure(budgets)
+
+    def configure(self, budgets):
+        """Applies new budgets in place. Buckets of kinds whose budget did not change keep their balance."""
+        budgets = {kind: budget for kind, budget in (budgets or {}).items() if budget and budget[0] > 0}
+        with self._lock:
+            self._buckets = {key: bucket for key, bucket in self._buckets.items() if budgets.get(key[0]) == self.budgets.get(key[0])}
+            self.budgets = budgets
+
+    def reserve(self, kind, endpoint, max_wait=None):
+        """See TokenBucket.reserve(). Returns 0 for requests without a budget."""
+        with self._lock:
+            budget = self.budgets.get(kind)
+            if budget is None: return 0.0
+            bucket = self._buckets.get((kind, endpoint))
+            if bucket is None: bucket = self._buckets[(kind, endpoint)] = TokenBucket(*budget)
+        return bucket.reserve(max_wait)
+
+# --- Lookup sharing ---
+class SingleFlight:
+    """Lets concurrent callers of the same operation share one call instead of each making their own.
+    The first caller (the leader) runs it; the others wait for its result. Results are
+    concurrent.futures.Future objects, so threads and event loops (asyncio.wrap_future) can both wait."""
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key):
+        """Returns (future, leader). A leader must call finish() with the outcome."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None: return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def finish(self, key, result=None, error=None):
+        with self._lock: future = self._calls.pop(key)
+        if error is not None: future.set_exception(error)
+        else: future.set_result(result)
+
+    def do(self, key, function):
+        """Runs `function()` unless a call with the same key is already in flight, and returns its result."""
+        future, leader = self.begin(key)
+        if not leader: return future.result()
+        try: result = function()
+        except BaseException as e: self.finish(key, error=e); raise
+        self.finish(key, result)
+        return result
+
+class TtlCache:
+    """Values that expire `ttl` seconds after they were stored. A ttl of 0 stores nothing."""
+    def __init__(self, ttl=0, clock=time.monotonic):
+        self.ttl, self.clock, self._entries = ttl, clock, {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock: value, expires = self._entries.get(key, (None, 0))
+        return value if self.clock() < expires else None
+
+    def put(self, key, value):
+        if self.ttl > 0 and value is not None:
+            with self._lock: self._entries[key] = (value, self.clock() + self.ttl)
+
+    def clear(self):
+        with self._lock: self._entries.clear()
@@ -0,0 +1,48 @@
+import logging
+import threading
+import time
+
+# --- Reachability ---
+class Reachability:
+    """Remembers whether the internet was reachable, so that a connection probe is only needed when
+    nothing recent is known. Real requests report their outcome through record(); a success is
+    proof for `ttl` seconds, a failed probe is believed for `offline_ttl` seconds. A single failed
+    request proves nothing (one provider may be down), but FAILURE_THRESHOLD failures in a row
+    with no success in between drop the cached "reachable" so that the next check probes.
+    Listeners are called when a request or probe succeeds after a failed probe, e.g. to replay
+    queued updates as soon as the connection is back."""
+    FAILURE_THRESHOLD = 3
+
+    def __init__(self, ttl=60, offline_ttl=10):
+        self.ttl, self.offline_ttl = ttl, offline_ttl
+        self._reachable, self._checked, self._failures = None, None, 0
+        self._down = False
+        self.listeners = []
+        self._lock = threading.Lock()
+
+    def cached(self):
+        """True or False while the last result is fresh, None when a probe is needed."""
+        with self._lock:
+            if self._checked is None: return None
+            ttl = self.ttl if self._reachable else self.offline_ttl
+            return self._reachable if time.monotonic() - self._checked < ttl else None
+
+    def record(self, ok):
+        """Reports the outcome of a real request."""
+        with self._lock:
+            if not ok:
+                self._failures += 1
+                if self._failures >= self.FAILURE_THRESHOLD and self._reachable: self._checked = None
+                return
+        self.probed(True)
+
+    def probed(self, ok):
+        """Reports the outcome of a connection probe."""
+        with self._lock:
+            restored, self._down = ok and self._down, not ok
+            self._reachable, self._checked, self._failures = ok, time.monotonic(), 0
+        if restored:
+            logging.info("Internet connection restored.")
+            for listener in list(self.listeners):
+                try: listener()
+                except Exception as e: logging.error(f"Reachability listener failed : {e}", exc_info=True)
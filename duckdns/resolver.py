@@ -0,0 +1,80 @@
+import ipaddress
+import random
+import socket
+import struct
+
+from .transport import TransportError, bound_socket
+
+# --- Minimal DNS-over-UDP client (one question, one datagram) ---
+TYPE_A, TYPE_TXT, TYPE_AAAA = 1, 16, 28
+TYPE_NAMES = {"A": TYPE_A, "TXT": TYPE_TXT, "AAAA": TYPE_AAAA}
+
+class DnsError(TransportError):
+    """Raised when a DNS query times out or gets an unusable answer."""
+
+class DnsTimeout(DnsError):
+    """Raised when a DNS server doesn't answer in time."""
+
+def build_query(qname, qtype, query_id, recursion=True):
+    """Encodes a standard query for `qname`/`qtype` in DNS wire format."""
+    header = struct.pack("!HHHHHH", query_id, 0x0100 if recursion else 0, 1, 0, 0, 0)
+    labels = [label.encode("ascii") for label in qname.strip(".").split(".") if label]
+    if any(len(label) > 63 for label in labels): raise DnsError(f"Invalid DNS name : {qname}")
+    question = b"".join(bytes([len(label)]) + label for label in labels) + b"\x00"
+    return header + question + struct.pack("!HH", qtype, 1)
+
+def _skip_name(message, offset):
+    """Returns the offset just past the (possibly compressed) name starting at `offset`."""
+    while True:
+        if offset >= len(message): raise DnsError("Malformed DNS response (name runs past the end)")
+        length = message[offset]
+        if length & 0xC0 == 0xC0: return offset + 2  # compression pointer ends the name
+        if length == 0: return offset + 1
+        offset += 1 + length
+
+def parse_response(message, query_id):
+    """Returns the answers of a response as a list of (type, value) with A/AAAA as IP strings and
+    TXT as the joined text. Other record types (e.g. the CNAMEs of a chain) are left out."""
+    if len(message) < 12: raise DnsError("Malformed DNS response (too short)")
+    response_id, flags, qdcount, ancount, _, _ = struct.unpack_from("!HHHHHH", message, 0)
+    if response_id != query_id or not flags & 0x8000: raise DnsError("Unexpected DNS response")
+    if flags & 0x0200: raise DnsError("DNS response was truncated")
+    if flags & 0x000F: raise DnsError(f"DNS server returned error code {flags & 0x000F}")
+    offset = 12
+    for _ in range(qdcount): offset = _skip_name(message, offset) + 4
+    answers = []
+    try:
+        for _ in range(ancount):
+            offset = _skip_name(message, offset)
+            rtype, _, _, rdlength = struct.unpack_from("!HHIH", message, offset)
+            offset += 10
+            rdata = message[offset:offset + rdlength]
+            if len(rdata) < rdlength: raise DnsError("Malformed DNS response (record runs past the end)")
+            offset += rdlength
+            if rtype in (TYPE_A, TYPE_AAAA) and len(rdata) in (4, 16): answers.append((rtype, str(ipaddress.ip_address(rdata))))
+            elif rtype == TYPE_TXT:
+                strings, position = [], 0
+                while position < len(rdata):
+                    length = rdata[position]; strings.append(rdata[position + 1:position + 1 + length].decode("ascii", "replace")); position += 1 + length
+                answers.append((rtype, "".join(strings)))
+    except struct.error as e: raise DnsError(f"Malformed DNS response : {e}") from e
+    return answers
+
+def query(server, qname, qtype=TYPE_A, timeout=2, port=53, recursion=True, source_address=None, interface=None):
+    """Sends one UDP query to `server` and returns its parsed answers. Raises DnsError on failure.
+    `source_address` / `interface` make the query leave through a given uplink."""
+    query_id = random.randrange(0, 0x10000)
+    packet = build_query(qname, qtype, query_id, recursion)
+    try:
+        family, _, _, _, address = socket.getaddrinfo(server, port, type=socket.SOCK_DGRAM)[0]
+        with bound_socket(family, socket.SOCK_DGRAM, source_address, interface) as sock:
+            sock.settimeout(timeout)
+            # A connected UDP socket only accepts datagrams from the server we asked
+            sock.connect(address)
+            sock.send(packet)
+            while True:
+                message = sock.recv(4096)
+                if len(message) >= 2 and struct.unpack_from("!H", message)[0] == query_id: break
+    except socket.timeout as e: raise DnsTimeout(f"DNS query to {server} timed out") from e
+    except OSError as e: raise DnsError(f"DNS query to {server} failed : {e}") from e
+    return parse_response(message, query_id)
@@ -0,0 +1,26 @@
+import random
+
+# --- Update scheduling ---
+class Schedule:
+    """Computes how long UpdateWorker sleeps before its next cycle.
+    Successful cycles repeat every `interval` seconds, spread by +/- `jitter` (a fraction of the
+    interval) so that many instances on one host or network don't fire in lockstep. Failed cycles
+    are retried sooner, RETRY_MIN seconds at first and doubling with every consecutive failure,
+    up to the larger of the interval and RETRY_MAX."""
+    RETRY_MIN = 15
+    RETRY_MAX = 600
+
+    def __init__(self, interval, jitter=0.1):
+        self.interval = max(float(interval), 1.0)
+        self.jitter = min(max(float(jitter), 0.0), 0.5)
+        self.failures = 0
+
+    def next_delay(self, succeeded):
+        if succeeded:
+            self.failures = 0
+            delay = self.interval
+        else:
+            self.failures += 1
+            delay = min(self.RETRY_MIN * (2 ** (self.failures - 1)), max(self.interval, self.RETRY_MAX))
+        spread = delay * self.jitter
+        return max(delay + random.uniform(-spread, spread), 1.0)
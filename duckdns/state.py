@@ -0,0 +1,49 @@
+import logging
+import threading
+import time
+
+from .storage import read_json, write_json
+
+# --- Persistent update state ---
+class UpdateState:
+    """Last IPs DuckDNS confirmed for each domain, with when and what it answered. Saved to a small
+    JSON file so that a restart doesn't push an update for records that are already correct."""
+    def __init__(self, filename=None):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._domains = {}
+        self._dirty = False
+        if filename: self.load()
+
+    def load(self):
+        data = read_json(self.filename, default={})
+        domains = data.get("domains") if isinstance(data, dict) else None
+        if isinstance(domains, dict):
+            with self._lock: self._domains = {domain: entry for domain, entry in domains.items() if isinstance(entry, dict)}
+            logging.info(f"Loaded last known IPs for {len(self._domains)} domain(s).")
+
+    def confirmed(self):
+        """Returns {domain: (ipv4, ipv6)} as last confirmed by DuckDNS."""
+        with self._lock: return {domain: (entry.get("ip"), entry.get("ipv6")) for domain, entry in self._domains.items()}
+
+    def snapshot(self):
+        """Returns a copy of every entry as {domain: {"ip", "ipv6", "response", "time"}}."""
+        with self._lock: return {domain: dict(entry) for domain, entry in self._domains.items()}
+
+    def get(self, domain):
+        with self._lock: return dict(self._domains.get(domain) or {})
+
+    def record(self, domain, ip, ipv6, response):
+        with self._lock:
+            self._domains[domain] = {"ip": ip, "ipv6": ipv6, "response": response, "time": time.time()}
+            self._dirty = True
+
+    def save(self):
+        """Writes the state file atomically if anything changed since the last save."""
+        if not self.filename: return
+        with self._lock:
+            if not self._dirty: return
+            data = {"domains": {domain: dict(entry) for domain, entry in self._domains.items()}}
+            self._dirty = False
+        try: write_json(self.filename, data)
+        except OSError as e: logging.warning(f"Could not save update state : {e}")
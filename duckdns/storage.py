@@ -0,0 +1,33 @@
+import json
+import logging
+import os
+import tempfile
+
+# --- Small on-disk helpers shared by the state files in the app data folder ---
+def atomic_write_text(filename, text):
+    """Writes `text` to a temp file in the same folder and renames it over `filename`,
+    so a crash mid-write leaves either the old or the new file, never a truncated one."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filename)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as temp_file:
+            temp_file.write(text)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, filename)
+    except BaseException:
+        try: os.remove(temp_path)
+        except OSError: pass
+        raise
+
+def read_json(filename, default=None):
+    """Returns the parsed JSON file, or `default` if it is missing or unreadable."""
+    try:
+        with open(filename, "r", encoding="utf-8") as json_file: return json.load(json_file)
+    except FileNotFoundError: return default
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable file {filename} : {e}")
+        return default
+
+def write_json(filename, data):
+    atomic_write_text(filename, json.dumps(data, indent=1, sort_keys=True))
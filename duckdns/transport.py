@@ -0,0 +1,163 @@
+import logging
+import socket
+import threading
+
+from .constants import APP_NAME, APP_VERSION
+
+class TransportError(Exception):
+    """Raised for any network or HTTP status failure, whichever HTTP library is in use."""
+
+# --- Outbound binding ---
+# For hosts with several uplinks : a socket bound to a source address or pinned to an interface
+# leaves through that uplink, whatever the default route says.
+def interface_socket_options(interface):
+    """setsockopt() arguments that pin a socket to a network interface. Linux only; elsewhere the
+    interface is ignored with an error in the log (bind to the interface's address instead)."""
+    if not interface: return []
+    if not hasattr(socket, "SO_BINDTODEVICE"):
+        logging.error(f"Binding to interface {interface} is only supported on Linux, use source_address instead.")
+        return []
+    return [(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, interface.encode())]
+
+def bound_socket(family, kind, source_address=None, interface=None):
+    """A new socket that sends from `source_address` and/or through `interface`. Raises OSError."""
+    sock = socket.socket(family, kind)
+    try:
+        for option in interface_socket_options(interface): sock.setsockopt(*option)
+        if source_address: sock.bind((source_address, 0))
+    except OSError: sock.close(); raise
+    return sock
+
+# --- Connection counters ---
+class ConnectionStats:
+    """Thread-safe counters of requests answered and TCP/TLS connections opened.
+    Every answered request that did not open a connection ran on a reused keep-alive one."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests, self.opened = 0, 0
+
+    def request_answered(self):
+        with self._lock: self.requests += 1
+
+    def connection_opened(self):
+        with self._lock: self.opened += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {"requests": self.requests, "opened": self.opened, "reused": max(self.requests - self.opened, 0)}
+
+def _counting_pool_classes(stats):
+    """urllib3 pool classes whose connections report every (re)connect to `stats`."""
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    def counting(connection_cls):
+        def connect(self):
+            connection_cls.connect(self); stats.connection_opened()
+        # Keep the urllib3 class names so that error messages in the log look the same as before
+        return type(connection_cls.__name__, (connection_cls,), {"connect": connect})
+
+    return {"http": type("HTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": counting(HTTPConnection)}),
+            "https": type("HTTPSConnectionPool", (HTTPSConnectionPool,), {"ConnectionCls": counting(HTTPSConnection)})}
+
+def _counting_adapter(stats, connection_options=None, **kwargs):
+    """A requests HTTPAdapter whose pools count opened connections, and whose connections get
+    `connection_options` (urllib3 source_address / socket_options). Built on demand so that
+    importing this module doesn't import requests."""
+    from requests.adapters import HTTPAdapter
+
+    class _CountingAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **dict(connection_options or {}, **kwargs))
+            self.poolmanager.pool_classes_by_scheme = _counting_pool_classes(stats)
+
+    return _CountingAdapter(**kwargs)
+
+# --- Pooled HTTP transport ---
+class HttpTransport:
+    """A long-lived, keep-alive HTTP client shared by every request a DuckDNSClient makes.
+    Uses httpx with HTTP/2 when `http2` is set and httpx[http2] is installed, requests otherwise.
+    The session (and the HTTP library) is only loaded by the first request, off the startup path.
+    Requests can be bound to a `source_address` or an `interface`, or sent through a `proxy`
+    (http://, or socks5:// with requests[socks] / httpx[socks] installed)."""
+    # Number of distinct hosts kept in the pool: every IP provider plus DuckDNS itself.
+    HOST_POOLS = 16
+
+    def __init__(self, pool_size=4, http2=False, source_address=None, interface=None, proxy=None):
+        self.pool_size = max(int(pool_size), 1)
+        self.source_address, self.interface, self.proxy = source_address, interface, proxy
+        self.stats = ConnectionStats()
+        self.http2, self._want_http2 = False, http2
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def _get_session(self):
+        with self._session_lock:
+            if self._session is None:
+                if self._want_http2: self._session = self._create_httpx_session()
+                if self._session is None: self._session = self._create_requests_session()
+            return self._session
+
+    def _create_httpx_session(self):
+        try:
+            import httpx
+            import h2  # noqa: F401  httpx only negotiates HTTP/2 when the h2 package is present
+        except ImportError:
+            logging.warning("HTTP/2 requested but httpx[http2] is not installed, falling back to HTTP/1.1 keep-alive.")
+            return None
+        limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+        transport = httpx.HTTPTransport(http2=True, limits=limits, proxy=self.proxy, local_address=self.source_address,
+                                        socket_options=interface_socket_options(self.interface) or None)
+        self.http2 = True
+        return httpx.Client(transport=transport, headers={"User-Agent": f"{APP_NAME}/{APP_VERSION}"})
+
+    def _create_requests_session(self):
+        import requests
+        session = requests.Session()
+        session.headers["User-Agent"] = f"{APP_NAME}/{APP_VERSION}"
+        connection_options = {}
+        if self.source_address: connection_options["source_address"] = (self.source_address, 0)
+        if self.interface:
+            from urllib3.connection import HTTPConnection
+            connection_options["socket_options"] = HTTPConnection.default_socket_options + interface_socket_options(self.interface)
+        if self.proxy:
+            if self.proxy.lower().startswith("socks"):
+                try: import socks  # noqa: F401
+                except ImportError: logging.error('SOCKS proxies need PySocks : pip install "requests[socks]"')
+            session.proxies = {"http": self.proxy, "https": self.proxy}
+        adapter = _counting_adapter(self.stats, connection_options, pool_connections=self.HOST_POOLS, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _trace(self, event_name, info):
+        # httpcore trace hook, the httpx equivalent of the counting urllib3 connection class
+        if event_name == "connection.connect_tcp.complete": self.stats.connection_opened()
+
+    def get(self, url, params=None, timeout=10):
+        """GETs `url` and returns the response body as text. Raises TransportError on failure."""
+        session = self._get_session()
+        if self.http2:
+            import httpx
+            try:
+                response = session.get(url, params=params, timeout=timeout, extensions={"trace": self._trace})
+                self.stats.request_answered()
+                response.raise_for_status()
+                return response.text
+            except httpx.HTTPError as e: raise TransportError(str(e)) from e
+        import requests
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+            self.stats.request_answered()
+            response.raise_for_status()
+            return response.text
+        except requests.RequestException as e: raise TransportError(str(e)) from e
+
+    def connection_stats(self):
+        stats = self.stats.snapshot()
+        stats["http2"] = self.http2
+        return stats
+
+    def close(self):
+        with self._session_lock:
+            if self._session is not None: self._session.close(); self._session = None
@@ -0,0 +1,108 @@
+import logging
+import re
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+
+from . import resolver
+from .protocol import normalize_ip
+
+# --- Published record verification ---
+def parse_servers(value):
+    """Parses a resolver list such as "1.1.1.1, 127.0.0.1:5353, [::1]:53" into (host, port) pairs."""
+    servers = []
+    for entry in re.split(r"[,\s]+", value or ""):
+        if not entry: continue
+        match = re.match(r"^\[([0-9a-fA-F:.]+)\](?::(\d+))?$", entry) or re.match(r"^([^:]+)(?::(\d+))?$", entry)
+        if match: servers.append((match.group(1), int(match.group(2) or 53)))
+        else: servers.append((entry, 53))  # a bare IPv6 address
+    return servers
+
+def create_verifier(setting, timeout=2, budget=5, executor=None):
+    """RecordVerifier for a dns_resolver setting: "authoritative", "system" or a resolver list."""
+    setting = (setting or "authoritative").strip()
+    if setting.lower() == "authoritative": return RecordVerifier(timeout=timeout, budget=budget, executor=executor)
+    if setting.lower() == "system": return RecordVerifier(system=True, timeout=timeout, budget=budget, executor=executor)
+    return RecordVerifier(parse_servers(setting), timeout=timeout, budget=budget, executor=executor)
+
+class RecordVerifier:
+    """Looks up what <domain>.duckdns.org currently resolves to, so the worker can skip updates that
+    are already published and fix records that were changed elsewhere (drift).
+    By default it asks DuckDNS's authoritative nameservers directly (no recursion, so no cache can
+    hide a change). `servers` may instead list recursive resolvers as (host, port) pairs, e.g. a
+    local stand-in in tests, and `system=True` uses the operating system's resolver.
+    check() looks many domains up at once and gives up after `budget` seconds, so that a blocked
+    UDP port 53 delays an update by seconds, not by a few seconds per domain.
+    The lookups run on `executor` when one is passed (the fleet shares one between its profiles),
+    otherwise on a pool of the verifier's own, started on first use and stopped by close()."""
+    AUTHORITATIVE = [("ns1.duckdns.org", 53), ("ns2.duckdns.org", 53), ("ns3.duckdns.org", 53)]
+    ZONE = "duckdns.org"
+    WORKERS = 8
+
+    def __init__(self, servers=None, system=False, timeout=2, budget=5, executor=None):
+        self.system, self.timeout, self.budget = system, timeout, budget
+        self.servers = servers or self.AUTHORITATIVE
+        self.recursion = bool(servers)
+        self._executor, self._owns_executor = executor, executor is None
+        self._silent = set()  # servers that timed out during the current check()
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Stops the verifier's own pool, dropping lookups not started yet. A shared executor is left to its owner."""
+        with self._lock:
+            executor, self._executor = (self._executor, None) if self._owns_executor else (None, self._executor)
+        if executor is not None: executor.shutdown(wait=False, cancel_futures=True)
+
+    def check(self, domains, ipv4, ipv6):
+        """Runs matches() for all `domains` concurrently. Returns {domain: True, False or None}; a domain
+        not checked within `budget` seconds is None. A server that times out is skipped for the rest of the call."""
+        results = dict.fromkeys(domains)
+        if not domains: return results
+        with self._lock:
+            if self._executor is None: self._executor = ThreadPoolExecutor(max_workers=self.WORKERS, thread_name_prefix="verify")
+            self._silent = set()
+        futures = {self._executor.submit(self.matches, domain, ipv4, ipv6): domain for domain in domains}
+        try:
+            for future in as_completed(futures, timeout=self.budget):
+                try: results[futures[future]] = future.result()
+                except Exception as e: logging.warning(f"Could not verify {futures[future]}.{self.ZONE} : {e}")
+        except TimeoutError:
+            logging.warning(f"DNS verification took over {self.budget}s, {sum(result is None for result in results.values())} domain(s) left unverified.")
+        finally:
+            # Lookups not started yet are dropped; running ones end within their timeout
+            for future in futures: future.cancel()
+        return results
+
+    def published(self, domain, versions=(4, 6)):
+        """Returns {version: ip or None} for the records of `domain`, or None if no server answered."""
+        name = f"{domain}.{self.ZONE}"
+        if self.system: return self._published_system(name, versions)
+        published = {}
+        for version in versions:
+            qtype = resolver.TYPE_AAAA if version == 6 else resolver.TYPE_A
+            for host, port in self.servers:
+                if (host, port) in self._silent: continue
+                try: answers = resolver.query(host, name, qtype, timeout=self.timeout, port=port, recursion=self.recursion)
+                except resolver.DnsTimeout as e: logging.warning(f"Could not verify {name} with {host} : {e}"); self._silent.add((host, port)); continue
+                except resolver.DnsError as e: logging.warning(f"Could not verify {name} with {host} : {e}"); continue
+                published[version] = next((value for rtype, value in answers if rtype == qtype), None)
+                break
+            else: return None
+        return published
+
+    def _published_system(self, name, versions):
+        published = dict.fromkeys(versions)
+        try:
+            for family, _, _, _, address in socket.getaddrinfo(name, None, proto=socket.IPPROTO_TCP):
+                version = 6 if family == socket.AF_INET6 else 4
+                if version in published and published[version] is None: published[version] = address[0]
+        except OSError as e: logging.warning(f"Could not resolve {name} : {e}"); return None
+        return published
+
+    def matches(self, domain, ipv4, ipv6):
+        """True if every given address is what DNS publishes for `domain`, False if any differs,
+        None if it could not be checked."""
+        expected = {version: ip for version, ip in ((4, ipv4), (6, ipv6)) if ip}
+        published = self.published(domain, tuple(expected))
+        if published is None: return None
+        return all(normalize_ip(published.get(version)) == normalize_ip(ip) for version, ip in expected.items())
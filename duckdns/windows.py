@@ -0,0 +1,670 @@
+"""The settings, port checker, help and message windows with their ttk styles. Imported by
+duckdns.gui the first time a window opens, so none of this is loaded while only the tray runs."""
+import tkinter as tk
+from tkinter import ttk
+import threading
+import os
+import logging
+import re
+
+from .config import parse_domains
+from .constants import APP_NAME, LOGO_FILE
+from .ports import parse_hosts, parse_ports, scan_async
+# --- Windows-specific icon setup ---
+try:
+    import ctypes
+    from win32con import WM_SETICON, ICON_SMALL, ICON_BIG, IMAGE_ICON, LR_LOADFROMFILE
+    import win32gui
+    IS_WINDOWS = True
+except ImportError:
+    IS_WINDOWS = False
+
+def set_window_icon_win32(window):
+    """Sets the window icon robustly on Windows."""
+    if not IS_WINDOWS:
+        return
+    try:
+        if not window.winfo_exists():
+            return
+        hwnd = window.winfo_id()
+        if os.path.exists(LOGO_FILE):
+            h_icon = win32gui.LoadImage(0, LOGO_FILE, IMAGE_ICON, 0, 0, LR_LOADFROMFILE)
+            ctypes.windll.user32.SendMessageW(hwnd, WM_SETICON, ICON_SMALL, h_icon)
+            ctypes.windll.user32.SendMessageW(hwnd, WM_SETICON, ICON_BIG, h_icon)
+    except Exception as e:
+        logging.error(f"Failed to set Windows-specific icon : {e}")
+
+# --- Modern Dark Theme Colors ---
+THEME = {
+    "bg_primary": "#0F0F0F",
+    "bg_secondary": "#1A1A1A",
+    "bg_tertiary": "#252525",
+    "bg_hover": "#2D2D2D",
+
+    "accent_primary": "#0EA5E9",
+    "accent_hover": "#0284C7",
+    "accent_glow": "#38BDF8",
+
+    "success": "#10B981",
+    "warning": "#F59E0B",
+    "error": "#EF4444",
+
+    "text_primary": "#F5F5F5",
+    "text_secondary": "#A1A1AA",
+    "text_tertiary": "#71717A",
+
+    "border": "#2D2D2D",
+    "border_focus": "#0EA5E9",
+    "border_error": "#EF4444",
+
+    "shadow": "#00000040",
+}
+
+def setup_styles(root):
+    """Sets up modern ttk styles."""
+    style = ttk.Style(root)
+    style.theme_use('clam')
+
+    root.option_add('*TCombobox*Listbox.background', THEME["bg_tertiary"])
+    root.option_add('*TCombobox*Listbox.foreground', THEME["text_primary"])
+    root.option_add('*TCombobox*Listbox.selectBackground', THEME["accent_primary"])
+    root.option_add('*TCombobox*Listbox.selectForeground', THEME["text_primary"])
+    root.option_add('*TCombobox*Listbox.font', ("Segoe UI", 10))
+    root.option_add('*TCombobox*Listbox.relief', 'flat')
+    root.option_add('*TCombobox*Listbox.borderwidth', 0)
+
+    style.configure('.',
+                    background=THEME["bg_secondary"],
+                    foreground=THEME["text_primary"],
+                    fieldbackground=THEME["bg_tertiary"],
+                    borderwidth=0,
+                    relief="flat")
+
+    style.configure('TFrame', background=THEME["bg_primary"])
+    style.configure('TLabel',
+                    background=THEME["bg_secondary"],
+                    foreground=THEME["text_primary"],
+                    font=("Segoe UI", 10))
+
+    style.configure('Modern.TEntry',
+                    foreground=THEME["text_primary"],
+                    fieldbackground=THEME["bg_tertiary"],
+                    insertcolor=THEME["accent_primary"],
+                    borderwidth=2,
+                    relief="flat",
+                    bordercolor=THEME["border"],
+                    lightcolor=THEME["border"],
+                    darkcolor=THEME["border"],
+                    padding=(14, 12))
+
+    style.map('Modern.TEntry',
+              fieldbackground=[('focus', THEME["bg_hover"])],
+              bordercolor=[('focus', THEME["accent_primary"])],
+              lightcolor=[('focus', THEME["accent_primary"])],
+              darkcolor=[('focus', THEME["accent_primary"])])
+
+    style.configure('Modern.TCombobox',
+                    fieldbackground=THEME["bg_tertiary"],
+                    background=THEME["bg_tertiary"],
+                    foreground=THEME["text_primary"],
+                    arrowcolor=THEME["text_secondary"],
+                    selectbackground=THEME["bg_tertiary"],
+                    selectforeground=THEME["text_primary"],
+                    borderwidth=2,
+                    relief="flat",
+                    bordercolor=THEME["border"],
+                    lightcolor=THEME["border"],
+                    darkcolor=THEME["border"],
+                    padding=(14, 12))
+
+    style.map('Modern.TCombobox',
+              fieldbackground=[('readonly', THEME["bg_tertiary"]), ('focus', THEME["bg_hover"])],
+              selectbackground=[('readonly', THEME["bg_tertiary"])],
+              bordercolor=[('focus', THEME["accent_primary"])],
+              lightcolor=[('focus', THEME["accent_primary"])],
+              darkcolor=[('focus', THEME["accent_primary"])],
+              arrowcolor=[('hover', THEME["text_primary"])])
+
+    style.configure('Toggle.TButton',
+                    background=THEME["bg_hover"],
+                    foreground=THEME["text_secondary"],
+                    font=("Segoe UI", 9),
+                    borderwidth=0,
+                    relief="flat",
+                    padding=(12, 8))
+
+    style.map('Toggle.TButton',
+              background=[('active', THEME["bg_tertiary"])],
+              foreground=[('active', THEME["accent_primary"])])
+
+# --- UI Helper function to draw rounded rectangles on a canvas ---
+def create_rounded_rect(canvas, x1, y1, x2, y2, r, **kwargs):
+    """Helper to draw a rounded rectangle on a given canvas."""
+    return canvas.create_polygon(
+        (x1 + r, y1, x1 + r, y1, x2 - r, y1, x2 - r, y1,
+         x2, y1, x2, y1 + r, x2, y1 + r, x2, y2 - r,
+         x2, y2, x2 - r, y2, x2 - r, y2, x1 + r, y2,
+         x1, y2, x1, y2 - r, x1, y2 - r, x1, y1 + r,
+         x1, y1, x1 + r, y1),
+        smooth=True, **kwargs
+    )
+
+# --- Custom Rounded Button Class ---
+class RoundedButton(tk.Canvas):
+    """A custom rounded button created with Canvas, supporting hover effects."""
+    def __init__(self, parent, width, height, radius, text, command,
+                 bg_color, fg_color, hover_color, text_font=("Segoe UI", 10, "bold")):
+        super().__init__(parent, width=width, height=height, bg=parent.cget("bg"),
+                         highlightthickness=0, borderwidth=0)
+        
+        self.command = command
+        self.bg_color = bg_color
+        self.hover_color = hover_color
+
+        self.button_shape = create_rounded_rect(self, 0, 0, width, height, radius, fill=bg_color)
+        self.button_text = self.create_text(width / 2, height / 2, text=text, fill=fg_color, font=text_font)
+
+        self.bind("<Enter>", self._on_enter)
+        self.bind("<Leave>", self._on_leave)
+        self.bind("<Button-1>", self._on_click)
+
+    def _on_enter(self, event):
+        self.itemconfig(self.button_shape, fill=self.hover_color)
+
+    def _on_leave(self, event):
+        self.itemconfig(self.button_shape, fill=self.bg_color)
+
+    def _on_click(self, event):
+        if self.command:
+            self.command()
+
+# --- Modern Message Box ---
+class ModernMessageBox(tk.Toplevel):
+    def __init__(self, master, title, message, msg_type="info"):
+        super().__init__(master)
+        self.title(title)
+        self.msg_type = msg_type
+
+        self.resizable(False, False)
+        self.configure(bg=THEME["bg_primary"])
+        self.attributes("-topmost", True)
+        self.overrideredirect(False)
+        self.after(100, self._apply_icon_delayed)
+
+        icon_colors = {
+            "info": THEME["accent_primary"], "success": THEME["success"],
+            "warning": THEME["warning"], "error": THEME["error"]
+        }
+        self.icon_color = icon_colors.get(msg_type, THEME["accent_primary"])
+        self._create_ui(message)
+
+        self.update_idletasks()
+        fixed_width = 460
+        required_height = self.winfo_reqheight()
+        x = (self.winfo_screenwidth() // 2) - (fixed_width // 2)
+        y = (self.winfo_screenheight() // 2) - (required_height // 2)
+        self.geometry(f"{fixed_width}x{required_height}+{x}+{y}")
+
+        self.attributes('-alpha', 0.0)
+        self._fade_in()
+        self.focus()
+
+    def _create_ui(self, message):
+        main_frame = tk.Frame(self, bg=THEME["bg_primary"])
+        main_frame.pack(fill="both", expand=True, padx=30, pady=30)
+
+        icon_frame = tk.Canvas(main_frame, width=60, height=60, bg=THEME["bg_primary"], highlightthickness=0)
+        icon_frame.pack(pady=(0, 20))
+        icon_frame.create_oval(5, 5, 55, 55, fill=self.icon_color, outline="")
+
+        icon_symbols = {"info": "i", "success": "✓", "warning": "!", "error": "✕"}
+        icon_text = icon_symbols.get(self.msg_type, "i")
+        font_size = 28 if self.msg_type in ["info", "warning"] else 24
+        icon_font = ("Segoe UI", font_size, "bold")
+        icon_frame.create_text(30, 30, text=icon_text, fill=THEME["text_primary"], font=icon_font)
+
+        msg_label = tk.Label(main_frame, text=message, fg=THEME["text_primary"], bg=THEME["bg_primary"],
+                           font=("Segoe UI", 11), wraplength=380, justify="center")
+        msg_label.pack(pady=(0, 30))
+        
+        ok_btn = RoundedButton(parent=main_frame, width=150, height=45, radius=22, text="Got it",
+                          command=self._fade_out, bg_color=THEME["accent_primary"],
+                          fg_color=THEME["text_primary"], hover_color=THEME["accent_hover"])
+        ok_btn.pack()
+
+    def _fade_in(self, alpha=0.0):
+        alpha += 0.1
+        if alpha <= 1.0:
+            self.attributes('-alpha', alpha)
+            self.after(20, lambda: self._fade_in(alpha))
+
+    def _fade_out(self, alpha=1.0):
+        alpha -= 0.1
+        if alpha >= 0.0:
+            self.attributes('-alpha', alpha)
+            self.after(20, lambda: self._fade_out(alpha))
+        else:
+            self.destroy()
+
+    def _apply_icon_delayed(self):
+        try:
+            if self.winfo_exists() and os.path.exists(LOGO_FILE):
+                self.iconbitmap(LOGO_FILE)
+                set_window_icon_win32(self)
+        except Exception as e:
+            logging.warning(f"Could not set icon for ModernMessageBox : {e}")
+
+# --- Modern Settings Window ---
+class ModernSettingsWindow(tk.Toplevel):
+    def __init__(self, master, current_settings, save_callback):
+        super().__init__(master)
+        self.save_callback = save_callback
+
+        self.withdraw()
+        self.attributes('-alpha', 0.0)
+
+        self.title(f"{APP_NAME} Settings")
+        self.resizable(False, False) 
+        self.configure(bg=THEME["bg_primary"])
+        self.after(100, self._apply_icon_delayed)
+
+        # ERROR Set up the protocol handler for closing the window.
+        # This ensures our cleanup logic is called when the user clicks the 'X' button.
+        self.protocol("WM_DELETE_WINDOW", self._close_and_cleanup)
+
+        self.grid_rowconfigure(0, weight=1); self.grid_rowconfigure(1, weight=0); self.grid_columnconfigure(0, weight=1)
+
+        self._build_scroll_area()
+        self._build_header(self.content_frame)
+        self._create_credentials_card(self.content_frame, current_settings)
+        self._create_app_settings_card(self.content_frame, current_settings)
+        self._build_footer()
+
+        # ERROR Bind mouse wheel events after all UI elements are created.
+        # We bind to the whole application ('bind_all') so scrolling works seamlessly.
+        # The cleanup method ensures these bindings are removed when the window closes.
+        self.bind_all("<MouseWheel>", self._on_mousewheel)
+        self.bind_all("<Button-4>", self._on_mousewheel)
+        self.bind_all("<Button-5>", self._on_mousewheel)
+
+        self.update_idletasks()
+        width, height = 560, 660
+        screen_w = self.winfo_screenwidth()
+        screen_h = self.winfo_screenheight()
+        x = (screen_w // 2) - (width // 2)
+        y = (screen_h // 2) - (height // 2)
+        self.geometry(f"{width}x{height}+{x}+{y}")
+        self.minsize(width, height)
+        self.deiconify()
+        self._fade_in()
+        
+        self.focus()
+
+    # ERROR New method to handle mouse wheel scrolling safely.
+    def _on_mousewheel(self, event):
+        """
+        Handles mouse wheel events globally. Checks if the canvas widget
+        still exists before attempting to scroll it. This prevents a
+        _tkinter.TclError if a scroll event occurs after this window
+        has been closed. It handles events for Windows, macOS, and Linux.
+        """
+        if self.canvas.winfo_exists():
+            # For Windows and macOS, which use event.delta
+            if hasattr(event, 'delta') and event.delta != 0:
+                self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+            # For Linux, which uses event.num
+            elif hasattr(event, 'num'):
+                if event.num == 4: # Scroll Up
+                    self.canvas.yview_scroll(-1, "units")
+                elif event.num == 5: # Scroll Down
+                    self.canvas.yview_scroll(1, "units")
+
+    # ERROR New method to cleanly close the window and unbind global events.
+    def _close_and_cleanup(self):
+        """
+        Unbinds the global mouse wheel events before closing the window.
+        This is the critical fix to prevent the TclError that occurred
+        when the window was closed but the global binding remained.
+        """
+        self.unbind_all("<MouseWheel>")
+        self.unbind_all("<Button-4>")
+        self.unbind_all("<Button-5>")
+        self._fade_out() # This initiates the fade-out, which ends with self.destroy()
+
+    def _build_scroll_area(self):
+        outer = tk.Frame(self, bg=THEME["bg_primary"])
+        outer.grid(row=0, column=0, sticky="nsew")
+        self.canvas = tk.Canvas(outer, bg=THEME["bg_primary"], highlightthickness=0, bd=0)
+        vsb = ttk.Scrollbar(outer, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=vsb.set)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        vsb.pack(side="right", fill="y")
+        self.content_frame = tk.Frame(self.canvas, bg=THEME["bg_primary"])
+        self.canvas.create_window((0, 0), window=self.content_frame, anchor="nw")
+        self.content_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
+        self.canvas.bind("<Configure>", lambda e: self.canvas.itemconfig(self.canvas.find_all()[0], width=e.width))
+        # ERROR Removed the problematic bind_all calls from here.
+        # The bindings are now correctly managed in __init__ and _close_and_cleanup.
+
+    def _build_header(self, parent):
+        header_frame = tk.Frame(parent, bg=THEME["bg_primary"], height=80)
+        header_frame.pack(fill="x", padx=30, pady=(30, 20)); header_frame.pack_propagate(False)
+        tk.Label(header_frame, text="DuckDNS Connection Settings", fg=THEME["text_primary"], bg=THEME["bg_primary"], font=("Segoe UI", 24, "bold")).pack(anchor="w")
+        tk.Label(header_frame, text="Configure your DuckDNS connection", fg=THEME["text_secondary"], bg=THEME["bg_primary"], font=("Segoe UI", 10)).pack(anchor="w", pady=(5, 0))
+        tk.Frame(parent, bg=THEME["bg_secondary"]).pack(fill="x", padx=0)
+
+    def _build_footer(self):
+        footer = tk.Frame(self, bg=THEME["bg_primary"])
+        footer.grid(row=1, column=0, sticky="ew")
+        inner = tk.Frame(footer, bg=THEME["bg_primary"])
+        inner.pack(fill="x", padx=30, pady=20)
+        inner.grid_columnconfigure(0, weight=1); inner.grid_columnconfigure(1, weight=1)
+
+        # ERROR Point the Cancel button to the new cleanup method.
+        cancel_btn = RoundedButton(parent=inner, width=200, height=48, radius=24, text="Cancel", command=self._close_and_cleanup,
+                                 bg_color=THEME["bg_tertiary"], fg_color=THEME["text_secondary"], hover_color=THEME["bg_hover"])
+        cancel_btn.grid(row=0, column=0, sticky="ew", padx=(0, 5))
+        
+        save_btn = RoundedButton(parent=inner, width=200, height=48, radius=24, text="Save Changes", command=self.save_and_close,
+                               bg_color=THEME["accent_primary"], fg_color=THEME["text_primary"], hover_color=THEME["accent_hover"])
+        save_btn.grid(row=0, column=1, sticky="ew", padx=(5, 0))
+
+    def _create_rounded_card(self, parent, pady):
+        card_outer = tk.Frame(parent, bg=THEME["bg_primary"])
+        card_outer.pack(fill="x", padx=30, pady=pady)
+        
+        card_canvas = tk.Canvas(card_outer, bg=THEME["bg_primary"], highlightthickness=0)
+        card_canvas.place(x=0, y=0, relwidth=1, relheight=1)
+        
+        card_canvas.bind('<Configure>', 
+            lambda e: (
+                e.widget.delete("all"), 
+                create_rounded_rect(e.widget, 0, 0, e.width, e.height, 15, fill=THEME["bg_secondary"])
+            )
+        )
+        
+        content_frame = tk.Frame(card_outer, bg=THEME["bg_secondary"])
+        content_frame.pack(fill='both', expand=True, padx=1, pady=1)
+        
+        return content_frame
+
+    def _create_credentials_card(self, parent, settings):
+        card = self._create_rounded_card(parent, pady=(20, 20))
+
+        header = tk.Frame(card, bg=THEME["bg_secondary"])
+        header.pack(fill="x", padx=25, pady=(25, 20))
+        tk.Label(header, text="🔐 DuckDNS Credentials", fg=THEME["text_primary"], bg=THEME["bg_secondary"], font=("Segoe UI", 14, "bold")).pack(anchor="w")
+        tk.Label(header, text="Enter your DuckDNS account information", fg=THEME["text_secondary"], bg=THEME["bg_secondary"], font=("Segoe UI", 9)).pack(anchor="w", pady=(5, 0))
+
+        domain_frame = tk.Frame(card, bg=THEME["bg_secondary"])
+        domain_frame.pack(fill="x", padx=25, pady=(0, 20))
+        tk.Label(domain_frame, text="Domain", fg=THEME["text_primary"], bg=THEME["bg_secondary"], font=("Segoe UI", 10, "bold")).pack(anchor="w", pady=(0, 8))
+        self.domain_entry = ttk.Entry(domain_frame, style='Modern.TEntry')
+        self.domain_entry.pack(fill="x"); self.domain_entry.insert(0, settings.get("domain", ""))
+        tk.Label(domain_frame, text="Subdomain only (e.g., my-home-server). Separate several with commas", fg=THEME["text_tertiary"], bg=THEME["bg_secondary"], font=("Segoe UI", 9, "italic")).pack(anchor="w", pady=(8, 0))
+
+        token_frame = tk.Frame(card, bg=THEME["bg_secondary"])
+        token_frame.pack(fill="x", padx=25, pady=(0, 25))
+        tk.Label(token_frame, text="Token", fg=THEME["text_primary"], bg=THEME["bg_secondary"], font=("Segoe UI", 10, "bold")).pack(anchor="w", pady=(0, 8))
+        token_input_frame = tk.Frame(token_frame, bg=THEME["bg_secondary"])
+        token_input_frame.pack(fill="x")
+
+        token_input_frame.grid_columnconfigure(0, weight=1)
+        token_input_frame.grid_columnconfigure(1, weight=0)
+
+        self.token_entry = ttk.Entry(token_input_frame, show="•", style='Modern.TEntry')
+        self.token_entry.grid(row=0, column=0, sticky="ewns")
+        self.token_entry.insert(0, settings.get("token", ""))
+
+        self.show_token_btn = ttk.Button(token_input_frame, text="Show", command=self.toggle_token_visibility, style='Toggle.TButton')
+        self.show_token_btn.grid(row=0, column=1, sticky="ns", padx=(10, 0))
+
+        tk.Label(token_frame, text="Find this on your DuckDNS account page", fg=THEME["text_tertiary"], bg=THEME["bg_secondary"], font=("Segoe UI", 9, "italic")).pack(anchor="w", pady=(8, 0))
+
+    def _create_app_settings_card(self, parent, settings):
+        card = self._create_rounded_card(parent, pady=(0, 10))
+
+        header = tk.Frame(card, bg=THEME["bg_secondary"])
+        header.pack(fill="x", padx=25, pady=(25, 20))
+        tk.Label(header, text="⚙️ Application Settings", fg=THEME["text_primary"], bg=THEME["bg_secondary"], font=("Segoe UI", 14, "bold")).pack(anchor="w")
+        tk.Label(header, text="Customize how the app behaves", fg=THEME["text_secondary"], bg=THEME["bg_secondary"], font=("Segoe UI", 9)).pack(anchor="w", pady=(5, 0))
+
+        interval_frame = tk.Frame(card, bg=THEME["bg_secondary"])
+        interval_frame.pack(fill="x", padx=25, pady=(0, 20))
+        tk.Label(interval_frame, text="Update Interval", fg=THEME["text_primary"], bg=THEME["bg_secondary"], font=("Segoe UI", 10, "bold")).pack(anchor="w", pady=(0, 8))
+        self.interval_combo = ttk.Combobox(interval_frame, values=["5", "10", "15", "30", "60"], state="readonly", style='Modern.TCombobox')
+        self.interval_combo.set(settings.get("interval", "5")); self.interval_combo.pack(fill="x")
+        
+        self.interval_combo.bind("<MouseWheel>", lambda e: "break")
+        self.interval_combo.bind("<Button-4>", lambda e: "break")
+        self.interval_combo.bind("<Button-5>", lambda e: "break")
+        
+        tk.Label(interval_frame, text="How often to check for IP changes (in minutes)", fg=THEME["text_tertiary"], bg=THEME["bg_secondary"], font=("Segoe UI", 9, "italic")).pack(anchor="w", pady=(8, 0))
+
+        notify_frame = tk.Frame(card, bg=THEME["bg_secondary"])
+        notify_frame.pack(fill="x", padx=25, pady=(0, 25))
+        tk.Label(notify_frame, text="Notifications", fg=THEME["text_primary"], bg=THEME["bg_secondary"], font=("Segoe UI", 10, "bold")).pack(anchor="w", pady=(0, 8))
+        self.notify_combo = ttk.Combobox(notify_frame, values=["YES", "NO"], state="readonly", style='Modern.TCombobox')
+        self.notify_combo.set(settings.get("notifications", "YES")); self.notify_combo.pack(fill="x")
+
+        self.notify_combo.bind("<MouseWheel>", lambda e: "break")
+        self.notify_combo.bind("<Button-4>", lambda e: "break")
+        self.notify_combo.bind("<Button-5>", lambda e: "break")
+        
+        tk.Label(notify_frame, text="Show system notifications for updates", fg=THEME["text_tertiary"], bg=THEME["bg_secondary"], font=("Segoe UI", 9, "italic")).pack(anchor="w", pady=(8, 0))
+
+    def toggle_token_visibility(self):
+        if self.token_entry.cget("show") == "•": self.token_entry.config(show=""); self.show_token_btn.config(text="Hide")
+        else: self.token_entry.config(show="•"); self.show_token_btn.config(text="Show")
+
+    def save_and_close(self):
+        domain, token = self.domain_entry.get().strip(), self.token_entry.get().strip()
+        if not domain or not token: return ModernMessageBox(self, "Error", "Domain and Token cannot be empty.", "error")
+        domains = parse_domains(domain)
+        if not domains or not all(re.match(r"^[a-zA-Z0-9-]+$", d) for d in domains): return ModernMessageBox(self, "Invalid Domain", "Domain format is invalid.\nIt should only contain letters, numbers, and hyphens.", "error")
+        if not re.match(r"^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$", token, re.IGNORECASE): return ModernMessageBox(self, "Invalid Token", "The token format appears to be incorrect.\nPlease double-check it on your DuckDNS account page.", "warning")
+        self.save_callback({"domain": ",".join(domains), "token": token, "interval": self.interval_combo.get(), "notifications": self.notify_combo.get()})
+        # ERROR Call the new cleanup method instead of directly fading out.
+        self._close_and_cleanup()
+
+    def _fade_in(self, alpha=0.0):
+        if alpha <= 1.0: self.attributes('-alpha', alpha); self.after(20, lambda: self._fade_in(alpha + 0.1))
+    def _fade_out(self, alpha=1.0):
+        if alpha >= 0.0: self.attributes('-alpha', alpha); self.after(20, lambda: self._fade_out(alpha - 0.1))
+        else: self.destroy()
+    def _apply_icon_delayed(self):
+        try:
+            if self.winfo_exists() and os.path.exists(LOGO_FILE): self.iconbitmap(LOGO_FILE); set_window_icon_win32(self)
+        except Exception as e: logging.warning(f"Could not set icon for ModernSettingsWindow : {e}")
+
+# --- Port Checker Window ---
+class PortCheckerWindow(tk.Toplevel):
+    def __init__(self, master, domain, runner):
+        super().__init__(master)
+        self.runner = runner
+        self._stop_event = threading.Event()
+        self._checking = False
+        self.withdraw()
+        self.attributes('-alpha', 0.0)
+
+        self.title("Check Service Port")
+        self.resizable(False, False)
+        self.configure(bg=THEME["bg_primary"])
+        self.after(100, self._apply_icon_delayed)
+
+        main_frame = tk.Frame(self, bg=THEME["bg_primary"])
+        main_frame.pack(fill="both", expand=True, padx=30, pady=25)
+
+        tk.Label(main_frame, text="Check Port Status", fg=THEME["text_primary"], bg=THEME["bg_primary"], font=("Segoe UI", 16, "bold")).pack(pady=(0, 5))
+        tk.Label(main_frame, text="Test if a port for your service is accessible from the internet.", fg=THEME["text_secondary"], bg=THEME["bg_primary"], font=("Segoe UI", 10), wraplength=400).pack(pady=(0, 25))
+
+        tk.Label(main_frame, text="Domains or IP Addresses", fg=THEME["text_primary"], bg=THEME["bg_primary"], font=("Segoe UI", 10, "bold")).pack(anchor="w", pady=(0, 8))
+        self.host_entry = ttk.Entry(main_frame, style='Modern.TEntry', font=("Segoe UI", 10))
+        if domain: self.host_entry.insert(0, f"{domain}.duckdns.org")
+        self.host_entry.pack(fill="x")
+
+        tk.Label(main_frame, text="Ports", fg=THEME["text_primary"], bg=THEME["bg_primary"], font=("Segoe UI", 10, "bold")).pack(anchor="w", pady=(15, 8))
+        self.port_entry = ttk.Entry(main_frame, style='Modern.TEntry', font=("Segoe UI", 10))
+        self.port_entry.pack(fill="x")
+        tk.Label(main_frame, text="Separate hosts and ports with commas, e.g. 80, 443, 8000-8100", fg=THEME["text_tertiary"], bg=THEME["bg_primary"], font=("Segoe UI", 9, "italic")).pack(anchor="w", pady=(8, 0))
+
+        self.status_label = tk.Label(main_frame, text="", fg=THEME["text_secondary"], bg=THEME["bg_primary"], font=("Segoe UI", 10, "italic"), wraplength=400)
+        self.status_label.pack(pady=(20, 0))
+
+        # Results stream in here as each probe finishes
+        self.results_text = tk.Text(main_frame, bg=THEME["bg_secondary"], fg=THEME["text_secondary"], font=("Consolas", 9), wrap="none",
+                                    highlightthickness=0, borderwidth=0, relief="flat", height=8, state="disabled")
+        self.results_text.tag_configure("open", foreground=THEME["success"])
+        self.results_text.tag_configure("closed", foreground=THEME["error"])
+        self.results_text.pack(fill="x", pady=(10, 0))
+
+        footer = tk.Frame(main_frame, bg=THEME["bg_primary"])
+        footer.pack(fill="x", pady=(25, 0))
+        footer.grid_columnconfigure(0, weight=1); footer.grid_columnconfigure(1, weight=1)
+        
+        close_btn = RoundedButton(parent=footer, width=190, height=45, radius=22, text="Close", command=self._close,
+                                 bg_color=THEME["bg_tertiary"], fg_color=THEME["text_secondary"], hover_color=THEME["bg_hover"])
+        close_btn.grid(row=0, column=0, sticky="ew", padx=(0, 5))
+
+        self.check_btn = RoundedButton(parent=footer, width=190, height=45, radius=22, text="Check", command=self.start_check,
+                               bg_color=THEME["accent_primary"], fg_color=THEME["text_primary"], hover_color=THEME["accent_hover"])
+        self.check_btn.grid(row=0, column=1, sticky="ew", padx=(5, 0))
+        
+        self.update_idletasks()
+        width, height = 500, self.winfo_reqheight()
+        x = (self.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.winfo_screenheight() // 2) - (height // 2)
+        self.geometry(f"{width}x{height}+{x}+{y}")
+        self.deiconify(); self._fade_in(); self.focus()
+
+    def start_check(self):
+        if self._checking: return
+        hosts = parse_hosts(self.host_entry.get().strip())
+        port = self.port_entry.get().strip()
+        if not hosts or not port:
+            self.update_status("Please enter a Domain/IP and Port.", is_error=True)
+            return
+        try: ports = parse_ports(port)
+        except ValueError as e: return self.update_status(f"Error : {e}", is_error=True)
+
+        self._checking = True
+        self.results_text.config(state="normal"); self.results_text.delete("1.0", "end"); self.results_text.config(state="disabled")
+        self.status_label.config(text=f"Checking {len(hosts) * len(ports)} port(s)...", foreground=THEME["text_secondary"])
+        self.check_btn.config(state="disabled") # Simple state disable
+        # Every probe runs on the app's shared event loop, no thread is started per check
+        self.runner.submit(scan_async(hosts, ports, on_result=self._post_result, stop_event=self._stop_event), self._check_done)
+
+    def _check_done(self, results):
+        if not results: return self._post(self.update_status, "Error : The port check failed, see the log for details.", True)
+        if len(results) == 1:
+            _, _, is_open, message = results[0]
+            return self._post(self.update_status, message, not is_open)
+        open_count = sum(1 for _, _, is_open, _ in results if is_open)
+        self._post(self.update_status, f"{open_count} of {len(results)} checked port(s) are open.", open_count < len(results))
+
+    def _post(self, callback, *args):
+        # Results may still arrive from the event loop thread after the window was closed
+        try: self.after(0, callback, *args)
+        except (RuntimeError, tk.TclError): self._stop_event.set()
+
+    def _post_result(self, host, port, is_open, message):
+        self._post(self._append_result, message, is_open)
+
+    def _append_result(self, message, is_open):
+        if not self.winfo_exists(): return
+        self.results_text.config(state="normal")
+        self.results_text.insert("end", message + "\n", "open" if is_open else "closed")
+        self.results_text.see("end")
+        self.results_text.config(state="disabled")
+
+    def update_status(self, message, is_error):
+        self._checking = False
+        color = THEME["error"] if is_error else THEME["success"]
+        self.status_label.config(text=message, foreground=color)
+        self.check_btn.config(state="normal")
+
+    def _close(self):
+        self._stop_event.set()
+        self._fade_out()
+
+    def _fade_in(self, alpha=0.0):
+        if alpha <= 1.0: self.attributes('-alpha', alpha); self.after(20, lambda: self._fade_in(alpha + 0.1))
+    def _fade_out(self, alpha=1.0):
+        if alpha >= 0.0: self.attributes('-alpha', alpha); self.after(20, lambda: self._fade_out(alpha - 0.1))
+        else: self.destroy()
+    def _apply_icon_delayed(self):
+        try:
+            if self.winfo_exists() and os.path.exists(LOGO_FILE): self.iconbitmap(LOGO_FILE); set_window_icon_win32(self)
+        except Exception as e: logging.warning(f"Could not set icon for PortCheckerWindow : {e}")
+
+# --- Help Window ---
+class HelpWindow(tk.Toplevel):
+    def __init__(self, master):
+        super().__init__(master)
+        self.withdraw(); self.attributes('-alpha', 0.0)
+        self.title("Guide : Firewall & Port Forwarding")
+        self.resizable(False, False)
+        self.configure(bg=THEME["bg_primary"])
+        self.after(100, self._apply_icon_delayed)
+
+        main_frame = tk.Frame(self, bg=THEME["bg_primary"])
+        main_frame.pack(fill="both", expand=True, padx=30, pady=25)
+        
+        tk.Label(main_frame, text="Guide : Firewall & Port Forwarding", fg=THEME["text_primary"], bg=THEME["bg_primary"], font=("Segoe UI", 16, "bold")).pack(pady=(0, 20), anchor="w")
+
+        help_text_content = """
+What is a Firewall?
+A firewall acts as a security guard for your computer, preventing unauthorized access from the internet. It inspects incoming and outgoing traffic and decides whether to allow it to pass.
+
+What is Port Forwarding?
+It's a setting on your router that says, "If traffic comes to port number X, send it to computer A at IP address x.x.x.x." This is necessary for people on the internet to access services you're running on your computer (like a web server, game server, etc.).
+
+Basic Setup Steps :
+1. Static IP Address : Set your computer's local IP to be static (unchanging).
+2. Login to Router : Access your router's settings page (usually 192.168.1.1).
+3. Find Port Forwarding Settings : Look for a menu named "Port Forwarding," "Virtual Server," or similar.
+4. Create a New Rule : Add a new rule with the following :
+   - External Port : The port you want to open (e.g., 80, 443).
+   - Internal IP : Your computer's static IP address.
+   - Internal Port : The port your application is using (usually the same as the external port).
+   - Protocol : Choose TCP (for web/most services) or UDP (for some games).
+5. Save and Apply : Save your new settings.
+6. Check Windows Firewall : Ensure the Windows Firewall allows your application to use the port you've just configured.
+
+After setting everything up, use the "Check Service Por" menu item in this app to test if your port is successfully opened.
+        """
+
+        text_widget = tk.Text(main_frame, bg=THEME["bg_primary"], fg=THEME["text_secondary"], font=("Segoe UI", 10), wrap="word",
+                              highlightthickness=0, borderwidth=0, relief="flat", height=20)
+        text_widget.pack(fill="x", expand=True)
+        text_widget.insert("1.0", help_text_content.strip())
+        
+        # Styling tags
+        text_widget.tag_configure("bold", font=("Segoe UI", 10, "bold"), foreground=THEME["text_primary"])
+        text_widget.tag_add("bold", "2.0", "3.0")
+        text_widget.tag_add("bold", "6.0", "7.0")
+        text_widget.tag_add("bold", "10.0", "11.0")
+        
+        text_widget.config(state="disabled")
+
+        ok_btn = RoundedButton(parent=main_frame, width=180, height=45, radius=22, text="Got it", command=self._fade_out,
+                               bg_color=THEME["accent_primary"], fg_color=THEME["text_primary"], hover_color=THEME["accent_hover"])
+        ok_btn.pack(pady=(25, 0))
+
+        self.update_idletasks()
+        width, height = 600, self.winfo_reqheight()
+        x = (self.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.winfo_screenheight() // 2) - (height // 2)
+        self.geometry(f"{width}x{height}+{x}+{y}")
+        self.deiconify(); self._fade_in(); self.focus()
+
+
+    def _fade_in(self, alpha=0.0):
+        if alpha <= 1.0: self.attributes('-alpha', alpha); self.after(20, lambda: self._fade_in(alpha + 0.1))
+    def _fade_out(self, alpha=1.0):
+        if alpha >= 0.0: self.attributes('-alpha', alpha); self.after(20, lambda: self._fade_out(alpha - 0.1))
+        else: self.destroy()
+    def _apply_icon_delayed(self):
+        try:
+            if self.winfo_exists() and os.path.exists(LOGO_FILE): self.iconbitmap(LOGO_FILE); set_window_icon_win32(self)
+        except Exception as e: logging.warning(f"Could not set icon for HelpWindow : {e}")
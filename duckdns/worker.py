@@ -0,0 +1,319 @@
+import logging
+import os
+import threading
+import time
+
+from .client import DuckDNSClient
+from .config import ConfigWatcher
+from .history import History
+from .journal import UpdateJournal
+from .metrics import Metrics
+from .netwatch import ChangeDetector
+from .protocol import answer_kind, normalize_ip
+from .scheduler import Schedule
+from .state import UpdateState
+from .verify import create_verifier
+
+def log_status(message, is_error=False):
+    """Default status sink used when no GUI is attached."""
+    if is_error: logging.error(f"Status : {message}")
+    else: logging.info(f"Status : {message}")
+
+# --- UpdateWorker ---
+class UpdateWorker(threading.Thread):
+    """Background update loop. Reports progress through `on_status(message, is_error)`.
+    A `client` (and `metrics`, `history`, and the `verify_executor` DNS checks run on) passed in are
+    shared with other workers, as in fleet mode; the worker then leaves their settings and lifetime to their owner."""
+    def __init__(self, config, on_status=None, client=None, metrics=None, history=None, verify_executor=None):
+        super().__init__(daemon=True)
+        self.verify_executor = verify_executor
+        self.config, self._owns_client = config, client is None
+        self.client = client or DuckDNSClient(**config.settings.client)
+        self.metrics = metrics or Metrics()
+        if self._owns_client: self.client.metrics = self.metrics
+        # Tracked per domain: last (IPv4, IPv6) DuckDNS confirmed, and the outcome of the last update attempt.
+        self.state = UpdateState(config.get_state_file())
+        # Saved before addresses were normalized, an IPv6 may be in another form than the one now looked up
+        self.last_ips = {domain: tuple(normalize_ip(ip) for ip in ips) for domain, ips in self.state.confirmed().items()}
+        self.domain_results = {}
+        # Updates sent but not confirmed yet, retried with backoff and replayed when the connection is back
+        self.journal, self._replay_requested = UpdateJournal(config.get_journal_file()), False
+        # IP changes and update outcomes over time, recorded under the config's name
+        self.site, self._owns_history = os.path.splitext(os.path.basename(config.filename))[0], history is None
+        self.history = history or History(config.get_history_file())
+        self.last_public_ips = {}  # {4: ip, 6: ip} as last discovered
+        self.schedule, self.change_detector, self.verifier, self._applied = None, None, None, None
+        self.drift_interval, self._last_drift_check = 0, None
+        self._forced, self._reload_requested = False, False
+        self.rejected = set()  # (token, domain) pairs DuckDNS rejected, not sent again until the config changes
+        self.reload_settings()
+        self.watcher = None
+        self.on_status = on_status or log_status
+        self.stop_event, self.force_update_event = threading.Event(), threading.Event()
+        self._running = False
+        self.last_status, self._next_run = None, time.monotonic()
+        # A shared client's reachability is watched by its owner (the fleet)
+        if self._owns_client: self.client.reachability.listeners.append(self._on_reachable_again)
+
+    def update_status(self, message, is_error=False):
+        self.last_status = {"message": message, "is_error": is_error, "time": time.time()}
+        self.on_status(message, is_error)
+
+    def status(self):
+        """A JSON-friendly summary for the control API: last status, public IPs and per-domain results."""
+        domains = {domain: {"ip": entry.get("ip"), "ipv6": entry.get("ipv6"), "result": entry.get("response"), "time": entry.get("time")}
+                   for domain, entry in self.state.snapshot().items()}
+        domains.update({domain: dict(result) for domain, result in list(self.domain_results.items())})
+        next_run = self._next_run
+        return {"running": self.is_alive(), "status": self.last_status, "domains": domains,
+                "public_ips": {str(version): ip for version, ip in self.last_public_ips.items()},
+                "next_check_in": max(next_run - time.monotonic(), 0) if next_run is not None else None,
+                "pending_updates": {domain: {"ip": entry["ip"], "ipv6": entry["ipv6"], "attempts": entry["attempts"]} for domain, entry in self.journal.pending().items()},
+                "consecutive_failures": self.schedule.failures, "connections": self.client.connection_stats()}
+
+    def reload_settings(self):
+        """Applies the config's current settings snapshot. Parts that did not change are kept as they
+        are, so an unrelated edit doesn't reset the retry backoff or the change detector.
+        Connection pool, HTTP/2 and outbound binding settings only take effect after a restart.
+        Only call it from the thread that runs the cycles; other threads use request_reload()."""
+        settings, applied = self.config.settings, self._applied
+        if applied is None or settings.schedule != applied.schedule: self.schedule = Schedule(**settings.schedule)
+        if applied is None or (settings.change_detection, settings.ip_versions) != (applied.change_detection, applied.ip_versions):
+            options = settings.change_detection
+            self.change_detector = ChangeDetector(ipv6=6 in settings.ip_versions, **options) if options else None
+        if applied is None or settings.verify != applied.verify:
+            if self.verifier: self.verifier.close()
+            self.verifier = create_verifier(settings.verify["resolver"], executor=self.verify_executor) if settings.verify else None
+            self.drift_interval = settings.verify["drift_interval"] if settings.verify else 0
+        self.ip_versions = settings.ip_versions
+        # The edit may have fixed the token or a domain name
+        self.rejected.clear()
+        if self._owns_client:
+            self.client.lookup_mode = settings.client["lookup_mode"] if settings.client["lookup_mode"] in self.client.LOOKUP_MODES else "sequential"
+            self.client.quorum = settings.client["quorum"]
+            self.client.limiter.configure(settings.client["rate_limits"]); self.client.ip_cache.ttl = settings.client["ip_cache_ttl"]
+            self.client.reachability.ttl = settings.client["reachability_ttl"]
+            if settings.client["connectivity_probes"] is not None: self.client.CONNECTIVITY_PROBES = list(settings.client["connectivity_probes"])
+        self._applied = settings
+
+    def request_reload(self):
+        """Has the config's new settings applied before the next cycle, on the worker's own thread, so
+        that a cycle never runs with a mix of old and new settings. The next cycle runs right away."""
+        self._reload_requested = True; self._next_run = time.monotonic(); self.force_update_event.set()
+
+    def _on_config_changed(self):
+        logging.info(f"{self.config.filename} changed, new settings will apply to the next cycle.")
+        self.request_reload()
+
+    def _on_reachable_again(self):
+        if len(self.journal): self._replay_requested = True; self.force_update_event.set()
+
+    def run(self):
+        self._running = True; logging.info("UpdateWorker thread started.")
+        # Edits made outside the GUI (by hand, or pushed by config management) apply right away
+        self.watcher = ConfigWatcher(self.config, self._on_config_changed); self.watcher.start()
+        self._next_run, delay = time.monotonic(), 0
+        while not self.stop_event.is_set():
+            # Sleep until a cycle or a queued update is due, or until force_update()/stop() sets the event
+            if self.force_update_event.wait(timeout=delay): self.force_update_event.clear()
+            if self.stop_event.is_set(): break
+            # Where the watcher can only poll now and then, a stat makes sure a cycle never runs on an outdated config
+            try:
+                if self.config.reload_if_changed(): self._on_config_changed()
+            except Exception as e: logging.error(f"Error reloading config : {e}", exc_info=True)
+            delay = self.run_due()
+        self.watcher.stop()
+        self.close()
+        self._running = False; logging.info(f"UpdateWorker thread stopped. Connection stats : {self.client.connection_stats()}")
+
+    def close(self):
+        """Releases what the worker owns. Called when its thread ends; the fleet calls it for the workers it runs."""
+        if self.verifier: self.verifier.close()
+        if self._owns_client: self.client.close()
+        if self._owns_history: self.history.close()
+
+    def run_due(self):
+        """Runs a full cycle if one is due (or forced), otherwise just the queued updates that are due
+        (all of them after the connection came back). Returns the seconds until something is due again."""
+        if self._reload_requested: self._reload_requested = False; self.reload_settings()
+        if self._forced or time.monotonic() >= self._next_run:
+            self._next_run = time.monotonic() + self.run_scheduled_cycle()
+            self._replay_requested = False  # the cycle just retried everything itself
+        else:
+            everything, self._replay_requested = self._replay_requested, False
+            try: self.replay_journal(everything)
+            except Exception as e: logging.error(f"Error sending queued updates : {e}", exc_info=True)
+        wake, due = self._next_run, self.journal.next_due()
+        if due is not None: wake = min(wake, time.monotonic() + due - time.time())
+        return max(wake - time.monotonic(), 0)
+
+    def run_scheduled_cycle(self):
+        """Runs one cycle, recording its outcome. Returns the delay in seconds until the next one."""
+        succeeded, started = False, time.monotonic()
+        try: succeeded = self.run_update_cycle()
+        except Exception as e: logging.error(f"Error in update cycle : {e}", exc_info=True); self.update_status("Error in update cycle. Check logs.", is_error=True)
+        self.metrics.cycle_duration.observe(time.monotonic() - started, outcome="success" if succeeded else "failure")
+        self.metrics.last_cycle.set(time.time())
+        if succeeded: self.metrics.last_success.set(time.time())
+        delay = self.schedule.next_delay(succeeded)
+        if not succeeded: logging.info(f"Retrying in {delay:.0f}s (attempt {self.schedule.failures + 1}).")
+        return delay
+
+    def run_update_cycle(self):
+        """Runs one check/update pass. Returns False if it failed and should be retried early."""
+        if self.stop_event.is_set(): return True
+        if not self.client.is_connected(): self.update_status("Error : No internet connection.", is_error=True); return False
+        accounts = self._applied.accounts
+        if not accounts: self.update_status("Configuration missing. Right-click to open Settings."); return True
+        forced, self._forced = self._forced, False
+        lookup_needed, fingerprint = True, None
+        if self.change_detector:
+            # Fingerprint before the lookup, so a change that happens during it triggers the next one
+            changed, fingerprint = self.change_detector.lookup_needed()
+            lookup_needed = changed or forced or not self.last_public_ips
+        if lookup_needed:
+            # A forced cycle, or one the change detector asked for, must not be answered from the short-lived
+            # IP cache. A shared client's cache belongs to its owner, or every profile would wipe it for the others.
+            if self._owns_client and (forced or self.change_detector): self.client.ip_cache.clear()
+            self.update_status("Checking public IP...")
+            found = self.client.get_public_ips(self.ip_versions, self.last_public_ips)
+            if self.stop_event.is_set(): return True
+            if not any(found.values()): self.update_status("Error : Could not get public IP.", is_error=True); return False
+            for version, ip in found.items():
+                ip = normalize_ip(ip)
+                # Keep the last known address of a family whose lookup failed, rather than unsetting its record
+                if ip and self.last_public_ips.get(version) not in (None, ip): self.metrics.ip_changes.inc(version=version)
+                if ip: self.last_public_ips[version] = ip
+                else: logging.warning(f"Could not get public IPv{version}, keeping {self.last_public_ips.get(version)}.")
+            if self.change_detector: self.change_detector.lookup_done(fingerprint)
+            self.history.discovered(self.site, self.last_public_ips.get(4), self.last_public_ips.get(6))
+            self.client.scoreboard.save()
+        else:
+            logging.info("Local network unchanged, skipping remote IP lookup.")
+        ipv4, ipv6 = self.last_public_ips.get(4), self.last_public_ips.get(6)
+        public_ip = ", ".join(ip for ip in (ipv4, ipv6) if ip)
+        updated, rejected, errors = [], [], []
+        check_drift = self.verifier is not None and (forced or self._last_drift_check is None or time.monotonic() - self._last_drift_check >= self.drift_interval)
+        if check_drift: self._last_drift_check = time.monotonic()
+        plan, skipped = [], []
+        for account in accounts:
+            domains = [d for d in account["domains"] if (account["token"], d) not in self.rejected]
+            skipped.extend(d for d in account["domains"] if d not in domains)
+            stale = [d for d in domains if self.last_ips.get(d) != (ipv4, ipv6)]
+            plan.append((account, stale, [d for d in domains if d not in stale] if check_drift else []))
+        if skipped: logging.info(f"Not updating {', '.join(skipped)} : DuckDNS rejected them with their token, edit the config to try again.")
+        if self.verifier:
+            # Every lookup of the cycle at once, within the verifier's time budget
+            checked = self.verifier.check([d for _, stale, current in plan for d in stale + current], ipv4, ipv6)
+            plan = [(account, self._unpublished(stale, checked, ipv4, ipv6) + self._drifted(current, checked, ipv4, ipv6)) for account, stale, current in plan]
+        plan = [(account, stale) for account, stale, *_ in plan if stale]
+        # The plan supersedes whatever was queued : newer IPs replace older ones, and domains that
+        # need no update any more (e.g. the IP went back to the confirmed one) are dropped
+        self.journal.retain({domain for _, stale in plan for domain in stale})
+        if plan: self.update_status(f"New IP : {public_ip}. Updating...")
+        for account, stale in plan:
+            # Queued (and saved) before sending, so an update cut short by a crash is sent after a restart
+            self.journal.add(stale, account["name"], ipv4, ipv6); self.journal.save()
+            # Both records go out in the same request; resending an unchanged one is harmless
+            # Domains confirmed before tell a bad token from bad domains when a batch is rejected
+            results = self.client.update_duckdns_batch(stale, account["token"], ipv4, ipv6, known_good=self.last_ips,
+                                                       token_accepted=any(d in self.last_ips for d in account["domains"]))
+            for outcome, domains in zip((updated, rejected, errors), self._record_results(results, account["token"], ipv4, ipv6)): outcome.extend(domains)
+        if updated:
+            logging.info(f"IP updated successfully to {public_ip} for domain(s) {', '.join(updated)}.")
+        if rejected or skipped:
+            if rejected: logging.error(f"Update failed (KO) for {', '.join(rejected)}.")
+            self.update_status(f"Update failed for {', '.join(rejected + skipped)}! Check Domain/Token.", is_error=True)
+        elif errors:
+            self.update_status("Error connecting to DuckDNS.", is_error=True); logging.error(f"Unknown error from DuckDNS for {', '.join(errors)}. Response : {self.domain_results[errors[0]]['result']}")
+        elif updated: self.update_status(f"Update successful! IP is now {public_ip}")
+        else: self.update_status(f"IP unchanged : {public_ip}"); logging.info(f"IP address ({public_ip}) has not changed.")
+        self.state.save(); self.journal.save()
+        logging.debug(f"Connection stats : {self.client.connection_stats()}")
+        # A KO is a configuration problem that retrying sooner won't fix; only connection errors are retried early
+        return not errors
+
+    def _record_results(self, results, token, ipv4, ipv6):
+        """Applies {domain: DuckDNS answer} for `token` to the state and the journal. Returns (updated, rejected, errors)."""
+        updated, rejected, errors = [], [], []
+        # Changes of a domain's confirmed IPs; its first update is not one, there is nothing to time it from
+        changed = [domain for domain in results if self.last_ips.get(domain) not in (None, (ipv4, ipv6))]
+        for domain, result in results.items():
+            self.domain_results[domain] = {"ip": ipv4, "ipv6": ipv6, "result": result, "time": time.time()}
+            self.metrics.observe_update(domain, result)
+            kind = answer_kind(result)
+            if kind == "OK":
+                self.last_ips[domain] = (ipv4, ipv6); updated.append(domain)
+                self.state.record(domain, ipv4, ipv6, result)
+                self.journal.done(domain, ipv4, ipv6)
+            # A KO is a configuration problem that no retry will fix
+            elif kind == "KO": rejected.append(domain); self.journal.done(domain); self.rejected.add((token, domain))
+            else: errors.append(domain); self.journal.failed(domain)
+        outcomes = dict.fromkeys(updated, "updated"); outcomes.update(dict.fromkeys(rejected, "rejected")); outcomes.update(dict.fromkeys(errors, "error"))
+        self.history.recorded(self.site, outcomes, ipv4, ipv6, changed)
+        return updated, rejected, errors
+
+    def replay_journal(self, everything=False):
+        """Sends the queued updates that are due (or all of them) with their queued IPs, without a
+        public IP lookup. Returns False if any of them failed again.
+        Entries queued with the same token and IPs as a due one go out with it, in the same request."""
+        pending, now = self.journal.pending(), time.time()
+        if not any(everything or entry["next_try"] <= now for entry in pending.values()): return True
+        accounts = {account["name"]: account for account in self._applied.accounts}
+        groups, due = {}, set()
+        for domain, entry in pending.items():
+            account = accounts.get(entry["account"])
+            # Removed from the config, or moved to another token, since it was queued
+            if account is None or domain not in account["domains"]: self.journal.done(domain); continue
+            key = (entry["account"], entry["ip"], entry["ipv6"])
+            groups.setdefault(key, []).append(domain)
+            if everything or entry["next_try"] <= now: due.add(key)
+        groups = {key: domains for key, domains in groups.items() if key in due}
+        errors = []
+        if groups and not self.client.is_connected():
+            for domains in groups.values():
+                for domain in domains: self.journal.failed(domain)
+            groups, errors = {}, [None]
+        for (name, ipv4, ipv6), domains in groups.items():
+            logging.info(f"Sending {len(domains)} queued update(s) : {', '.join(domains)}.")
+            token = accounts[name]["token"]
+            results = self.client.update_duckdns_batch(domains, token, ipv4, ipv6, known_good=self.last_ips, token_accepted=any(d in self.last_ips for d in accounts[name]["domains"]))
+            updated, rejected, failed = self._record_results(results, token, ipv4, ipv6)
+            errors.extend(failed)
+            if updated: self.update_status(f"Queued update sent! {', '.join(updated)} now point(s) to {', '.join(ip for ip in (ipv4, ipv6) if ip)}")
+            if rejected: self.update_status(f"Update failed for {', '.join(rejected)}! Check Domain/Token.", is_error=True)
+        self.state.save(); self.journal.save()
+        return not errors
+
+    def _unpublished(self, domains, checked, ipv4, ipv6):
+        """Drops the domains whose DNS records already hold the current IPs (`checked` is RecordVerifier.check()),
+        recording them as confirmed. Domains that could not be checked are updated."""
+        stale, published, changed = [], [], []
+        for domain in domains:
+            if checked[domain]:
+                logging.info(f"{domain}.duckdns.org already points to the current IP, no update needed.")
+                if self.last_ips.get(domain) is not None: changed.append(domain)
+                self.last_ips[domain] = (ipv4, ipv6); published.append(domain)
+                self.state.record(domain, ipv4, ipv6, "DNS")
+            else: stale.append(domain)
+        self.history.recorded(self.site, dict.fromkeys(published, "published"), ipv4, ipv6, changed)
+        return stale
+
+    def _drifted(self, domains, checked, ipv4, ipv6):
+        """Returns the domains believed up to date whose DNS records hold another IP, e.g. after an
+        edit on the DuckDNS website or by another client. Domains that can't be checked are left alone."""
+        drifted = []
+        for domain in domains:
+            if checked[domain] is False:
+                logging.warning(f"{domain}.duckdns.org no longer points to {', '.join(ip for ip in (ipv4, ipv6) if ip)}, updating it again.")
+                self.metrics.record_drift.inc(domain=domain)
+                drifted.append(domain)
+        self.history.recorded(self.site, dict.fromkeys(drifted, "drift"), ipv4, ipv6)
+        return drifted
+
+    def stop(self):
+        logging.info("Stopping UpdateWorker..."); self.stop_event.set(); self.force_update_event.set()
+        if self._running and threading.current_thread() != self: self.join(timeout=5)
+    def force_update(self):
+        logging.info("Force update triggered by user."); self.update_status("Forcing update...")
+        self._forced = True; self.force_update_event.set()
@@ -0,0 +1,22 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# duckdns.constants creates the app data folder on import : keep it out of the real one
+os.environ["LOCALAPPDATA"] = tempfile.mkdtemp(prefix="duckdns-tests-")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from standins import StandInServers  # noqa: E402
+
+@pytest.fixture
+def standins():
+    with StandInServers() as servers: yield servers
+
+@pytest.fixture
+def client(standins):
+    from duckdns.client import DuckDNSClient
+    client = standins.attach(DuckDNSClient())
+    yield client
+    client.close()
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+DOMAINS = list("abcdefgh")
+
+@pytest.mark.parametrize("invalid", [{"a"}, {"a", "c"}, {"a", "e"}, {"b", "g", "h"}, set(DOMAINS)])
+def test_rejected_domains_are_isolated(standins, client, invalid):
+    standins.invalid_domains = invalid
+    results = client.update_duckdns_batch(DOMAINS, "bench-token", "203.0.113.10")
+    assert results == {domain: "KO" if domain in invalid else "OK" for domain in DOMAINS}
+    assert set(standins.records) == set(DOMAINS) - invalid
+
+def test_valid_batch_is_one_request(standins, client):
+    assert set(client.update_duckdns_batch(DOMAINS, "bench-token", "203.0.113.10").values()) == {"OK"}
+    assert standins.update_requests == 1
+
+def test_known_good_domain_detects_bad_token(standins, client):
+    results = client.update_duckdns_batch(DOMAINS, "revoked-token", "203.0.113.10", known_good={"c", "f"})
+    assert results == dict.fromkeys(DOMAINS, "KO")
+    # The batch, a known good domain alone, the rest, another known good domain alone
+    assert standins.update_requests == 4
+
+@pytest.mark.parametrize("invalid", [{"a"}, {"a", "e"}, {"c", "d"}])
+def test_known_good_domains_that_became_invalid(standins, client, invalid):
+    # e.g. domains deleted from the account since they were last updated
+    standins.invalid_domains = invalid
+    results = client.update_duckdns_batch(DOMAINS, "bench-token", "203.0.113.10", known_good={"a", "c"})
+    assert results == {domain: "KO" if domain in invalid else "OK" for domain in DOMAINS}
+
+def test_new_token_rejected_without_splitting(standins, client):
+    results = client.update_duckdns_batch(DOMAINS, "mistyped-token", "203.0.113.10", token_accepted=False)
+    assert results == dict.fromkeys(DOMAINS, "KO") and standins.update_requests == 1
+
+def test_rejected_domains_are_not_sent_again(standins, tmp_path):
+    from duckdns.config import ConfigManager
+    from duckdns.worker import UpdateWorker
+    config_file = tmp_path / "config.ini"
+    config_file.write_text("[DuckDNS]\ndomain = a,b,c\ntoken = mistyped-token\n[Settings]\nnotifications = NO\n")
+    worker = UpdateWorker(ConfigManager(str(config_file)))
+    standins.attach(worker.client)
+    for _ in range(3): worker.run_update_cycle()
+    assert standins.update_requests == 1 and worker.last_status["is_error"]
+    config_file.write_text("[DuckDNS]\ndomain = a,b,c\ntoken = bench-token\n[Settings]\nnotifications = NO\n")
+    worker.config.load(); worker.reload_settings()
+    assert worker.run_update_cycle() and set(standins.records) == {"a", "b", "c"}
+
+@pytest.mark.parametrize("invalid", [{"a"}, {"a", "e"}, {"c", "d"}])
+def test_async_rejected_domains_are_isolated(standins, invalid):
+    from duckdns.aioclient import AsyncDuckDNSClient
+    standins.invalid_domains = invalid
+
+    async def run():
+        client = standins.attach(AsyncDuckDNSClient())
+        try: return await client.update_duckdns_batch(DOMAINS, "bench-token", "203.0.113.10", known_good={"a", "c"})
+        finally: await client.aclose()
+
+    assert asyncio.run(run()) == {domain: "KO" if domain in invalid else "OK" for domain in DOMAINS}
@@ -0,0 +1,19 @@
+import logging
+
+import pytest
+
+from duckdns.config import MIN_INTERVAL, parse_interval
+
+@pytest.mark.parametrize("value, seconds", [("5", 300), ("30s", 30), ("2m", 120), ("1h", 3600), (" 1.5 M ", 90), ("10s", 10)])
+def test_parse_interval(value, seconds):
+    assert parse_interval(value) == seconds
+
+@pytest.mark.parametrize("value", ["5s", "0.1", "1s"])
+def test_short_interval_is_raised_to_the_minimum(value, caplog):
+    with caplog.at_level(logging.WARNING): assert parse_interval(value) == MIN_INTERVAL
+    assert "shorter than the minimum" in caplog.text
+
+@pytest.mark.parametrize("value", ["soon", "-5", "", None, "0", "0s", "0.0h"])
+def test_unreadable_interval_uses_the_default(value, caplog):
+    with caplog.at_level(logging.WARNING): assert parse_interval(value, default=300) == 300
+    assert "Invalid interval" in caplog.text
@@ -0,0 +1,67 @@
+import http.client
+import json
+
+import pytest
+
+from duckdns.config import ConfigManager
+from duckdns.control import ControlError, ControlServer, send_command
+from duckdns.worker import UpdateWorker
+
+
+@pytest.fixture
+def server(tmp_path):
+    config_file = tmp_path / "config.ini"
+    config_file.write_text("[DuckDNS]\ndomain = a\ntoken = bench-token\n[Settings]\nnotifications = NO\n")
+    worker = UpdateWorker(ConfigManager(str(config_file)))
+    server = ControlServer(worker, str(tmp_path / "config.control.json")).start()
+    yield server
+    server.stop(); worker.close()
+
+
+def request(server, method, path, token=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server._server.server_port, timeout=5)
+    headers = {} if token is None else {"X-Control-Token": token}
+    try:
+        connection.request(method, path, body=b"" if method == "POST" else None, headers=headers)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally: connection.close()
+
+
+@pytest.mark.parametrize("token", [None, "", "wrong", "é" * 32, "\xff\x00"])
+def test_missing_or_wrong_token(server, token):
+    status, answer = request(server, "GET", "/status", token)
+    assert status == 401 and answer == {"error": "Invalid token"}
+    assert not server.worker.force_update_event.is_set()
+
+
+def test_token_is_checked_first(server):
+    assert request(server, "POST", "/update", "wrong")[0] == 401
+    assert request(server, "GET", "/nothing", "wrong")[0] == 401
+    assert not server.worker.force_update_event.is_set()
+
+
+@pytest.mark.parametrize("command", ["update", "reload"])
+def test_changes_need_post(server, command):
+    status, answer = request(server, "GET", f"/{command}", server.token)
+    assert status == 405 and answer == {"error": f"Use POST for '{command}'"}
+    assert not server.worker.force_update_event.is_set()
+    assert request(server, "POST", f"/{command}", server.token) == (200, {"ok": True})
+    assert server.worker.force_update_event.is_set()
+
+
+def test_unknown_command(server):
+    assert request(server, "POST", "/shutdown", server.token) == (404, {"error": "Unknown command 'shutdown'"})
+
+
+def test_send_command(server):
+    status = send_command(server.control_file, "status")
+    assert status["running"] is False and "domains" in status
+    assert send_command(server.control_file, "ip") == {}
+    assert send_command(server.control_file, "update") == {"ok": True}
+    with pytest.raises(ControlError, match="Unknown command"): send_command(server.control_file, "shutdown")
+
+
+def test_send_command_without_an_instance(server):
+    server.stop()
+    with pytest.raises(ControlError, match="No running instance"): send_command(server.control_file, "status")
@@ -0,0 +1,25 @@
+import asyncio
+
+from duckdns.aioclient import EventLoopThread
+
+
+def test_stop_closes_the_loop():
+    runner = EventLoopThread("test-asyncio")
+    assert runner.submit(asyncio.sleep(0, "done")).result(timeout=2) == "done"
+    runner.stop()
+    assert runner.loop.is_closed()
+    runner.stop()
+
+
+def test_stop_cancels_pending_tasks():
+    runner = EventLoopThread("test-asyncio")
+    cancelled = []
+
+    async def pending():
+        try: await asyncio.sleep(60)
+        except asyncio.CancelledError: cancelled.append(True); raise
+
+    future = runner.submit(pending())
+    runner.submit(asyncio.sleep(0)).result(timeout=2)
+    runner.stop()
+    assert runner.loop.is_closed() and cancelled and future.cancelled()
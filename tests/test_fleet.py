@@ -0,0 +1,70 @@
+import os
+import socket
+import threading
+import time
+import urllib.request
+
+from duckdns import fleet as fleet_module
+from duckdns.control import send_command
+
+PROFILE = "[DuckDNS]\ndomain = {name}\ntoken = bench-token\n[Settings]\ninterval = 10m\nnotifications = NO\n"
+
+
+def free_port():
+    with socket.socket() as sock: sock.bind(("127.0.0.1", 0)); return sock.getsockname()[1]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline: time.sleep(0.05)
+    return condition()
+
+
+def test_fleet_serves_metrics_and_control(standins, tmp_path, monkeypatch):
+    client_for = fleet_module.Fleet._client_for
+    monkeypatch.setattr(fleet_module.Fleet, "_client_for", lambda self, config: standins.attach(client_for(self, config)))
+    for name in ("alpha", "beta"): (tmp_path / f"{name}.ini").write_text(PROFILE.format(name=name))
+    port = free_port()
+    (tmp_path / fleet_module.FLEET_CONFIG).write_text(f"[Metrics]\nport = {port}\n")
+    fleet = fleet_module.Fleet(str(tmp_path), workers=2)
+    runner = threading.Thread(target=fleet.run); runner.start()
+    try:
+        control_file = str(tmp_path / ".fleet.control.json")
+        assert wait_for(lambda: os.path.exists(control_file) and standins.updated_domains >= 2)
+        status = send_command(control_file, "status")
+        assert status["running"] and set(status["profiles"]) == {"alpha", "beta"}
+        assert wait_for(lambda: all(profile["public_ips"] for profile in send_command(control_file, "status")["profiles"].values()))
+        assert set(send_command(control_file, "ip")) == {"alpha", "beta"}
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response: body = response.read().decode("utf-8")
+        assert "duckdns_worker_up 1" in body and 'duckdns_updates_total{domain="alpha",result="OK"}' in body
+    finally:
+        fleet.stop(); runner.join(10)
+    assert not os.path.exists(control_file)
+
+
+def test_force_update_during_a_cycle_runs_once_after_it(tmp_path, monkeypatch):
+    from duckdns.worker import UpdateWorker
+    release, lock, cycles = threading.Event(), threading.Lock(), {"started": 0, "running": 0, "peak": 0}
+
+    def run_due(self):
+        self._forced = False  # taken when the cycle starts, as the real one does
+        with lock: cycles["started"] += 1; cycles["running"] += 1; cycles["peak"] = max(cycles["peak"], cycles["running"])
+        if cycles["started"] == 1: release.wait(5)
+        with lock: cycles["running"] -= 1
+        return 600
+
+    monkeypatch.setattr(UpdateWorker, "run_due", run_due)
+    (tmp_path / "alpha.ini").write_text(PROFILE.format(name="alpha"))
+    fleet = fleet_module.Fleet(str(tmp_path), workers=4)
+    runner = threading.Thread(target=fleet.run); runner.start()
+    try:
+        assert wait_for(lambda: cycles["started"] == 1)
+        forcing = [threading.Thread(target=fleet.force_update) for _ in range(8)]
+        for thread in forcing: thread.start()
+        for thread in forcing: thread.join(5)
+        release.set()
+        assert wait_for(lambda: cycles["started"] == 2)
+        time.sleep(0.3)
+        assert cycles["started"] == 2 and cycles["peak"] == 1
+    finally:
+        release.set(); fleet.stop(); runner.join(10)
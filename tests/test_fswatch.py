@@ -0,0 +1,52 @@
+import threading
+import time
+
+from duckdns.config import ConfigManager, ConfigWatcher
+from duckdns.fswatch import DirectoryWatcher
+from duckdns.storage import atomic_write_text
+
+
+def waiter(watcher):
+    woken = []
+    thread = threading.Thread(target=lambda: woken.append(watcher.wait()), daemon=True)
+    thread.start()
+    return thread, woken
+
+
+def test_wakes_on_matching_changes_only(tmp_path):
+    watcher = DirectoryWatcher(str(tmp_path), lambda name: name == "config.ini", poll_interval=30)
+    assert watcher.notifies
+    thread, woken = waiter(watcher)
+    (tmp_path / "other.log").write_text("x")
+    thread.join(0.3)
+    assert not woken
+    atomic_write_text(str(tmp_path / "config.ini"), "[Settings]\n")
+    thread.join(2)
+    assert woken == [True]
+    thread, woken = waiter(watcher)
+    watcher.close()
+    thread.join(2)
+    assert woken == [False]
+
+
+def test_polls_without_notifications(tmp_path, monkeypatch):
+    monkeypatch.setattr("sys.platform", "unknown")
+    watcher = DirectoryWatcher(str(tmp_path), poll_interval=0.1)
+    assert not watcher.notifies and watcher.wait()
+    watcher.close()
+    assert not watcher.wait()
+
+
+def test_config_watcher_reloads_an_edited_file(tmp_path):
+    config_file = tmp_path / "config.ini"
+    config_file.write_text("[DuckDNS]\ndomain = a\ntoken = t\n")
+    config, changed = ConfigManager(str(config_file)), threading.Event()
+    watcher = ConfigWatcher(config, changed.set, poll_interval=30)
+    watcher.start()
+    try:
+        time.sleep(0.05)
+        atomic_write_text(str(config_file), "[DuckDNS]\ndomain = a,b\ntoken = t\n")
+        assert changed.wait(2) and config.settings.accounts[0]["domains"] == ["a", "b"]
+    finally:
+        watcher.stop(); watcher.join(2)
+    assert not watcher.is_alive()
@@ -0,0 +1,71 @@
+import pytest
+
+from duckdns.history import History, parse_age
+
+T0 = 1_700_000_000
+
+@pytest.fixture
+def history(tmp_path):
+    history = History(str(tmp_path / "history.db"))
+    yield history
+    history.close()
+
+def record_change(history, t, ip, lag, domains=("a", "b")):
+    """The site's IP changes to `ip` at t, found by a lookup, confirmed `lag` seconds later."""
+    history.discovered("home", ip, None, when=t)
+    history.recorded("home", dict.fromkeys(domains, "updated"), ip, None, changed=domains, when=t + lag)
+
+def test_stats_time_to_update_and_uptime(history):
+    history.discovered("home", "203.0.113.1", None, when=T0)
+    history.recorded("home", {"a": "updated", "b": "updated"}, "203.0.113.1", None, when=T0 + 1)
+    for t in range(T0 + 300, T0 + 3600, 300): history.discovered("home", "203.0.113.1", None, when=t)  # unchanged
+    history.discovered("home", "203.0.113.2", None, when=T0 + 3600)
+    history.recorded("home", {"a": "error", "b": "rejected"}, "203.0.113.2", None, changed=("a",), when=T0 + 3600)
+    history.recorded("home", {"a": "updated"}, "203.0.113.2", None, changed=("a",), when=T0 + 3660)
+    record_change(history, T0 + 7200, "203.0.113.3", 20, domains=("a",))
+    stats = history.stats(until=T0 + 10801)
+    assert stats["sites"]["home"]["changes"] == 2 and stats["sites"]["home"]["ip"] == "203.0.113.3"
+    a = stats["domains"]["a"]
+    assert (a["updated"], a["errors"], a["changes"]) == (3, 1, 2)
+    assert (a["mean_time_to_update"], a["max_time_to_update"], a["stale_seconds"]) == (40, 60, 80)
+    assert a["uptime"] == pytest.approx(1 - 80 / 10800)
+    # b never confirmed the new IPs : stale since the lookup that found them, counted in the whole history
+    b = history.stats(["b"])["domains"]["b"]
+    assert b["rejected"] == 1 and b["changes"] == 0 and b["stale_since"] == T0 + 3600
+    # All of history reads the running totals, a window reads the updates : the two must agree
+    assert {key: value for key, value in history.stats(["a"], since=T0 - 1)["domains"]["a"].items() if key != "uptime"} == \
+           {key: value for key, value in history.stats(["a"])["domains"]["a"].items() if key != "uptime"}
+
+def test_window_clips_stale_time(history):
+    history.discovered("home", "203.0.113.1", None, when=T0)
+    history.recorded("home", {"a": "updated"}, "203.0.113.1", None, when=T0)
+    record_change(history, T0 + 1000, "203.0.113.2", 100, domains=("a",))
+    a = history.stats(since=T0 + 1050, until=T0 + 2000)["domains"]["a"]
+    assert a["stale_seconds"] == 50 and a["changes"] == 1
+
+def test_changes_timeline(history):
+    history.discovered("home", "203.0.113.1", None, when=T0)
+    history.recorded("home", {"a": "updated"}, "203.0.113.1", None, when=T0 + 1)
+    for n in range(2, 6): record_change(history, T0 + n * 1000, f"203.0.113.{n}", 5, domains=("a",))
+    assert [change["ip"] for change in history.changes(site="home")] == [f"203.0.113.{n}" for n in range(1, 6)]
+    assert [change["ip"] for change in history.changes("a", limit=2)] == ["203.0.113.4", "203.0.113.5"]
+    assert all(change["time_to_update"] == 5 for change in history.changes("a"))
+    assert history.changes("a", since=T0 + 4500, until=T0 + 6000)[0]["ip"] == "203.0.113.5"
+
+def test_queued_update_of_an_older_ip(history):
+    # A replayed update for IPs the site has moved on from is timed from when they were found
+    history.discovered("home", "203.0.113.1", None, when=T0)
+    history.discovered("home", "203.0.113.2", None, when=T0 + 100)
+    history.recorded("home", {"a": "updated"}, "203.0.113.1", None, changed=("a",), when=T0 + 150)
+    assert history.changes("a")[0]["time_to_update"] == 150
+
+def test_history_survives_reopen(tmp_path):
+    history = History(str(tmp_path / "history.db"))
+    record_change(history, T0, "203.0.113.1", 3)
+    history.close()
+    reopened = History(str(tmp_path / "history.db"), read_only=True)
+    assert reopened.stats()["domains"]["a"]["updated"] == 1
+    reopened.close()
+
+def test_parse_age():
+    assert (parse_age("90d"), parse_age("12h"), parse_age("2w"), parse_age("7"), parse_age("soon")) == (90 * 86400, 12 * 3600, 14 * 86400, 7 * 86400, None)
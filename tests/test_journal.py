@@ -0,0 +1,51 @@
+import time
+
+from standins import Profile
+
+from duckdns.config import ConfigManager
+from duckdns.journal import UpdateJournal
+from duckdns.worker import UpdateWorker
+
+def test_newest_ip_replaces_queued_entry(tmp_path):
+    journal = UpdateJournal(str(tmp_path / "journal.json"))
+    journal.add(["a", "b"], "DuckDNS", "203.0.113.10", None)
+    journal.failed("a")
+    journal.add(["a"], "DuckDNS", "203.0.113.10", None)  # same IPs : keeps its retry count
+    assert journal.pending()["a"]["attempts"] == 1
+    journal.add(["a"], "DuckDNS", "203.0.113.11", None)  # newer IP : replaces the entry, due now
+    assert journal.pending()["a"]["ip"] == "203.0.113.11" and journal.pending()["a"]["attempts"] == 0
+    journal.done("a", "203.0.113.10")  # confirmation of the older IP leaves the newer one queued
+    assert set(journal.pending()) == {"a", "b"}
+    journal.retain({"b"})
+    assert set(journal.pending()) == {"b"}
+
+def test_backoff_doubles_with_jitter_up_to_max(tmp_path):
+    journal = UpdateJournal()
+    journal.add(["a"], "DuckDNS", "203.0.113.10", None)
+    for attempt in range(8):
+        before = time.time(); journal.failed("a")
+        delay = min(UpdateJournal.RETRY_MIN * 2 ** attempt, UpdateJournal.RETRY_MAX)
+        assert delay * (1 - UpdateJournal.JITTER) <= journal.next_due() - before <= delay * (1 + UpdateJournal.JITTER) + 0.1
+    assert journal.pending(due_by=time.time()) == {}
+
+def test_journal_survives_restart(tmp_path):
+    journal = UpdateJournal(str(tmp_path / "journal.json"))
+    journal.add(["a"], "DuckDNS", "203.0.113.10", "2001:db8::10"); journal.failed("a"); journal.save()
+    entry = UpdateJournal(str(tmp_path / "journal.json")).pending()["a"]
+    assert (entry["ip"], entry["ipv6"], entry["attempts"]) == ("203.0.113.10", "2001:db8::10", 1)
+
+def test_failed_update_is_replayed(standins, tmp_path, monkeypatch):
+    monkeypatch.setattr(UpdateJournal, "RETRY_MIN", 0.2)
+    config_file = tmp_path / "config.ini"
+    config_file.write_text("[DuckDNS]\ndomain = a,b\ntoken = bench-token\n[Settings]\nnotifications = NO\ninterval = 1h\n")
+    worker = UpdateWorker(ConfigManager(str(config_file)))
+    standins.attach(worker.client)
+    standins.update_profile = Profile(failure_rate=1.0)
+    worker.run_due()
+    assert set(worker.journal.pending()) == {"a", "b"} and standins.records == {}
+    standins.update_profile = Profile()
+    time.sleep(worker.run_due())  # the next cycle is an hour away : the journal is due first
+    worker.run_due()
+    assert len(worker.journal) == 0 and set(standins.records) == {"a", "b"}
+    # Replayed with the queued IP, without another lookup
+    assert standins.ip_requests == 1
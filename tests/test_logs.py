@@ -0,0 +1,28 @@
+import logging
+
+from duckdns.logs import SamplingFilter
+
+
+def record(message, level=logging.INFO):
+    return logging.LogRecord("root", level, __file__, 1, message, None, None)
+
+
+def test_routine_messages_are_sampled():
+    sampler = SamplingFilter(every=3)
+    passed = [sampler.filter(record("IP unchanged : 203.0.113.10")) for _ in range(7)]
+    assert passed == [True, False, False, True, False, False, True]
+    assert sampler.filter(record("Update failed for a"))
+    assert sampler.filter(record("Internet connection check successful", logging.WARNING))
+
+
+def test_a_new_ip_is_always_logged():
+    sampler = SamplingFilter(every=10)
+    for _ in range(3): sampler.filter(record("Successfully retrieved public IP 203.0.113.10 from https://ip.example"))
+    assert sampler.filter(record("Successfully retrieved public IP 198.51.100.7 from https://ip.example"))
+
+
+def test_skipped_count_is_noted():
+    sampler = SamplingFilter(every=2)
+    first, second, third = (record("Local network unchanged, skipping remote IP lookup.") for _ in range(3))
+    assert sampler.filter(first) and not sampler.filter(second) and sampler.filter(third)
+    assert third.getMessage().endswith("(1 similar messages skipped)")
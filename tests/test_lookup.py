@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from duckdns.client import DuckDNSClient
+from duckdns.transport import TransportError
+
+KNOWN, NEW, OTHER = "203.0.113.10", "203.0.113.20", "198.51.100.77"
+
+
+def lookup_client(mode, answers, quorum=2):
+    """A client whose providers are test://<name>, answering `answers[name]` : (delay, IP or None for a failure)."""
+    client = DuckDNSClient(lookup_mode=mode, quorum=quorum)
+    client.IP_PROVIDERS = [f"test://{name}" for name in answers]
+    client.asked = []
+
+    def lookup(provider):
+        name = provider[len("test://"):]
+        client.asked.append(name)
+        delay, answer = answers[name]
+        time.sleep(delay)
+        if answer is None: raise TransportError("connection refused")
+        return answer
+
+    client.register_backend("test", lookup)
+    return client
+
+
+@pytest.fixture
+def clients():
+    created = []
+    def create(*args, **kwargs):
+        created.append(lookup_client(*args, **kwargs)); return created[-1]
+    yield create
+    for client in created: client.close()
+
+
+def test_race_takes_the_first_valid_answer(clients):
+    client = clients("race", {"slow": (0.5, OTHER), "fast": (0.05, NEW), "failing": (0, None)})
+    started = time.monotonic()
+    assert client.get_public_ip() == NEW
+    assert time.monotonic() - started < 0.4
+
+
+def test_race_ignores_invalid_answers(clients):
+    client = clients("race", {"garbage": (0, "<html>rate limited</html>"), "v6": (0, "2001:db8::10"), "good": (0.1, NEW)})
+    assert client.get_public_ip() == NEW
+    stats = client.scoreboard.stats()
+    assert stats["test://garbage"]["error_rate"] == 1 and stats["test://v6"]["error_rate"] == 1
+
+
+def test_race_without_a_valid_answer(clients):
+    client = clients("race", {"garbage": (0, "not an ip"), "failing": (0, None)})
+    assert client.get_public_ip() is None
+
+
+def test_quorum_agreement(clients):
+    client = clients("quorum", {"a": (0, NEW), "b": (0.05, OTHER), "c": (0.1, NEW)})
+    assert client.get_public_ip() == NEW
+
+
+def test_quorum_when_providers_disagree(clients):
+    # One provider alone doesn't decide the IP changed, however fast it is
+    client = clients("quorum", {"liar": (0, OTHER), "a": (0.1, NEW), "b": (0.2, NEW)})
+    assert client.get_public_ip(known_ip=KNOWN) == NEW
+    assert sorted(client.asked) == ["a", "b", "liar"]
+
+
+def test_quorum_accepts_the_known_ip_at_once(clients):
+    client = clients("quorum", {"a": (0, KNOWN), "b": (0.5, KNOWN), "c": (0.5, OTHER)})
+    started = time.monotonic()
+    assert client.get_public_ip(known_ip=KNOWN) == KNOWN
+    assert time.monotonic() - started < 0.4
+
+
+def test_quorum_not_reached(clients, caplog):
+    client = clients("quorum", {"a": (0, NEW), "b": (0, OTHER), "c": (0, None), "d": (0, "garbage")}, quorum=2)
+    assert client.get_public_ip(known_ip=KNOWN) is None
+    assert "No IPv4 reached a quorum of 2 providers" in caplog.text
+
+
+def test_quorum_larger_than_the_providers(clients):
+    client = clients("quorum", {"a": (0, NEW), "b": (0, NEW)}, quorum=3)
+    assert client.get_public_ip() is None
+
+
+def test_concurrent_lookup_uses_one_round_of_requests(clients):
+    client = clients("race", {"a": (0.2, NEW), "b": (0.2, NEW)})
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.get_public_ip())) for _ in range(4)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join(2)
+    assert results == [NEW] * 4 and sorted(client.asked) == ["a", "b"]
+
+
+def test_race_against_the_standins(standins, client):
+    client.lookup_mode = "race"
+    assert client.get_public_ip() == standins.public_ip
+    assert client.get_public_ip(version=6) == standins.public_ipv6
+
+
+def test_answers_are_normalized(clients):
+    # The same address written three ways is one answer, in one form
+    client = clients("quorum", {"upper": (0, "2001:DB8::10"), "long": (0, "2001:0db8:0:0:0:0:0:0010\n")})
+    client.IPV6_PROVIDERS = client.IP_PROVIDERS
+    assert client.get_public_ip(known_ip="2001:db8::1", version=6) == "2001:db8::10"
@@ -0,0 +1,124 @@
+import socket
+import struct
+import threading
+
+import pytest
+
+from duckdns import netwatch
+from duckdns.netwatch import ChangeDetector, natpmp_external_address
+
+
+class NatPmpGateway:
+    """Answers NAT-PMP external address requests on a local UDP port with `address`, or with `reply` as is."""
+    def __init__(self, address="198.51.100.7"):
+        self.address, self.reply, self.requests = address, None, []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try: request, peer = self.sock.recvfrom(16)
+            except OSError: return
+            self.requests.append(peer)
+            reply = self.reply if self.reply is not None else struct.pack("!BBHI", 0, 128, 0, 0) + socket.inet_aton(self.address)
+            self.sock.sendto(reply, peer)
+
+    def close(self): self.sock.close()
+
+
+def closed_port():
+    """A local UDP port nothing listens on."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0)); return sock.getsockname()[1]
+
+
+@pytest.fixture
+def gateway():
+    gateway = NatPmpGateway()
+    yield gateway
+    gateway.close()
+
+
+def test_bound_source_address_watches_its_gateway(gateway):
+    detector = ChangeDetector(gateway="127.0.0.1", natpmp_port=gateway.port, source_address="127.0.0.1")
+    fingerprint = detector.fingerprint()
+    # The default route belongs to another uplink, so it is not a signal
+    assert fingerprint == {"gateway": "127.0.0.1", "natpmp": "198.51.100.7"}
+    assert gateway.requests[0][0] == "127.0.0.1"
+    detector.lookup_done(fingerprint)
+    gateway.address = "198.51.100.8"
+    assert detector.lookup_needed()[0]
+
+
+def test_bound_source_address_without_gateway_always_looks_up():
+    detector = ChangeDetector(source_address="127.0.0.1")
+    needed, fingerprint = detector.lookup_needed()
+    detector.lookup_done(fingerprint)
+    assert fingerprint == {} and detector.lookup_needed()[0]
+
+
+def test_proxy_always_looks_up(gateway):
+    detector = ChangeDetector(gateway="127.0.0.1", natpmp_port=gateway.port, proxy="socks5://127.0.0.1:1080")
+    detector.lookup_done(detector.fingerprint())
+    assert detector.lookup_needed()[0] and not gateway.requests
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(netwatch.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_unchanged_network_skips_lookups_until_stale(gateway, clock):
+    detector = ChangeDetector(max_staleness=600, gateway="127.0.0.1", natpmp_port=gateway.port, source_address="127.0.0.1")
+    needed, fingerprint = detector.lookup_needed()
+    assert needed  # nothing to compare with yet
+    detector.lookup_done(fingerprint)
+    clock[0] += 599
+    assert detector.lookup_needed() == (False, fingerprint)
+    clock[0] += 1
+    assert detector.lookup_needed() == (True, fingerprint)
+    detector.lookup_done(fingerprint)
+    assert not detector.lookup_needed()[0]
+
+
+def test_changed_fingerprint_looks_up_at_once(gateway, clock):
+    detector = ChangeDetector(max_staleness=600, gateway="127.0.0.1", natpmp_port=gateway.port, source_address="127.0.0.1")
+    detector.lookup_done(detector.fingerprint())
+    gateway.address = "198.51.100.8"
+    needed, fingerprint = detector.lookup_needed()
+    assert needed and fingerprint["natpmp"] == "198.51.100.8"
+    # Until a lookup succeeds with it, the new fingerprint keeps asking for one
+    assert detector.lookup_needed()[0]
+    detector.lookup_done(fingerprint)
+    assert not detector.lookup_needed()[0]
+
+
+def test_no_signal_always_looks_up(clock):
+    # A gateway without NAT-PMP : nothing answers, so nothing can tell the IP is unchanged
+    detector = ChangeDetector(gateway="127.0.0.1", natpmp_port=closed_port(), source_address="127.0.0.1")
+    detector.lookup_done(detector.fingerprint())
+    assert detector.lookup_needed() == (True, {"gateway": "127.0.0.1", "natpmp": None})
+
+
+def test_natpmp_external_address(gateway):
+    assert natpmp_external_address("127.0.0.1", gateway.port) == "198.51.100.7"
+
+
+@pytest.mark.parametrize("reply", [
+    b"",                                                                          # empty
+    struct.pack("!BBHI", 0, 128, 0, 0) + b"\xc6\x33",                             # cut short
+    struct.pack("!BBHI", 0, 128, 3, 0) + socket.inet_aton("198.51.100.7"),        # error result : network failure
+    struct.pack("!BBHI", 0, 129, 0, 0) + socket.inet_aton("198.51.100.7"),        # another opcode
+    struct.pack("!BBHI", 2, 128, 0, 0) + socket.inet_aton("198.51.100.7"),        # PCP, not NAT-PMP
+])
+def test_natpmp_invalid_reply(gateway, reply):
+    gateway.reply = reply
+    assert natpmp_external_address("127.0.0.1", gateway.port) is None and gateway.requests
+
+
+def test_natpmp_no_answer():
+    assert natpmp_external_address("127.0.0.1", closed_port(), timeout=0.1) is None
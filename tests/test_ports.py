@@ -0,0 +1,95 @@
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from duckdns import ports
+from duckdns.ports import MAX_PORTS, parse_hosts, parse_ports, scan, scan_async
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("80,443,8000-8010", [80, 443] + list(range(8000, 8011))),
+    ("443, 80 ,443,,", [80, 443]),
+    ("8001-8001", [8001]),
+    ("1,65535", [1, 65535]),
+    (25565, [25565]),
+])
+def test_parse_ports(value, expected):
+    assert parse_ports(value) == expected
+
+
+@pytest.mark.parametrize("value, message", [
+    ("", "No port given"),
+    ("http", "Invalid port or range : 'http'"),
+    ("80-", "Invalid port or range"),
+    ("-80", "Invalid port or range"),
+    ("1-2-3", "Invalid port or range"),
+    ("0", "between 1 and 65535"),
+    ("65536", "between 1 and 65535"),
+    ("8010-8000", "between 1 and 65535"),
+    (f"1-{MAX_PORTS + 1}", "Too many ports"),
+])
+def test_parse_invalid_ports(value, message):
+    with pytest.raises(ValueError, match=message): parse_ports(value)
+
+
+def test_parse_hosts():
+    assert parse_hosts("a.example, b.example  a.example,c.example") == ["a.example", "b.example", "c.example"]
+
+
+@pytest.fixture
+def listening():
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0)); server.listen()
+        yield server.getsockname()[1]
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0)); return sock.getsockname()[1]
+
+
+def test_scan_open_and_closed(listening):
+    closed = closed_port()
+    seen = []
+    results = asyncio.run(scan_async(["127.0.0.1"], [listening, closed], timeout=2, on_result=lambda *result: seen.append(result)))
+    assert sorted(results) == sorted(seen) == sorted([
+        ("127.0.0.1", listening, True, f"Success : Port {listening} is open on 127.0.0.1."),
+        ("127.0.0.1", closed, False, f"Failed : Port {closed} is closed on 127.0.0.1 (Connection refused)."),
+    ])
+
+
+def test_scan_timeout(listening, monkeypatch):
+    async def never_connects(host, port): await asyncio.sleep(10)
+    monkeypatch.setattr(ports.asyncio, "open_connection", never_connects)
+    (result,) = scan(["127.0.0.1"], [listening], timeout=0.1)
+    assert result == ("127.0.0.1", listening, False, f"Failed : Port {listening} is closed on 127.0.0.1 (Connection timed out).")
+
+
+def test_scan_limits_concurrency(listening, monkeypatch):
+    running, peak = [0], [0]
+    connect = asyncio.open_connection
+
+    async def counted(host, port):
+        running[0] += 1; peak[0] = max(peak[0], running[0])
+        try:
+            await asyncio.sleep(0.01)
+            return await connect(host, port)
+        finally: running[0] -= 1
+
+    monkeypatch.setattr(ports.asyncio, "open_connection", counted)
+    results = scan(["127.0.0.1"], [listening] * 20, concurrency=3)
+    assert len(results) == 20 and peak[0] == 3
+
+
+def test_scan_stops_early(listening):
+    stop = threading.Event(); stop.set()
+    assert len(scan(["127.0.0.1"], [listening, closed_port()], stop_event=stop)) == 1
+
+
+def test_main(listening, capsys):
+    assert ports.main(str(listening), "127.0.0.1") == 0
+    assert ports.main(f"{listening},{closed_port()}", "127.0.0.1") == 1
+    assert ports.main("99999", "127.0.0.1") == 2
+    assert "Error : Ports must be between 1 and 65535" in capsys.readouterr().out
@@ -0,0 +1,60 @@
+import pytest
+
+from duckdns.protocol import BatchPlan, Votes, answer_kind
+
+
+def run(plan, answer):
+    """Drives `plan` with `answer(domains)`; returns the results and the requests sent, round by round."""
+    rounds = []
+    while plan.pending:
+        requests = plan.next_round()
+        rounds.append(requests)
+        plan.answered([answer(domains) for domains in requests])
+    return plan.results, rounds
+
+
+def duckdns(invalid=(), token_ok=True, failing=()):
+    def answer(domains):
+        if any(domain in failing for domain in domains): return "ERROR"
+        return "OK" if token_ok and not set(domains) & set(invalid) else "KO"
+    return answer
+
+
+@pytest.mark.parametrize("result, kind", [("OK", "OK"), ("OK\n203.0.113.10\n\nUPDATED", "OK"), ("KO", "KO"), ("ERROR", "ERROR"), ("", "ERROR")])
+def test_answer_kind(result, kind):
+    assert answer_kind(result) == kind
+
+
+def test_split_isolates_rejected_domains():
+    results, rounds = run(BatchPlan([list("abcd")]), duckdns(invalid={"c"}))
+    assert results == {"a": "OK", "b": "OK", "c": "KO", "d": "OK"}
+    assert rounds == [[list("abcd")], [list("ab"), list("cd")], [["c"], ["d"]]]
+
+
+def test_never_accepted_token_gives_up_keeping_other_answers():
+    # Two batches (the URL got too long) : one rejected, one without an answer
+    results, rounds = run(BatchPlan([list("ab"), list("cd")], token_accepted=False), duckdns(token_ok=False, failing={"c"}))
+    assert results == {"a": "KO", "b": "KO", "c": "ERROR", "d": "ERROR"} and len(rounds) == 1
+
+
+def test_rejected_probes_give_up_on_the_rest():
+    results, rounds = run(BatchPlan([list("abcdef")], known_good={"a", "d"}), duckdns(token_ok=False))
+    assert results == dict.fromkeys("abcdef", "KO")
+    assert rounds == [[list("abcdef")], [["a"]], [list("bcdef")], [["d"]]]
+
+
+def test_accepted_probe_splits_the_rest():
+    results, _ = run(BatchPlan([list("abc")], known_good={"a"}), duckdns(invalid={"c"}))
+    assert results == {"a": "OK", "b": "OK", "c": "KO"}
+
+
+def test_unanswered_probe_retries_the_rest():
+    results, rounds = run(BatchPlan([list("abc")], known_good={"a"}), lambda domains: "ERROR" if domains == ["a"] else "KO" if "c" in domains else "OK")
+    assert results == {"a": "ERROR", "b": "OK", "c": "KO"} and rounds[2] == [list("bc")]
+
+
+def test_votes():
+    votes = Votes(2, known_ip="203.0.113.1")
+    assert votes.add("198.51.100.1") is None and votes.add(None) is None
+    assert votes.add("198.51.100.1") == "198.51.100.1"
+    assert Votes(3, known_ip="203.0.113.1").add("203.0.113.1") == "203.0.113.1"
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from duckdns import providers
+from duckdns.providers import ProviderScoreboard
+
+FAST, SLOW, FLAKY = "https://fast.example", "https://slow.example", "https://flaky.example"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(providers.time, "time", lambda: now[0])
+    return now
+
+
+def test_ranks_by_rolling_latency():
+    board = ProviderScoreboard()
+    for _ in range(5): board.record_success(SLOW, 0.8); board.record_success(FAST, 0.05)
+    assert board.rank([SLOW, FAST]) == [FAST, SLOW]
+    # Untried providers go first so that they get measured, equal scores keep the configured order
+    assert board.rank([SLOW, "https://new.example", FAST]) == ["https://new.example", FAST, SLOW]
+    # Only the last WINDOW outcomes count
+    for _ in range(ProviderScoreboard.WINDOW): board.record_success(FAST, 2.0)
+    assert board.rank([SLOW, FAST]) == [SLOW, FAST]
+
+
+def test_errors_weigh_on_the_rank():
+    board = ProviderScoreboard()
+    for _ in range(4): board.record_success(FLAKY, 0.1); board.record_success(SLOW, 0.15)
+    board.record_failure(FLAKY, 1.0); board.record_failure(FLAKY, 1.0)
+    assert board.rank([FLAKY, SLOW]) == [SLOW, FLAKY]
+    assert board.stats()[FLAKY]["error_rate"] == pytest.approx(2 / 6)
+
+
+def test_circuit_opens_after_consecutive_failures(clock):
+    board = ProviderScoreboard()
+    for _ in range(ProviderScoreboard.FAILURE_THRESHOLD - 1): board.record_failure(FLAKY, 1.0)
+    assert board.rank([FLAKY, FAST]) == [FAST, FLAKY]
+    board.record_failure(FLAKY, 1.0)
+    assert board.rank([FLAKY, FAST]) == [FAST]
+    assert board.rank([FLAKY, FAST], include_open=True) == [FAST, FLAKY]
+    assert board.stats()[FLAKY]["open_until"] == clock[0] + ProviderScoreboard.BASE_BACKOFF
+    # With every circuit open, all are still tried rather than none
+    assert board.rank([FLAKY]) == [FLAKY]
+
+
+def test_half_open_retry(clock):
+    board = ProviderScoreboard()
+    for _ in range(ProviderScoreboard.FAILURE_THRESHOLD): board.record_failure(FLAKY, 1.0)
+    clock[0] += ProviderScoreboard.BASE_BACKOFF
+    assert board.rank([FLAKY, FAST]) == [FAST, FLAKY]  # may be tried again
+    # A failed retry opens the circuit again for twice as long
+    board.record_failure(FLAKY, 1.0)
+    assert board.rank([FLAKY, FAST]) == [FAST]
+    assert board.stats()[FLAKY]["open_until"] == clock[0] + 2 * ProviderScoreboard.BASE_BACKOFF
+    clock[0] += 2 * ProviderScoreboard.BASE_BACKOFF
+    # A successful one closes it
+    board.record_success(FLAKY, 0.1)
+    board.record_failure(FLAKY, 1.0)
+    assert FLAKY in board.rank([FLAKY, FAST])
+
+
+def test_backoff_is_capped(clock):
+    board = ProviderScoreboard()
+    for _ in range(ProviderScoreboard.FAILURE_THRESHOLD + 20): board.record_failure(FLAKY, 1.0)
+    assert board.stats()[FLAKY]["open_until"] == clock[0] + ProviderScoreboard.MAX_BACKOFF
+
+
+def test_persists_to_providers_json(tmp_path, clock):
+    filename = str(tmp_path / "providers.json")
+    board = ProviderScoreboard(filename)
+    board.record_success(FAST, 0.05)
+    for _ in range(ProviderScoreboard.FAILURE_THRESHOLD): board.record_failure(FLAKY, 1.0)
+    board.save()
+    saved = json.load(open(filename))["providers"]
+    assert saved[FAST]["samples"] == [[0.05, True]] and saved[FLAKY]["consecutive_failures"] == 3
+
+    restored = ProviderScoreboard(filename)
+    assert restored.stats() == board.stats()
+    assert restored.rank([FLAKY, FAST]) == [FAST]
+
+
+def test_saves_only_changes(tmp_path):
+    filename = tmp_path / "providers.json"
+    board = ProviderScoreboard(str(filename))
+    board.save()
+    assert not filename.exists()
+    board.record_success(FAST, 0.05); board.save()
+    filename.unlink(); board.save()
+    assert not filename.exists()
+
+
+def test_ignores_an_unreadable_file(tmp_path):
+    filename = tmp_path / "providers.json"
+    filename.write_text("[1, 2")
+    assert ProviderScoreboard(str(filename)).rank([SLOW, FAST]) == [SLOW, FAST]
@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from duckdns.ratelimit import RateLimiter, SingleFlight, TokenBucket, TtlCache
+
+
+class Clock:
+    def __init__(self): self.now = 1000.0
+    def __call__(self): return self.now
+
+
+def test_burst_then_refill():
+    clock = Clock()
+    bucket = TokenBucket(rate=0.5, burst=3, clock=clock)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    # Empty : each further request waits for its own token, in order
+    assert bucket.reserve() == pytest.approx(2) and bucket.reserve() == pytest.approx(4)
+    clock.now += 5
+    # 2.5 tokens earned, 2 of them owed
+    assert bucket.reserve() == pytest.approx(1)
+    clock.now += 100  # refills up to the burst, no more
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0] and bucket.reserve() == pytest.approx(2)
+
+
+def test_reserve_beyond_max_wait_takes_nothing():
+    clock = Clock()
+    bucket = TokenBucket(rate=1, burst=1, clock=clock)
+    assert bucket.reserve(max_wait=0) == 0
+    assert bucket.reserve(max_wait=0.5) is None
+    assert bucket.reserve(max_wait=1) == pytest.approx(1)
+
+
+def test_limiter_buckets_per_endpoint():
+    limiter = RateLimiter({"provider": (1, 1)})
+    assert limiter.reserve("provider", "a", 0) == 0 and limiter.reserve("provider", "b", 0) == 0
+    assert limiter.reserve("provider", "a", 0) is None
+    assert limiter.reserve("update", "a", 0) == 0  # no budget, not limited
+    limiter.configure({"provider": (1, 5)})
+    assert limiter.reserve("provider", "a", 0) == 0
+
+
+def test_single_flight_shares_one_call():
+    flights, calls, release = SingleFlight(), [], threading.Event()
+
+    def lookup():
+        calls.append(1); release.wait(2); return "203.0.113.10"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("ip", lookup))) for _ in range(5)]
+    for thread in threads: thread.start()
+    while not calls: pass
+    release.set()
+    for thread in threads: thread.join(2)
+    assert calls == [1] and results == ["203.0.113.10"] * 5
+    assert flights.do("ip", lambda: "again") == "again"
+
+
+def test_single_flight_shares_the_error():
+    flights, errors = SingleFlight(), []
+    future, leader = flights.begin("ip")
+    assert leader
+
+    def follower():
+        try: flights.do("ip", lambda: "not called")
+        except ValueError as e: errors.append(e)
+
+    thread = threading.Thread(target=follower); thread.start()
+    flights.finish("ip", error=ValueError("all providers failed"))
+    thread.join(2)
+    assert [str(e) for e in errors] == ["all providers failed"]
+    with pytest.raises(ZeroDivisionError): flights.do("ip", lambda: 1 / 0)
+    assert flights.begin("ip")[1]
+
+
+def test_ttl_expiry():
+    clock = Clock()
+    cache = TtlCache(30, clock=clock)
+    cache.put(4, "203.0.113.10"); cache.put(6, None)
+    assert cache.get(4) == "203.0.113.10" and cache.get(6) is None
+    clock.now += 29.9
+    assert cache.get(4) == "203.0.113.10"
+    clock.now += 0.1
+    assert cache.get(4) is None
+    disabled = TtlCache(0, clock=clock)
+    disabled.put(4, "203.0.113.10")
+    assert disabled.get(4) is None
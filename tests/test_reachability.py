@@ -0,0 +1,124 @@
+import socket
+
+import pytest
+
+from duckdns import reachability
+from duckdns.client import DuckDNSClient
+from duckdns.config import ConfigManager
+from duckdns.reachability import Reachability
+from standins import Profile
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(reachability.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def listening():
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0)); server.listen()
+        yield ("127.0.0.1", server.getsockname()[1])
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0)); return ("127.0.0.1", sock.getsockname()[1])
+
+
+def test_results_are_reused_within_their_ttl(clock):
+    state = Reachability(ttl=60, offline_ttl=10)
+    assert state.cached() is None
+    state.record(True)
+    clock[0] += 59.9
+    assert state.cached() is True
+    clock[0] += 0.1
+    assert state.cached() is None
+    state.probed(False)
+    clock[0] += 9.9
+    assert state.cached() is False
+    clock[0] += 0.1
+    assert state.cached() is None
+
+
+def test_consecutive_failures_drop_the_cached_result(clock):
+    state = Reachability(ttl=60)
+    state.record(True)
+    for _ in range(Reachability.FAILURE_THRESHOLD - 1): state.record(False)
+    assert state.cached() is True  # one provider down proves nothing
+    state.record(True)
+    for _ in range(Reachability.FAILURE_THRESHOLD - 1): state.record(False)
+    assert state.cached() is True
+    state.record(False)
+    assert state.cached() is None
+
+
+def test_listeners_run_when_the_connection_is_back():
+    state, calls = Reachability(), []
+    state.listeners.extend([lambda: 1 / 0, lambda: calls.append("replay")])
+    state.record(True); state.probed(True)
+    assert calls == []
+    state.probed(False); state.record(False)
+    assert calls == []
+    state.record(True)
+    assert calls == ["replay"]
+    state.record(True)
+    assert calls == ["replay"]
+
+
+def test_probes_are_only_sent_when_stale(listening):
+    client = DuckDNSClient(connectivity_probes=[listening])
+    try:
+        opened = []
+        connect = client._connect
+        client._connect = lambda address, timeout: opened.append(address) or connect(address, timeout)
+        assert client.is_connected() and client.is_connected()
+        assert opened == [listening]
+        client.reachability.ttl = 0
+        assert client.is_connected() and opened == [listening] * 2
+    finally: client.close()
+
+
+def test_configurable_probes(listening):
+    # The first probe that answers decides
+    client = DuckDNSClient(connectivity_probes=[closed_port(), listening])
+    try: assert client.is_connected() and client.reachability.cached() is True
+    finally: client.close()
+    client = DuckDNSClient(connectivity_probes=[closed_port(), closed_port()])
+    try: assert not client.is_connected() and client.reachability.cached() is False
+    finally: client.close()
+
+
+def test_no_probes_trusts_the_requests():
+    client = DuckDNSClient(connectivity_probes=())
+    try:
+        assert client.is_connected()
+        for _ in range(Reachability.FAILURE_THRESHOLD): client.reachability.record(False)
+        assert client.is_connected()
+    finally: client.close()
+
+
+def test_probes_from_the_config(tmp_path):
+    config_file = tmp_path / "config.ini"
+    config = ConfigManager(str(config_file))
+    assert config.get_client_options()["connectivity_probes"] is None
+    config_file.write_text("[Network]\nconnectivity_probes = 192.0.2.1:443, [2001:db8::1]:80 192.0.2.2\nreachability_ttl = 5\n")
+    config.load()
+    options = config.get_client_options()
+    assert options["connectivity_probes"] == (("192.0.2.1", 443), ("2001:db8::1", 80), ("192.0.2.2", 53))
+    assert options["reachability_ttl"] == 5
+    config_file.write_text("[Network]\nconnectivity_probes = none\n")
+    config.load()
+    assert config.get_client_options()["connectivity_probes"] == ()
+
+
+def test_failed_updates_invalidate_the_cached_result(standins, client):
+    assert client.is_connected() and client.reachability.cached() is True
+    standins.update_profile = Profile(failure_rate=1)
+    for _ in range(Reachability.FAILURE_THRESHOLD): assert client.update_duckdns("a", "bench-token", "203.0.113.10") == "ERROR"
+    assert client.reachability.cached() is None
+    # The next check probes again instead of trusting the earlier success
+    standins.stop()
+    assert not client.is_connected(timeout=0.5)
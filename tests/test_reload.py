@@ -0,0 +1,18 @@
+from duckdns.config import ConfigManager
+from duckdns.worker import UpdateWorker
+
+def test_config_change_applies_on_the_worker_thread(standins, tmp_path):
+    config_file = tmp_path / "config.ini"
+    config_file.write_text("[DuckDNS]\ndomain = a\ntoken = bench-token\n[Settings]\nnotifications = NO\ninterval = 1h\n")
+    worker = UpdateWorker(ConfigManager(str(config_file)))
+    standins.attach(worker.client)
+    worker.run_due()
+    schedule = worker.schedule
+    config_file.write_text("[DuckDNS]\ndomain = a,b\ntoken = bench-token\n[Settings]\nnotifications = NO\ninterval = 2h\n")
+    # What the config watcher thread does : nothing changes until the worker's next cycle
+    assert worker.config.reload_if_changed()
+    worker._on_config_changed()
+    assert worker.schedule is schedule and [account["domains"] for account in worker._applied.accounts] == [["a"]]
+    assert worker.run_due() > 3600
+    assert worker.schedule is not schedule and worker.schedule.interval == 7200
+    assert set(standins.records) == {"a", "b"}
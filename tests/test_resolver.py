@@ -0,0 +1,113 @@
+import socket
+import struct
+import threading
+
+import pytest
+
+from duckdns import resolver
+from duckdns.resolver import TYPE_A, TYPE_AAAA, TYPE_TXT, DnsError, DnsTimeout, build_query, parse_response, query
+
+
+def record(rtype, rdata, name=b"\xc0\x0c"):
+    return name + struct.pack("!HHIH", rtype, 1, 60, len(rdata)) + rdata
+
+
+def response(request, records=(), flags=0x8180, query_id=None):
+    """A response to `request` (a query in wire format) with the given answer records."""
+    (request_id,) = struct.unpack_from("!H", request)
+    header = struct.pack("!HHHHHH", request_id if query_id is None else query_id, flags, 1, len(records), 0, 0)
+    return header + request[12:] + b"".join(records)
+
+
+class DnsServer:
+    """A DNS server on a local UDP port. `answer(request)` returns the datagrams to send back."""
+    def __init__(self, answer):
+        self.answer, self.requests = answer, []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try: request, address = self.sock.recvfrom(4096)
+            except OSError: return
+            self.requests.append(request)
+            for datagram in self.answer(request): self.sock.sendto(datagram, address)
+
+    def close(self): self.sock.close()
+
+
+@pytest.fixture
+def dns():
+    servers = []
+    def serve(answer):
+        servers.append(DnsServer(answer)); return servers[-1]
+    yield serve
+    for server in servers: server.close()
+
+
+def test_query_encoding():
+    packet = build_query("myip.Example.com.", TYPE_AAAA, 0x1234)
+    assert packet == (struct.pack("!HHHHHH", 0x1234, 0x0100, 1, 0, 0, 0)
+                      + b"\x04myip\x07Example\x03com\x00" + struct.pack("!HH", TYPE_AAAA, 1))
+    assert build_query("example.com", TYPE_A, 1, recursion=False)[2:4] == b"\x00\x00"
+    with pytest.raises(DnsError, match="Invalid DNS name"): build_query("a" * 64 + ".com", TYPE_A, 1)
+
+
+def test_answers(dns):
+    cname = record(5, b"\x03www\xc0\x0c")
+    server = dns(lambda request: [response(request, [cname, record(TYPE_A, bytes([203, 0, 113, 10])),
+                                                     record(TYPE_AAAA, socket.inet_pton(socket.AF_INET6, "2001:db8::10")),
+                                                     record(TYPE_TXT, b"\x05203.0\x07.113.10")])])
+    assert query("127.0.0.1", "myip.example.com", TYPE_A, port=server.port) == [
+        (TYPE_A, "203.0.113.10"), (TYPE_AAAA, "2001:db8::10"), (TYPE_TXT, "203.0.113.10")]
+    assert server.requests[0][12:] == build_query("myip.example.com", TYPE_A, 0)[12:]
+
+
+def test_other_ids_are_ignored(dns):
+    # e.g. a late answer to an earlier query : the one with our ID is still accepted
+    server = dns(lambda request: [response(request, [record(TYPE_A, bytes(4))], query_id=struct.unpack_from("!H", request)[0] ^ 1),
+                                  response(request, [record(TYPE_A, bytes([203, 0, 113, 10]))])])
+    assert query("127.0.0.1", "myip.example.com", port=server.port) == [(TYPE_A, "203.0.113.10")]
+
+
+def test_only_other_ids_time_out(dns):
+    server = dns(lambda request: [response(request, query_id=struct.unpack_from("!H", request)[0] ^ 1)])
+    with pytest.raises(DnsTimeout): query("127.0.0.1", "myip.example.com", timeout=0.3, port=server.port)
+
+
+def test_no_answer_times_out(dns):
+    server = dns(lambda request: [])
+    with pytest.raises(DnsTimeout): query("127.0.0.1", "myip.example.com", timeout=0.2, port=server.port)
+
+
+def test_truncated_response(dns):
+    server = dns(lambda request: [response(request, flags=0x8380)])
+    with pytest.raises(DnsError, match="truncated"): query("127.0.0.1", "myip.example.com", port=server.port)
+
+
+def test_error_code(dns):
+    server = dns(lambda request: [response(request, flags=0x8183)])  # NXDOMAIN
+    with pytest.raises(DnsError, match="error code 3"): query("127.0.0.1", "myip.example.com", port=server.port)
+
+
+def test_mismatched_response():
+    request = build_query("myip.example.com", TYPE_A, 7)
+    with pytest.raises(DnsError, match="Unexpected"): parse_response(response(request, query_id=8), 7)
+    with pytest.raises(DnsError, match="Unexpected"): parse_response(request, 7)  # a query, not a response
+    with pytest.raises(DnsError, match="too short"): parse_response(b"\x00\x07\x81", 7)
+
+
+@pytest.mark.parametrize("cut", [1, 5, 12])
+def test_cut_off_response(cut):
+    request = build_query("myip.example.com", TYPE_A, 7)
+    message = response(request, [record(TYPE_A, bytes([203, 0, 113, 10]))])
+    with pytest.raises(DnsError, match="Malformed"): parse_response(message[:-cut], 7)
+
+
+def test_uses_the_query_id(monkeypatch, dns):
+    monkeypatch.setattr(resolver.random, "randrange", lambda *args: 0xBEEF)
+    server = dns(lambda request: [response(request)])
+    assert query("127.0.0.1", "myip.example.com", port=server.port) == []
+    assert server.requests[0][:2] == b"\xbe\xef"
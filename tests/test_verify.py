@@ -0,0 +1,102 @@
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from duckdns import resolver
+from duckdns.config import ConfigManager
+from duckdns.state import UpdateState
+from duckdns.verify import RecordVerifier
+from duckdns.worker import UpdateWorker
+
+def response(query_id, *records, flags=0x8180):
+    """A response to an A query for home.duckdns.org, with compressed names pointing at the question."""
+    question = resolver.build_query("home.duckdns.org", resolver.TYPE_A, query_id)[12:]
+    answers = b"".join(b"\xc0\x0c" + struct.pack("!HHIH", rtype, 1, 60, len(rdata)) + rdata for rtype, rdata in records)
+    return struct.pack("!HHHHHH", query_id, flags, 1, len(records), 0, 0) + question + answers
+
+def test_parse_response_answers():
+    message = response(7, (resolver.TYPE_A, socket.inet_aton("203.0.113.10")), (5, b"\x03foo\xc0\x0c"),
+                       (resolver.TYPE_AAAA, socket.inet_pton(socket.AF_INET6, "2001:db8::10")), (resolver.TYPE_TXT, b"\x038.8\x03.8."))
+    assert resolver.parse_response(message, 7) == [(resolver.TYPE_A, "203.0.113.10"), (resolver.TYPE_AAAA, "2001:db8::10"), (resolver.TYPE_TXT, "8.8.8.")]
+
+@pytest.mark.parametrize("message, error", [(response(8), "Unexpected"), (response(7, flags=0x8380), "truncated"),
+                                            (response(7, flags=0x8183), "error code 3"), (b"\x00\x07", "too short"),
+                                            (response(7, (resolver.TYPE_A, b"\x01\x02\x03\x04"))[:-3], "Malformed")])
+def test_parse_response_errors(message, error):
+    with pytest.raises(resolver.DnsError, match=error): resolver.parse_response(message, 7)
+
+def make_worker(standins, tmp_path, resolver_setting):
+    config_file = tmp_path / "config.ini"
+    config_file.write_text("[DuckDNS]\ndomain = a,b,c\ntoken = bench-token\n[Settings]\nnotifications = NO\n"
+                           f"[Network]\nverify_dns = YES\ndns_resolver = {resolver_setting}\ndrift_interval = 0\n")
+    worker = UpdateWorker(ConfigManager(str(config_file)))
+    standins.attach(worker.client)
+    return worker
+
+def test_published_and_drifted_records(standins, tmp_path):
+    worker = make_worker(standins, tmp_path, f"127.0.0.1:{standins.dns_port}")
+    standins.records["a"] = {4: standins.public_ip, 6: None}
+    assert worker.run_update_cycle()
+    # a already pointed to the public IP, so only b and c were sent
+    assert standins.updated_domains == 2 and worker.state.get("a")["response"] == "DNS"
+    standins.records["b"] = {4: "198.51.100.1", 6: None}  # changed on the DuckDNS website
+    assert worker.run_update_cycle()
+    assert standins.updated_domains == 3 and standins.records["b"][4] == standins.public_ip
+    assert worker.metrics.record_drift._values == {("b",): 1}
+    assert worker.run_update_cycle() and standins.updated_domains == 3
+
+def test_unreachable_dns_sends_updates_within_budget(standins, tmp_path):
+    # A nameserver that never answers, as where outbound UDP port 53 is blocked
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as silent:
+        silent.bind(("127.0.0.1", 0))
+        verifier = RecordVerifier([silent.getsockname()], timeout=0.5, budget=1)
+        started = time.monotonic()
+        assert verifier.check([f"d{i}" for i in range(50)], "203.0.113.10", None) == {f"d{i}": None for i in range(50)}
+        assert time.monotonic() - started < 1.5
+        worker = make_worker(standins, tmp_path, f"127.0.0.1:{silent.getsockname()[1]}")
+        assert worker.run_update_cycle() and standins.updated_domains == 3
+
+def verify_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("verify")]
+
+def test_close_stops_the_pool(standins, tmp_path):
+    before = set(verify_threads())
+    worker = make_worker(standins, tmp_path, f"127.0.0.1:{standins.dns_port}")
+    assert worker.run_update_cycle()
+    started = set(verify_threads()) - before
+    assert started
+    old = worker.verifier
+    (tmp_path / "config.ini").write_text("[DuckDNS]\ndomain = a,b,c\ntoken = bench-token\n[Settings]\nnotifications = NO\n"
+                                         f"[Network]\nverify_dns = YES\ndns_resolver = 127.0.0.1:{standins.dns_port}, 127.0.0.1:{standins.dns_port}\n")
+    worker.config.load(); worker.reload_settings()
+    assert worker.verifier is not old and old._executor is None
+    worker.close()
+    for thread in started: thread.join(2)
+    assert not any(thread.is_alive() for thread in started)
+
+def test_shared_executor_is_left_running():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        verifier = RecordVerifier([("127.0.0.1", 9)], executor=executor)
+        verifier.close()
+        assert executor.submit(int, "1").result() == 1
+
+def test_matches_compares_addresses_not_text():
+    verifier = RecordVerifier(servers=[("127.0.0.1", 53)])
+    verifier.published = lambda domain, versions: {4: "203.0.113.10", 6: "2001:db8::10"}
+    try:
+        assert verifier.matches("home", "203.0.113.10", "2001:0DB8:0000::0010")
+        assert not verifier.matches("home", "203.0.113.10", "2001:db8::11")
+    finally: verifier.close()
+
+def test_saved_addresses_are_normalized(tmp_path):
+    config_file = tmp_path / "config.ini"
+    config_file.write_text("[DuckDNS]\ndomain = a\ntoken = bench-token\n[Settings]\nnotifications = NO\n")
+    config = ConfigManager(str(config_file))
+    state = UpdateState(config.get_state_file()); state.record("a", "203.0.113.10", "2001:DB8:0::10", "OK"); state.save()
+    worker = UpdateWorker(config)
+    try: assert worker.last_ips == {"a": ("203.0.113.10", "2001:db8::10")}
+    finally: worker.close()